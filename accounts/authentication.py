@@ -0,0 +1,217 @@
+"""
+Stateless JWT authentication.
+
+Requests under ``JWT_STATELESS_PATHS`` (the API) are authenticated from the
+bearer token alone: the token is validated at most once per request, the
+result is shared between ``JWTAuthenticationMiddleware`` and DRF through
+the request, and the user is only loaded when something reads it. Nothing
+is written to the session, so API calls never touch ``django_session``.
+
+Token users come from ``user_cache``, a per-process LRU of ``User``
+objects keyed by user ID and version. As with the follow graph, each user
+has a version in the shared Django cache that ``post_save`` bumps, so a
+password change, deactivation or soft delete reaches every worker on its
+next request; entries also expire after ``AUTH_USER_CACHE_TTL`` seconds.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+VERSION_CACHE_KEY = 'auth_user:version:%s'
+VERSION_CACHE_TIMEOUT = None
+
+
+class UserCache:
+    """
+    Per-process LRU cache of authenticated users, invalidated through versions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_max_entries(self):
+        return getattr(settings, 'AUTH_USER_CACHE_SIZE', 10000)
+
+    def get_ttl(self):
+        return getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+
+    def get_version(self, user_id):
+        return cache.get(VERSION_CACHE_KEY % user_id, 0)
+
+    def get(self, user_id, load):
+        """
+        Get a copy of a cached user, calling ``load()`` to read it on a miss.
+        """
+        version = self.get_version(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if (
+                entry is not None
+                and entry[0] == version
+                and time.monotonic() - entry[1] <= self.get_ttl()
+            ):
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                # Views may change request.user, so every request gets its own copy
+                return copy.copy(entry[2])
+            self.misses += 1
+
+        user = load()
+        with self._lock:
+            self._entries[user_id] = (version, time.monotonic(), copy.copy(user))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.get_max_entries():
+                self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id):
+        """
+        Bump the version of a user so every worker reloads them.
+        """
+        key = VERSION_CACHE_KEY % user_id
+        try:
+            cache.incr(key)
+        except ValueError:
+            # incr fails on a missing key; a fresh one starts above the implicit 0
+            cache.set(key, 1, VERSION_CACHE_TIMEOUT)
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def get_stats(self):
+        """
+        Get the hit and miss counters and the size of this process's cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'size': len(self._entries),
+                'max_size': self.get_max_entries(),
+            }
+
+    def clear(self):
+        """
+        Drop every entry of this process and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that reads token users from ``user_cache``.
+    """
+
+    def get_user(self, validated_token):
+        """
+        Get the user of a validated token, from the cache when possible.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id, lambda: super(CachedJWTAuthentication, self).get_user(validated_token))
+
+        # A cached user skipped the checks of the database lookup
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+        return user
+
+
+# JWTAuthentication keeps no per-request state, so one instance serves every request
+jwt_authentication = CachedJWTAuthentication()
+
+
+def is_stateless_path(path):
+    """
+    Check whether a request path is authenticated without sessions.
+    """
+    return path.startswith(tuple(getattr(settings, 'JWT_STATELESS_PATHS', ('/api/',))))
+
+
+def get_validated_token(request):
+    """
+    Get the validated bearer token of a request, or ``None`` when it sends none.
+
+    The outcome is kept on the request, so the token is decoded once even
+    when both the middleware and DRF ask; an invalid token raises
+    ``InvalidToken`` every time.
+    """
+    if not hasattr(request, '_jwt_token'):
+        token = error = None
+        header = jwt_authentication.get_header(request)
+        raw_token = jwt_authentication.get_raw_token(header) if header is not None else None
+        if raw_token is not None:
+            try:
+                token = jwt_authentication.get_validated_token(raw_token)
+            except InvalidToken as e:
+                error = e
+        request._jwt_token = (token, error)
+
+    token, error = request._jwt_token
+    if error is not None:
+        raise error
+    return token
+
+
+def get_token_user(request):
+    """
+    Get the user of a request's bearer token, loading it once per request.
+
+    Raises ``InvalidToken`` or ``AuthenticationFailed`` like ``JWTAuthentication``.
+    """
+    if not hasattr(request, '_jwt_user'):
+        token = get_validated_token(request)
+        request._jwt_user = jwt_authentication.get_user(token) if token is not None else None
+    return request._jwt_user
+
+
+def get_request_user(request):
+    """
+    Get the user of a stateless request, anonymous when the token is missing or invalid.
+    """
+    try:
+        user = get_token_user(request)
+    except (InvalidToken, AuthenticationFailed):
+        return AnonymousUser()
+    return user if user is not None else AnonymousUser()
+
+
+class StatelessJWTAuthentication(CachedJWTAuthentication):
+    """
+    JWT authentication that reuses the token and user resolved for the request.
+    """
+
+    def authenticate(self, request):
+        """
+        Authenticate a DRF request from its bearer token.
+        """
+        token = get_validated_token(request._request)
+        if token is None:
+            return None
+        return get_token_user(request._request), token
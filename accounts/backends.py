@@ -1,36 +1,81 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
 from django.db.models import Q
 
+from . import hashing
+from .models import normalize_identifier
+
 User = get_user_model()
 
+
+def get_user_by_identifier(identifier):
+    """
+    Find the user a login identifier (username or email, any case) refers to.
+
+    Both normalized columns are indexed, so this is a single query. An exact
+    username wins over an email match, which wins over a username that only
+    matches case-insensitively; ambiguous case-insensitive matches find no one.
+    """
+    normalized = normalize_identifier(identifier)
+    if not normalized:
+        return None
+
+    candidates = list(User.objects.filter(
+        Q(username_normalized=normalized) | Q(email_normalized=normalized)
+    )[:3])
+    for matches in (
+        lambda user: user.username == identifier,
+        lambda user: user.email_normalized == normalized,
+    ):
+        for user in candidates:
+            if matches(user):
+                return user
+    return candidates[0] if len(candidates) == 1 else None
+
+
 class EmailOrUsernameModelBackend(ModelBackend):
     """
     Authentication backend that allows users to authenticate with either username or email.
     """
+    def _get_identifier(self, username, kwargs):
+        return username if username is not None else kwargs.get('email')
+
     def authenticate(self, request, username=None, password=None, **kwargs):
-        # If username parameter is provided, try to authenticate with either username or email
-        if username is not None:
-            try:
-                # Check if user exists with this username or email
-                user = User.objects.get(
-                    Q(username=username) | Q(email=username)
-                )
-                
-                # Check password
-                if user.check_password(password) and self.user_can_authenticate(user):
-                    return user
-            except User.DoesNotExist:
-                return None
-        
-        # If email parameter is provided (from the custom LoginAPIView)
-        email = kwargs.get('email')
-        if email is not None:
-            try:
-                user = User.objects.get(email=email)
-                if user.check_password(password) and self.user_can_authenticate(user):
-                    return user
-            except User.DoesNotExist:
-                return None
-                
-        return None 
\ No newline at end of file
+        """
+        Authenticate a user, hashing on the shared pool (see ``accounts.hashing``).
+
+        Raises ``HashingBusy`` or ``HashingTimeout`` when the pool cannot take
+        or finish the check in time.
+        """
+        identifier = self._get_identifier(username, kwargs)
+        if identifier is None or password is None:
+            return None
+
+        user = get_user_by_identifier(identifier)
+        if user is None:
+            # Run the password hasher anyway so response times do not reveal
+            # which identifiers exist
+            hashing.hash_password(password)
+            return None
+
+        if hashing.check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        """
+        Authenticate a user without blocking the event loop.
+        """
+        identifier = self._get_identifier(username, kwargs)
+        if identifier is None or password is None:
+            return None
+
+        user = await sync_to_async(get_user_by_identifier)(identifier)
+        if user is None:
+            await hashing.ahash_password(password)
+            return None
+
+        if await hashing.acheck_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
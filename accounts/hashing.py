@@ -0,0 +1,163 @@
+"""
+Password hashing off the request thread.
+
+Verifying or computing a password hash runs PBKDF2 (or the configured
+hasher) for hundreds of milliseconds. Here it runs on a bounded
+per-process thread pool instead: ``hashlib`` releases the GIL while
+hashing, so the pool uses every core, an async view can await the result
+without blocking its event loop, and a sync worker at least stops waiting
+after ``PASSWORD_HASHING_TIMEOUT`` seconds.
+
+At most ``PASSWORD_HASHING_WORKERS`` hashes run at once and
+``PASSWORD_HASHING_QUEUE_SIZE`` more may wait; beyond that ``HashingBusy``
+is raised right away, so a login storm is shed with a 503 instead of
+piling up requests. Correct passwords stored with an outdated hasher or
+work factor are rehashed on the pool and saved.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class HashingBusy(Exception):
+    """
+    Raised when the hashing queue is full.
+    """
+
+
+class HashingTimeout(Exception):
+    """
+    Raised when a hash takes longer than ``PASSWORD_HASHING_TIMEOUT`` to finish.
+    """
+
+
+_executor = None
+_slots = None
+_executor_lock = threading.Lock()
+
+
+def get_workers():
+    return getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 2
+
+
+def get_queue_size():
+    return getattr(settings, 'PASSWORD_HASHING_QUEUE_SIZE', 64)
+
+
+def get_timeout():
+    return getattr(settings, 'PASSWORD_HASHING_TIMEOUT', 10)
+
+
+def get_executor():
+    """
+    Get the process-wide hashing pool and its slot semaphore, starting them on first use.
+    """
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            workers = get_workers()
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+            _slots = threading.BoundedSemaphore(workers + get_queue_size())
+        return _executor, _slots
+
+
+def reset_executor():
+    """
+    Shut the pool down so the next hash starts one from the current settings.
+    """
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor = _slots = None
+
+
+def submit(func, *args):
+    """
+    Run ``func(*args)`` on the pool, raising ``HashingBusy`` when its queue is full.
+    """
+    executor, slots = get_executor()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy
+    try:
+        future = executor.submit(func, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda future: slots.release())
+    return future
+
+
+def _verify(raw_password, encoded):
+    """
+    Check a password against a hash; returns whether it matches and whether the hash is outdated.
+    """
+    outdated = []
+    matches = hashers.check_password(raw_password, encoded, setter=lambda raw_password: outdated.append(True))
+    return matches, bool(outdated)
+
+
+def _result(future):
+    try:
+        return future.result(timeout=get_timeout())
+    except TimeoutError:
+        raise HashingTimeout
+
+
+async def _aresult(future):
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), get_timeout())
+    except asyncio.TimeoutError:
+        raise HashingTimeout
+
+
+def hash_password(raw_password):
+    """
+    Hash a password with the preferred hasher.
+    """
+    return _result(submit(hashers.make_password, raw_password))
+
+
+async def ahash_password(raw_password):
+    """
+    Hash a password with the preferred hasher without blocking the event loop.
+    """
+    return await _aresult(submit(hashers.make_password, raw_password))
+
+
+def set_password_hash(user, encoded, raw_password):
+    """
+    Set a password hashed on the pool, as ``User.set_password()`` would.
+
+    The raw password is kept until the next ``save()`` so that it runs the
+    ``password_changed()`` hooks of the password validators.
+    """
+    user.password = encoded
+    user._password = raw_password
+
+
+def check_password(user, raw_password):
+    """
+    Check a user's password, rehashing and saving it when the stored hash is outdated.
+    """
+    matches, outdated = _result(submit(_verify, raw_password, user.password))
+    if matches and outdated:
+        set_password_hash(user, hash_password(raw_password), raw_password)
+        user.save(update_fields=['password'])
+    return matches
+
+
+async def acheck_password(user, raw_password):
+    """
+    Check a user's password without blocking the event loop, rehashing it when outdated.
+    """
+    matches, outdated = await _aresult(submit(_verify, raw_password, user.password))
+    if matches and outdated:
+        set_password_hash(user, await ahash_password(raw_password), raw_password)
+        await sync_to_async(user.save)(update_fields=['password'])
+    return matches
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils.translation import gettext_lazy as _
+
+from accounts import hashing
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Management command to measure login throughput against the number of hashing threads.
+    """
+    help = _('Measure password checks per second for several hashing pool sizes')
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument(
+            '--workers',
+            default='1,2,4,8',
+            help=_('Comma-separated hashing thread counts to measure (default: 1,2,4,8)')
+        )
+        parser.add_argument(
+            '--logins',
+            type=int,
+            default=200,
+            help=_('Password checks per measurement (default: 200)')
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help=_('Password checks in flight at the same time (default: 32)')
+        )
+
+    def handle(self, *args, **options):
+        """
+        Handle the command.
+        """
+        try:
+            worker_counts = [int(value) for value in options['workers'].split(',')]
+        except ValueError:
+            raise CommandError(_('--workers must be a comma-separated list of integers'))
+
+        # An unsaved user, so the benchmark only measures hashing
+        user = User(username='benchmark')
+        user.set_password('benchmark-password')
+
+        for workers in worker_counts:
+            with override_settings(PASSWORD_HASHING_WORKERS=workers):
+                hashing.reset_executor()
+                try:
+                    elapsed, latencies, rejected = asyncio.run(
+                        self.run_logins(user, options['logins'], options['concurrency'])
+                    )
+                finally:
+                    hashing.reset_executor()
+
+            latencies.sort()
+            self.stdout.write(
+                _('%(workers)d threads: %(rate).1f logins/s, p50 %(p50).0f ms, '
+                  'p95 %(p95).0f ms, %(rejected)d rejected') % {
+                    'workers': workers,
+                    'rate': len(latencies) / elapsed,
+                    'p50': self.percentile(latencies, 50) * 1000,
+                    'p95': self.percentile(latencies, 95) * 1000,
+                    'rejected': rejected,
+                }
+            )
+
+        self.stdout.write(self.style.SUCCESS(_('Benchmarked %(count)d pool sizes') % {'count': len(worker_counts)}))
+
+    async def run_logins(self, user, logins, concurrency):
+        """
+        Run the password checks; returns the elapsed time, the latencies and the rejected count.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        rejected = 0
+
+        async def check():
+            nonlocal rejected
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    await hashing.acheck_password(user, 'benchmark-password')
+                except (hashing.HashingBusy, hashing.HashingTimeout):
+                    rejected += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(check() for i in range(logins)))
+        return time.perf_counter() - started, latencies, rejected
+
+    def percentile(self, values, percent):
+        if not values:
+            return 0
+        return values[min(len(values) - 1, len(values) * percent // 100)]
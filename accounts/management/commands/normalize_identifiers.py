@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Lower, Trim
+from django.utils.translation import gettext_lazy as _
+
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    """
+    Management command to fill the normalized login identifiers of existing users.
+    """
+    help = _('Recompute the normalized username and email columns used for logins')
+
+    def handle(self, *args, **options):
+        """
+        Handle the command.
+        """
+        # Same normalization as normalize_identifier, in a single UPDATE
+        count = User.objects.update(
+            username_normalized=Lower(Trim('username')),
+            email_normalized=Lower(Trim('email')),
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(_('Normalized the login identifiers of %(count)d users') % {'count': count})
+        )
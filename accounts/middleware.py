@@ -1,10 +1,11 @@
 from django.utils.functional import SimpleLazyObject
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.contrib.auth import login
 import logging
 
+from .authentication import get_request_user, is_stateless_path, jwt_authentication
+
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
@@ -13,6 +14,12 @@ class JWTAuthenticationMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
+        # API requests are authenticated from the bearer token alone: no
+        # session lookup, no login() and no session write
+        if is_stateless_path(request.path_info):
+            request.user = SimpleLazyObject(lambda: get_request_user(request))
+            return self.get_response(request)
+
         # If user is already authenticated via session, we don't need to do anything
         if request.user.is_authenticated:
             logger.debug(f"User already authenticated via session: {request.user.username}")
@@ -23,7 +30,7 @@ class JWTAuthenticationMiddleware:
         if auth_header.startswith('Bearer '):
             logger.debug(f"Found Bearer token in Authorization header")
             token = auth_header.split(' ')[1]
-            jwt_auth = JWTAuthentication()
+            jwt_auth = jwt_authentication
             try:
                 validated_token = jwt_auth.get_validated_token(token)
                 user = jwt_auth.get_user(validated_token)
@@ -43,7 +50,7 @@ class JWTAuthenticationMiddleware:
             token = request.COOKIES.get('access_token')
             if token:
                 logger.debug(f"Found token in cookies")
-                jwt_auth = JWTAuthentication()
+                jwt_auth = jwt_authentication
                 try:
                     validated_token = jwt_auth.get_validated_token(token)
                     user = jwt_auth.get_user(validated_token)
@@ -4,6 +4,13 @@ from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
 
+def normalize_identifier(value):
+    """
+    Normalize a username or email address for case-insensitive login lookups.
+    """
+    return (value or '').strip().lower()
+
+
 class User(AbstractUser):
     """
     Custom User model extending Django's AbstractUser.
@@ -16,6 +23,10 @@ class User(AbstractUser):
     website = models.URLField(_('website'), blank=True, null=True)
     is_deleted = models.BooleanField(_('deleted'), default=False)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    # Lowercased copies of username and email, kept in sync by save(), so a
+    # login by either is one indexed equality lookup
+    username_normalized = models.CharField(_('normalized username'), max_length=150, editable=False, default='')
+    email_normalized = models.CharField(_('normalized email address'), max_length=254, editable=False, default='')
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
@@ -26,11 +37,29 @@ class User(AbstractUser):
         indexes = [
             models.Index(fields=['username']),
             models.Index(fields=['email']),
+            models.Index(fields=['username_normalized']),
+            models.Index(fields=['email_normalized']),
         ]
 
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        """
+        Keep the normalized login identifiers in sync with username and email.
+        """
+        self.username_normalized = normalize_identifier(self.username)
+        self.email_normalized = normalize_identifier(self.email)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'username' in update_fields:
+                update_fields.add('username_normalized')
+            if 'email' in update_fields:
+                update_fields.add('email_normalized')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
     def soft_delete(self):
         """
         Soft delete the user (set is_deleted=True).
@@ -0,0 +1,153 @@
+"""
+One-time password storage backends.
+
+``get_backend`` returns the backend named by the ``OTP_BACKEND`` setting:
+
+* ``CacheOTPBackend`` keeps the current code of each email in the cache
+  under a key that expires with the code, so nothing needs to be cleaned up
+  and a verification is one keyed lookup. Each code accepts at most
+  ``OTP_MAX_ATTEMPTS`` verification attempts and is discarded after that;
+  requesting a new code replaces the previous one. The cache must be shared
+  between workers (see ``CACHE_URL``).
+* ``DatabaseOTPBackend`` stores durable ``OTP`` rows as before; expired
+  rows are removed by ``cleanup_otps``.
+
+Without ``OTP_BACKEND``, the cache backend is used only when the default
+cache is shared between processes; with the per-process local memory cache
+a code sent by one worker would be unknown to the others.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+
+from .models import OTP, normalize_identifier
+
+OTP_CACHE_KEY = 'otp:%s'
+ATTEMPTS_CACHE_KEY = 'otp:attempts:%s:%s'
+
+# Cache backends that are not shared between worker processes
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+class BaseOTPBackend:
+    """
+    Interface of an OTP storage backend.
+    """
+
+    def create(self, email, code, expires_at):
+        """
+        Store a code for an email and return it as an ``OTP`` instance.
+        """
+        raise NotImplementedError
+
+    def verify(self, email, code):
+        """
+        Check a code for an email and consume it if it is valid.
+        """
+        raise NotImplementedError
+
+
+class CacheOTPBackend(BaseOTPBackend):
+    """
+    OTP backend keeping the current code of each email in the cache.
+    """
+
+    def get_max_attempts(self):
+        return getattr(settings, 'OTP_MAX_ATTEMPTS', 5)
+
+    def get_email_key(self, email):
+        # Hashed so any email makes a valid memcached key
+        return hashlib.md5(normalize_identifier(email).encode()).hexdigest()
+
+    def create(self, email, code, expires_at):
+        """
+        Store a code for an email, replacing the previous one, and return an unsaved ``OTP``.
+        """
+        now = timezone.now()
+        timeout = max(int((expires_at - now).total_seconds()), 1)
+        cache.set(OTP_CACHE_KEY % self.get_email_key(email), (code, expires_at), timeout)
+        return OTP(email=email, code=code, created_at=now, expires_at=expires_at)
+
+    def verify(self, email, code):
+        """
+        Check a code for an email, counting the attempt against the current code.
+        """
+        email_key = self.get_email_key(email)
+        key = OTP_CACHE_KEY % email_key
+        entry = cache.get(key)
+        if entry is None:
+            return False
+        current_code, expires_at = entry
+        timeout = max(int((expires_at - timezone.now()).total_seconds()), 1)
+
+        # The counter belongs to the current code, so a new code starts at zero
+        attempts_key = ATTEMPTS_CACHE_KEY % (email_key, current_code)
+        cache.add(attempts_key, 0, timeout)
+        try:
+            attempts = cache.incr(attempts_key)
+        except ValueError:
+            # The counter expired in between, and so did the code
+            return False
+        if attempts > self.get_max_attempts():
+            cache.delete(key)
+            return False
+
+        # Only the request that deletes the key may use the code
+        if constant_time_compare(code, current_code) and cache.delete(key):
+            cache.delete(attempts_key)
+            return True
+        return False
+
+
+class DatabaseOTPBackend(BaseOTPBackend):
+    """
+    OTP backend storing durable ``OTP`` rows.
+    """
+
+    def create(self, email, code, expires_at):
+        """
+        Store a code for an email in a new ``OTP`` row.
+        """
+        return OTP.objects.create(email=email, code=code, expires_at=expires_at)
+
+    def verify(self, email, code):
+        """
+        Check a code against the unused, unexpired OTPs of an email and mark it used.
+        """
+        # Marking the OTP used in the same query lets only one request use it
+        otp_id = OTP.objects.filter(
+            email=email,
+            code=code,
+            is_used=False,
+            expires_at__gt=timezone.now()
+        ).order_by('-created_at').values_list('id', flat=True).first()
+        return otp_id is not None and OTP.objects.filter(id=otp_id, is_used=False).update(is_used=True) == 1
+
+
+_backend = None
+
+
+def get_default_backend_path():
+    """
+    Get the OTP backend to use without ``OTP_BACKEND``, depending on whether the cache is shared.
+    """
+    if settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHES:
+        return 'accounts.otp.DatabaseOTPBackend'
+    return 'accounts.otp.CacheOTPBackend'
+
+
+def get_backend():
+    """
+    Get the configured OTP backend (``OTP_BACKEND`` setting, see ``get_default_backend_path``).
+    """
+    global _backend
+    if _backend is None:
+        _backend = import_string(getattr(settings, 'OTP_BACKEND', None) or get_default_backend_path())()
+    return _backend
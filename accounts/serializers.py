@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.utils.translation import gettext_lazy as _
 
+from social_interactions.graph import follow_graph
+
 from .models import OTP
 from .utils import create_otp, send_otp_email, verify_otp
 
@@ -29,13 +31,13 @@ class UserSerializer(serializers.ModelSerializer):
         """
         Get the number of followers for this user.
         """
-        return obj.followers.count()
+        return follow_graph.get_followers_count(obj.id)
     
     def get_following_count(self, obj):
         """
         Get the number of users this user is following.
         """
-        return obj.following.count()
+        return follow_graph.get_following_count(obj.id)
 
 
 class UserProfileUpdateSerializer(serializers.ModelSerializer):
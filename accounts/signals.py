@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Make every worker reload a changed user once the change is committed.
+
+    Covers password changes, deactivation and soft deletes, which are all saves.
+    """
+    transaction.on_commit(lambda: user_cache.invalidate(instance.pk))
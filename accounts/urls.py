@@ -4,7 +4,7 @@ from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     RegisterView, OTPVerificationView, OTPRequestView,
     UserProfileView, UserProfileUpdateView, PasswordChangeView,
-    UserDetailView, UserSearchView, LoginAPIView, ProfileView
+    UserDetailView, UserSearchView, LoginAPIView, AsyncLoginView, ProfileView, AuthCacheStatsView
 )
 
 app_name = 'accounts'
@@ -12,10 +12,12 @@ app_name = 'accounts'
 urlpatterns = [
     # Authentication
     path('login/', LoginAPIView.as_view(), name='login'),
+    path('login/async/', AsyncLoginView.as_view(), name='login-async'),
     path('register/', RegisterView.as_view(), name='register'),
     path('otp/verify/', OTPVerificationView.as_view(), name='otp-verify'),
     path('otp/request/', OTPRequestView.as_view(), name='otp-request'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
+    path('auth-cache/stats/', AuthCacheStatsView.as_view(), name='auth-cache-stats'),
     
     # User profile
     path('profile/', UserProfileView.as_view(), name='profile'),
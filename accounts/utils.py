@@ -3,10 +3,11 @@ import string
 from datetime import timedelta
 
 from django.utils import timezone
-from django.core.mail import send_mail
 from django.conf import settings
 
-from .models import OTP
+from core.mail import enqueue_email
+
+from .otp import get_backend
 
 
 def generate_otp(length=6):
@@ -19,6 +20,8 @@ def generate_otp(length=6):
 def create_otp(email, expiry_minutes=10):
     """
     Create a new OTP for the specified email.
+
+    The ``OTP_BACKEND`` stores it; the cache backend returns an unsaved ``OTP``.
     """
     # Generate a random OTP
     code = generate_otp()
@@ -26,19 +29,15 @@ def create_otp(email, expiry_minutes=10):
     # Calculate the expiry time
     expires_at = timezone.now() + timedelta(minutes=expiry_minutes)
     
-    # Create the OTP object
-    otp = OTP.objects.create(
-        email=email,
-        code=code,
-        expires_at=expires_at
-    )
-    
-    return otp
+    return get_backend().create(email, code, expires_at)
 
 
 def send_otp_email(email, otp_code, is_verification=True):
     """
     Send an OTP email to the specified email address.
+
+    The email is queued for the ``send_queued_mail`` worker, so no mail
+    server is contacted during the request.
     """
     subject = 'Email Verification OTP' if is_verification else 'Login OTP'
     message = f"""
@@ -52,12 +51,11 @@ def send_otp_email(email, otp_code, is_verification=True):
     ESPA Social Network Team
     """
     
-    send_mail(
+    enqueue_email(
         subject=subject,
         message=message,
         from_email=settings.EMAIL_HOST_USER,
         recipient_list=[email],
-        fail_silently=False,
     )
 
 
@@ -68,19 +66,4 @@ def verify_otp(email, code):
     Returns:
         bool: True if the OTP is valid, False otherwise.
     """
-    try:
-        # Get the latest OTP for the email
-        otp = OTP.objects.filter(
-            email=email,
-            code=code,
-            is_used=False,
-            expires_at__gt=timezone.now()
-        ).latest('created_at')
-        
-        # Mark the OTP as used
-        otp.is_used = True
-        otp.save()
-        
-        return True
-    except OTP.DoesNotExist:
-        return False 
\ No newline at end of file
+    return get_backend().verify(email, code)
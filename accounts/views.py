@@ -1,9 +1,16 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import get_user_model, authenticate
+from django.contrib.auth import get_user_model, authenticate, login
 from django.utils.translation import gettext_lazy as _
 from django.db import models
 from rest_framework.parsers import JSONParser, FormParser, MultiPartParser
@@ -11,6 +18,11 @@ from django.views.generic import TemplateView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 
+from social_interactions.graph import follow_graph
+
+from . import hashing
+from .authentication import user_cache
+from .backends import EmailOrUsernameModelBackend
 from .models import OTP
 from .serializers import (
     UserSerializer, UserProfileUpdateSerializer, PasswordChangeSerializer,
@@ -20,6 +32,9 @@ from .utils import create_otp, send_otp_email, verify_otp
 
 User = get_user_model()
 
+# Seconds a client is asked to wait when the hashing pool is saturated
+LOGIN_RETRY_AFTER = 1
+
 
 class RegisterView(generics.CreateAPIView):
     """
@@ -131,14 +146,19 @@ class PasswordChangeView(APIView):
         if serializer.is_valid():
             user = request.user
             
-            # Check old password
-            if not user.check_password(serializer.validated_data.get('old_password')):
-                return Response({
-                    'old_password': [_('Wrong password.')]
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Set new password
-            user.set_password(serializer.validated_data.get('new_password'))
+            # Both hashes run on the hashing pool
+            try:
+                if not hashing.check_password(user, serializer.validated_data.get('old_password')):
+                    return Response({
+                        'old_password': [_('Wrong password.')]
+                    }, status=status.HTTP_400_BAD_REQUEST)
+
+                # Set new password
+                new_password = serializer.validated_data.get('new_password')
+                encoded = hashing.hash_password(new_password)
+            except (hashing.HashingBusy, hashing.HashingTimeout):
+                return hashing_unavailable_response(Response)
+            hashing.set_password_hash(user, encoded, new_password)
             user.save()
             
             return Response({
@@ -174,6 +194,47 @@ class UserSearchView(generics.ListAPIView):
         return User.objects.none()
 
 
+class AuthCacheStatsView(APIView):
+    """
+    API view for the token user cache counters of the worker serving the request.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """
+        Get the hits, misses and size of this process's user cache.
+        """
+        return Response(user_cache.get_stats())
+
+
+def hashing_unavailable_response(response_class):
+    """
+    Build the 503 returned when the password hashing pool is saturated.
+    """
+    response = response_class({
+        'error': _('Too many password checks are being processed. Please try again shortly.')
+    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = str(LOGIN_RETRY_AFTER)
+    return response
+
+
+def get_login_response_data(request, user):
+    """
+    Issue tokens for an authenticated user and open their session.
+    """
+    # Generate tokens
+    refresh = RefreshToken.for_user(user)
+
+    # Create Django session for the template views
+    login(request, user)
+
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+        'user': UserSerializer(user).data
+    }
+
+
 class LoginAPIView(APIView):
     """
     API view for user login.
@@ -185,102 +246,86 @@ class LoginAPIView(APIView):
         """
         Authenticate user and return tokens if valid.
         """
-        import logging
-        import traceback
-        logger = logging.getLogger(__name__)
-        
+        username = request.data.get('username')
+        password = request.data.get('password')
+
+        if not username or not password:
+            return Response({
+                'error': _('Please provide both username/email and password.')
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # The backend looks the user up by normalized username or email in one
+        # query and checks the password on the hashing pool
         try:
-            logger.debug(f"Request Content-Type: {request.content_type}")
-            logger.debug(f"Request body: {request.body}")
-            logger.debug(f"Request data: {request.data}")
-            logger.debug(f"Request POST: {request.POST}")
-            
-            # Try to get credentials from request.data (JSON), or from request.POST (form data)
-            if request.data:
-                username = request.data.get('username')
-                password = request.data.get('password')
-            else:
-                username = request.POST.get('username')
-                password = request.POST.get('password')
-            
-            logger.debug(f"Login attempt for username: {username}")  # Debug
-            
-            if not username or not password:
-                error_msg = 'Please provide both username/email and password.'
-                logger.debug(f"Error: {error_msg}")
-                return Response({
-                    'error': _(error_msg)
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Try to find user by username or email
-            user = None
-            try:
-                # First try exact username match
-                try:
-                    user = User.objects.get(username=username)
-                    logger.debug(f"Found user by username: {user.username}")  # Debug
-                except User.DoesNotExist:
-                    # If not found, try email
-                    try:
-                        user = User.objects.get(email=username)
-                        logger.debug(f"Found user by email: {user.email}")  # Debug
-                    except User.DoesNotExist:
-                        # If still not found, try case-insensitive username match
-                        try:
-                            user = User.objects.get(username__iexact=username)
-                            logger.debug(f"Found user by case-insensitive username: {user.username}")  # Debug
-                        except (User.DoesNotExist, User.MultipleObjectsReturned):
-                            # If still not found or multiple matches, return error
-                            logger.debug(f"No user found for: {username}")  # Debug
-                            return Response({
-                                'error': _('Invalid username/email or password.')
-                            }, status=status.HTTP_401_UNAUTHORIZED)
-                
-                # Check password
-                if user.check_password(password):
-                    if user.is_deleted:
-                        return Response({
-                            'error': _('This account has been deactivated.')
-                        }, status=status.HTTP_401_UNAUTHORIZED)
-                    
-                    # Generate tokens
-                    refresh = RefreshToken.for_user(user)
-                    
-                    # Create Django session for the user
-                    from django.contrib.auth import login
-                    from django.contrib.auth import get_backends
-                    backends = get_backends()
-                    logger.debug(f"Available authentication backends: {[f'{b.__module__}.{b.__class__.__name__}' for b in backends]}")
-                    backend = backends[0]  # Use the first backend
-                    backend_path = f"{backend.__module__}.{backend.__class__.__name__}"
-                    logger.debug(f"Using authentication backend: {backend_path}")
-                    user.backend = backend_path
-                    login(request, user)
-                    
-                    logger.debug(f"Login successful for user: {user.username}")  # Debug
-                    
-                    return Response({
-                        'refresh': str(refresh),
-                        'access': str(refresh.access_token),
-                        'user': UserSerializer(user).data
-                    }, status=status.HTTP_200_OK)
-                else:
-                    logger.debug(f"Invalid password for user: {user.username}")  # Debug
-                    return Response({
-                        'error': _('Invalid username/email or password.')
-                    }, status=status.HTTP_401_UNAUTHORIZED)
-                    
-            except Exception as e:
-                logger.debug(f"Exception in user lookup: {str(e)}")  # Debug
-                return Response({
-                    'error': _('Invalid username/email or password.')
-                }, status=status.HTTP_401_UNAUTHORIZED)
-        except Exception as e:
-            logger.error(f"Exception during login: {str(e)}")
-            logger.error(traceback.format_exc())
+            user = authenticate(request, username=username, password=password)
+        except (hashing.HashingBusy, hashing.HashingTimeout):
+            return hashing_unavailable_response(Response)
+        if user is None:
             return Response({
-                'error': _('Login failed. Please try again later.')
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                'error': _('Invalid username/email or password.')
+            }, status=status.HTTP_401_UNAUTHORIZED)
+
+        if user.is_deleted:
+            return Response({
+                'error': _('This account has been deactivated.')
+            }, status=status.HTTP_401_UNAUTHORIZED)
+
+        return Response(get_login_response_data(request, user), status=status.HTTP_200_OK)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLoginView(View):
+    """
+    Async variant of the login API for ASGI deployments.
+
+    The password check is awaited on the hashing pool, so a worker's event
+    loop keeps serving other requests while hashes run. Takes the same
+    JSON or form body and returns the same payload as ``LoginAPIView``.
+    """
+    backend = EmailOrUsernameModelBackend()
+    backend_path = 'accounts.backends.EmailOrUsernameModelBackend'
+
+    async def post(self, request):
+        """
+        Authenticate user and return tokens if valid.
+        """
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or b'{}')
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                return JsonResponse({
+                    'error': _('Invalid JSON body.')
+                }, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            data = request.POST
+        username = data.get('username')
+        password = data.get('password')
+
+        if not username or not password:
+            return JsonResponse({
+                'error': _('Please provide both username/email and password.')
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            user = await self.backend.aauthenticate(request, username=username, password=password)
+        except (hashing.HashingBusy, hashing.HashingTimeout):
+            return hashing_unavailable_response(JsonResponse)
+        if user is None:
+            return JsonResponse({
+                'error': _('Invalid username/email or password.')
+            }, status=status.HTTP_401_UNAUTHORIZED)
+
+        if user.is_deleted:
+            return JsonResponse({
+                'error': _('This account has been deactivated.')
+            }, status=status.HTTP_401_UNAUTHORIZED)
+
+        # As authenticate() would, so login() records the backend in the session
+        user.backend = self.backend_path
+        data = await sync_to_async(get_login_response_data)(request, user)
+        return JsonResponse(data, status=status.HTTP_200_OK)
 
 
 class ProfileView(LoginRequiredMixin, DetailView):
@@ -311,8 +356,12 @@ class ProfileView(LoginRequiredMixin, DetailView):
         posts_count = user.posts.count()
         
         # Count followers and following
-        followers_count = user.followers.count()
-        following_count = user.following.count()
+        followers_count = follow_graph.get_followers_count(user.id)
+        following_count = follow_graph.get_following_count(user.id)
+        is_following = (
+            self.request.user.id != user.id
+            and follow_graph.is_following(self.request.user.id, user.id)
+        )
         
         # Get user's posts
         posts = user.posts.filter(is_deleted=False).order_by('-created_at')
@@ -322,6 +371,7 @@ class ProfileView(LoginRequiredMixin, DetailView):
             'posts_count': posts_count,
             'followers_count': followers_count,
             'following_count': following_count,
+            'is_following': is_following,
             'posts': posts,
         })
         
@@ -0,0 +1,165 @@
+"""
+Outbound email queue.
+
+Requests call ``enqueue_email``, which only inserts an ``OutboundEmail``
+row; the ``send_queued_mail`` worker sends due messages in batches over one
+connection of ``EMAIL_BACKEND``, so SMTP latency and outages never reach
+the request path. A failed message is retried after
+``EMAIL_QUEUE_RETRY_DELAY`` seconds, doubling on each attempt, and given up
+after ``EMAIL_QUEUE_MAX_ATTEMPTS`` attempts.
+
+A worker claims its batch in a short transaction by moving the rows'
+``next_attempt_at`` forward by ``EMAIL_QUEUE_LEASE`` seconds, then talks to
+the mail server with no transaction open, so enqueuing requests are never
+blocked behind a slow server. Rows of a worker that dies mid-batch become
+due again when the lease runs out.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def get_batch_size():
+    return getattr(settings, 'EMAIL_QUEUE_BATCH_SIZE', 100)
+
+
+def get_max_attempts():
+    return getattr(settings, 'EMAIL_QUEUE_MAX_ATTEMPTS', 5)
+
+
+def get_lease():
+    return timedelta(seconds=getattr(settings, 'EMAIL_QUEUE_LEASE', 300))
+
+
+def get_retry_delay(attempts):
+    """
+    Get the delay before the next attempt of a message that failed ``attempts`` times.
+    """
+    base = getattr(settings, 'EMAIL_QUEUE_RETRY_DELAY', 60)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def _fail(email, error):
+    """
+    Count a failed attempt of an email and schedule its retry, or give it up.
+    """
+    email.attempts += 1
+    email.last_error = error
+    if email.attempts >= get_max_attempts():
+        email.status = OutboundEmail.FAILED
+    else:
+        email.next_attempt_at = timezone.now() + get_retry_delay(email.attempts)
+
+
+def _close(mail_connection):
+    try:
+        mail_connection.close()
+    except Exception:
+        logger.warning("Failed to close the mail connection", exc_info=True)
+
+
+def enqueue_email(subject, message, recipient_list, from_email=None):
+    """
+    Queue an email for the ``send_queued_mail`` worker.
+    """
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+
+
+def claim_batch(batch_size):
+    """
+    Claim up to ``batch_size`` due emails for this worker in one short transaction.
+    """
+    now = timezone.now()
+    lease_until = now + get_lease()
+    with transaction.atomic():
+        due = OutboundEmail.objects.filter(
+            status=OutboundEmail.PENDING, next_attempt_at__lte=now
+        ).order_by('next_attempt_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            # Concurrent workers take different batches
+            due = due.select_for_update(skip_locked=True)
+        email_ids = list(due.values_list('id', flat=True)[:batch_size])
+        if not email_ids:
+            return []
+        # The condition leaves rows another worker claimed meanwhile to it
+        OutboundEmail.objects.filter(id__in=email_ids, next_attempt_at__lte=now).update(
+            next_attempt_at=lease_until
+        )
+    return list(OutboundEmail.objects.filter(id__in=email_ids, next_attempt_at=lease_until).order_by('id'))
+
+
+def send_queued_mail(batch_size=None):
+    """
+    Send one batch of due queued emails over a single connection.
+
+    Returns the numbers of messages sent and failed.
+    """
+    emails = claim_batch(batch_size or get_batch_size())
+    if not emails:
+        return 0, 0
+
+    sent_count = failed_count = 0
+    mail_connection = get_connection(fail_silently=False)
+    processed = []
+    try:
+        mail_connection.open()
+        for email in emails:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email or None,
+                to=email.recipients,
+                connection=mail_connection,
+            )
+            processed.append(email)
+            try:
+                message.send()
+            except Exception as e:
+                logger.warning("Failed to send queued email %s: %s", email.id, e)
+                _fail(email, str(e))
+                failed_count += 1
+                # The server may have dropped the connection
+                _close(mail_connection)
+                mail_connection.open()
+            else:
+                email.attempts += 1
+                email.status = OutboundEmail.SENT
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                sent_count += 1
+    except Exception as e:
+        logger.exception("Could not connect to the mail server")
+        # The rest of the batch backs off like failed messages, so an
+        # unreachable server is not retried on every run
+        for email in emails[len(processed):]:
+            _fail(email, str(e))
+            processed.append(email)
+            failed_count += 1
+    finally:
+        _close(mail_connection)
+
+    OutboundEmail.objects.bulk_update(
+        processed, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+    )
+    return sent_count, failed_count
+
+
+def delete_sent_mail(days):
+    """
+    Delete the emails sent more than ``days`` days ago.
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    return OutboundEmail.objects.filter(status=OutboundEmail.SENT, sent_at__lt=cutoff).delete()[0]
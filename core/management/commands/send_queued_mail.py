@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from core.mail import delete_sent_mail, send_queued_mail
+
+
+class Command(BaseCommand):
+    """
+    Management command to send the emails waiting in the outbox.
+    """
+    help = _('Send queued emails in batches over one mail connection, retrying failures with backoff')
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help=_('Number of emails sent per connection (default: EMAIL_QUEUE_BATCH_SIZE)')
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help=_('Keep running as a worker instead of exiting once the queue is empty')
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help=_('Seconds to sleep when no email is due in loop mode (default: 5)')
+        )
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=7,
+            help=_('Delete sent emails older than this many days (default: 7)')
+        )
+
+    def handle(self, *args, **options):
+        """
+        Handle the command.
+        """
+        deleted_count = delete_sent_mail(options['keep_days'])
+        sent_total = failed_total = 0
+        while True:
+            sent_count, failed_count = send_queued_mail(options['batch_size'])
+            sent_total += sent_count
+            failed_total += failed_count
+            if options['loop'] and (sent_count or failed_count):
+                self.stdout.write(
+                    _('Sent %(sent)d emails (%(failed)d failed)') % {'sent': sent_count, 'failed': failed_count}
+                )
+            if not sent_count and not failed_count:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                _('Sent %(sent)d emails (%(failed)d failed), deleted %(deleted)d old sent emails') % {
+                    'sent': sent_total,
+                    'failed': failed_total,
+                    'deleted': deleted_count,
+                }
+            )
+        )
@@ -0,0 +1,174 @@
+"""
+Media file serving with byte ranges and conditional requests.
+
+``serve_media`` answers ``Range`` requests (so videos can be seeked),
+validates ``If-None-Match``/``If-Modified-Since`` against the file's ETag
+and modification time, and marks content-addressed files as immutable.
+Behind a proxy (``MEDIA_SERVE_ACCEL``) the response only carries headers
+and the proxy streams the file through ``X-Sendfile`` or
+``X-Accel-Redirect``, so application workers never copy file contents.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+from .storage import is_content_name
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Size of the blocks read from disk when streaming a byte range
+STREAM_BLOCK_SIZE = 64 * 1024
+# Content-addressed files never change, so they can be cached for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def get_etag(path, stat_result):
+    """
+    Get the ETag of a file: its digest when content-addressed, else mtime and size.
+    """
+    if is_content_name(path):
+        return quote_etag(os.path.splitext(posixpath.basename(path))[0])
+    return quote_etag(f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}")
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range ``Range`` header into ``(start, end)``, inclusive.
+
+    Returns ``None`` when the header is absent or not a single byte range
+    (the full file is served then) and raises ``ValueError`` when the range
+    cannot be satisfied.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    """
+    Check whether an ``If-Range`` precondition allows a partial response.
+    """
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(last_modified) <= since
+
+
+def iter_range(path, start, length):
+    """
+    Yield ``length`` bytes of a file starting at ``start``.
+    """
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            block = file.read(min(STREAM_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def get_accel_response(path, full_path):
+    """
+    Get a header-only response that lets the proxy send the file, if configured.
+    """
+    accel = getattr(settings, 'MEDIA_SERVE_ACCEL', None)
+    if accel == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = full_path
+    elif accel == 'x-accel-redirect':
+        response = HttpResponse()
+        prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(path)
+    else:
+        return None
+    # Let the proxy set the length and handle Range from the file it serves
+    del response['Content-Type']
+    return response
+
+
+@require_safe
+def serve_media(request, path, document_root=None):
+    """
+    Serve a file from ``MEDIA_ROOT``.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    if posixpath.basename(path).startswith('.'):
+        raise Http404
+    try:
+        full_path = safe_join(document_root or settings.MEDIA_ROOT, path)
+        stat_result = os.stat(full_path)
+    except (OSError, ValueError):
+        raise Http404
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404
+
+    etag = get_etag(path, stat_result)
+    last_modified = stat_result.st_mtime
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+
+    if response is None:
+        response = get_accel_response(path, full_path)
+
+    if response is None:
+        size = stat_result.st_size
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if byte_range is not None and if_range_matches(request, etag, last_modified):
+            start, end = byte_range
+            length = end - start + 1
+            if request.method == 'HEAD':
+                response = HttpResponse(status=206)
+            else:
+                response = StreamingHttpResponse(iter_range(full_path, start, length), status=206)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = length
+        elif request.method == 'HEAD':
+            response = HttpResponse()
+            response['Content-Length'] = size
+        else:
+            response = FileResponse(open(full_path, 'rb'))
+
+        content_type, encoding = mimetypes.guess_type(full_path)
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Accept-Ranges'] = 'bytes'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if is_content_name(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600))
+    return response
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -37,3 +38,89 @@ class SoftDeleteModel(models.Model):
         """
         self.is_deleted = False
         self.save()
+
+
+class CounterCacheModel(models.Model):
+    """
+    An abstract base class model for denormalized counter columns.
+
+    Counters listed in ``counter_fields`` are only changed with atomic
+    ``F()`` updates, so a regular ``save()`` of a loaded instance never
+    writes them back.
+    """
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        """
+        Save the object without overwriting its counter columns.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class StoredBlob(models.Model):
+    """
+    Reference count of a content-addressed file in media storage.
+
+    Identical uploads share one stored file; the file is deleted when the
+    last row that references it goes away. ``reserved_at`` records the last
+    upload that reused the stored file, which tells the deferred delete
+    whether the file may be about to be referenced again.
+    """
+    name = models.CharField(_('name'), max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(_('reference count'), default=0)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    reserved_at = models.DateTimeField(_('reserved at'), blank=True, null=True)
+
+    class Meta:
+        verbose_name = _('stored blob')
+        verbose_name_plural = _('stored blobs')
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+
+class OutboundEmail(models.Model):
+    """
+    Email waiting in the outbox for the ``send_queued_mail`` worker.
+
+    Rows are written in the transaction of the request that queues them, so
+    a message is sent if and only if that transaction commits.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, _('Pending')),
+        (SENT, _('Sent')),
+        (FAILED, _('Failed')),
+    ]
+
+    subject = models.CharField(_('subject'), max_length=255)
+    body = models.TextField(_('body'))
+    from_email = models.CharField(_('from email'), max_length=254, blank=True)
+    recipients = models.JSONField(_('recipients'), default=list)
+    status = models.CharField(_('status'), max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(_('attempts'), default=0)
+    next_attempt_at = models.DateTimeField(_('next attempt at'), default=timezone.now)
+    last_error = models.TextField(_('last error'), blank=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    sent_at = models.DateTimeField(_('sent at'), blank=True, null=True)
+
+    class Meta:
+        verbose_name = _('outbound email')
+        verbose_name_plural = _('outbound emails')
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)} ({self.status})"
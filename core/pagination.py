@@ -0,0 +1,174 @@
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque cursor pagination on ``(ordering_field, id)``, newest first
+    (oldest first when ``descending`` is false).
+
+    Every page is fetched with an indexed range condition instead of an
+    OFFSET, and no total count is computed, so deep pages cost the same as
+    the first one.
+    """
+    ordering_field = 'created_at'
+    descending = True
+    page_size = api_settings.PAGE_SIZE or 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = _('Invalid cursor.')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Return one page of the queryset, positioned by the request's cursor.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        field = self.ordering_field
+
+        reverse = cursor is not None and cursor[2]
+        # Walking back to the previous page scans in the opposite direction
+        scan_descending = self.descending != reverse
+        lookup = 'lt' if scan_descending else 'gt'
+        prefix = '-' if scan_descending else ''
+        if cursor is not None:
+            value, pk = cursor[:2]
+            value = self.clean_cursor_value(queryset.model, value)
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': pk})
+            )
+        queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}id')
+
+        results = list(queryset[:size + 1])
+        has_more = len(results) > size
+        results = results[:size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        """
+        Get the page size from the request, bounded by ``max_page_size``.
+        """
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def clean_cursor_value(self, model, value):
+        """
+        Convert a decoded cursor value to the type of the ordering field.
+
+        Cursors are client input, so a value the field cannot take (a list,
+        an object, a malformed date) is an invalid cursor rather than an error.
+        """
+        try:
+            model_field = model._meta.get_field(self.ordering_field)
+        except FieldDoesNotExist:
+            # Annotated ordering values are compared as decoded
+            return value
+        try:
+            value = model_field.to_python(value)
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value
+
+    def decode_cursor(self, request):
+        """
+        Decode the cursor query parameter into ``(value, id, reverse)``.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padding = '=' * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(encoded + padding).decode('ascii'))
+            value = data['v']
+            if data.get('t') == 'dt':
+                value = parse_datetime(value)
+                if value is None:
+                    raise ValueError(value)
+            return value, int(data['i']), bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse=False):
+        """
+        Encode the position of an object into an opaque cursor URL.
+        """
+        value = getattr(obj, self.ordering_field)
+        data = {'v': value, 'i': obj.pk}
+        if isinstance(value, datetime):
+            data.update({'v': value.isoformat(), 't': 'dt'})
+        if reverse:
+            data['r'] = 1
+
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(data, separators=(',', ':')).encode('ascii')
+        ).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        """
+        Get the URL of the next page.
+        """
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        """
+        Get the URL of the previous page.
+        """
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        """
+        Return the page without a total count.
+        """
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,231 @@
+"""
+Content-addressed media storage.
+
+Files are stored under the SHA-256 digest of their content
+(``<upload_to>/ab/cd/<digest><ext>``), so identical uploads map to one
+stored file. ``StoredBlob`` rows count the references to each stored name;
+``acquire``/``release`` keep them in step with the rows that point at the
+files and delete a file once nothing references it anymore.
+
+A released name keeps its row at zero references until its file is deleted
+after commit. An upload that reuses a stored file first sets the row's
+``reserved_at``, and the delete keeps any file reserved within
+``RESERVE_GRACE`` of its release, since the upload references it right
+after saving; if the delete got there first, the upload finds the file
+gone and writes it again.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import StoredBlob
+
+# Longest expected delay between saving an upload and acquiring its name
+RESERVE_GRACE = timedelta(minutes=5)
+
+CONTENT_NAME_RE = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[^/]*)?$')
+
+
+def reserve(name):
+    """
+    Mark a stored name as reused, so a pending delete of its file backs off.
+
+    Must be called before checking that the file exists.
+    """
+    StoredBlob.objects.filter(name=name).update(reserved_at=timezone.now())
+
+
+def is_content_name(name):
+    """
+    Check whether a stored name is already content-addressed.
+    """
+    return bool(name and CONTENT_NAME_RE.search(name))
+
+
+class ContentAddressedStorageMixin:
+    """
+    Storage mixin that names every saved file after the SHA-256 of its content.
+    """
+
+    def get_content_name(self, name, digest):
+        """
+        Get the stored name of a file with the given digest, keeping the
+        ``upload_to`` directory and the extension of ``name``.
+        """
+        directory = posixpath.dirname(name.replace('\\', '/'))
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(directory, digest[:2], digest[2:4], digest + extension)
+
+    def get_available_name(self, name, max_length=None):
+        # A name derived from the content never collides with different bytes
+        return name
+
+    def _save(self, name, content):
+        """
+        Hash the content, then store it unless a file with the same digest exists.
+        """
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+
+        name = self.get_content_name(name, digest.hexdigest())
+        reserve(name)
+        if self.exists(name):
+            return name
+        content.seek(0)
+        return super()._save(name, content)
+
+
+class ContentAddressedFileSystemStorage(ContentAddressedStorageMixin, FileSystemStorage):
+    """
+    Local content-addressed storage that hashes uploads while writing them.
+
+    The content is streamed once into a temporary file next to the media
+    root and then renamed into place, or dropped if the digest is already
+    stored.
+    """
+
+    def _save(self, name, content):
+        os.makedirs(self.location, exist_ok=True)
+        digest = hashlib.sha256()
+        descriptor, temp_path = tempfile.mkstemp(dir=self.location, prefix='.upload-')
+        try:
+            with os.fdopen(descriptor, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            name = self.get_content_name(name, digest.hexdigest())
+            full_path = self.path(name)
+            reserve(name)
+            if os.path.exists(full_path):
+                return name
+
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            # Concurrent uploads of the same bytes replace each other with identical content
+            os.replace(temp_path, full_path)
+            temp_path = None
+            return name
+        finally:
+            if temp_path is not None:
+                os.remove(temp_path)
+
+
+try:
+    from storages.backends.s3boto3 import S3Boto3Storage
+except (ImportError, ImproperlyConfigured):  # boto3 is only installed where USE_CLOUD_STORAGE is enabled
+    S3Boto3Storage = None
+
+if S3Boto3Storage is not None:
+    class ContentAddressedS3Storage(ContentAddressedStorageMixin, S3Boto3Storage):
+        """
+        Content-addressed storage on S3.
+        """
+
+
+def get_media_storage():
+    """
+    Get the storage of uploaded media (``MEDIA_FILE_STORAGE`` setting).
+    """
+    storage_path = getattr(settings, 'MEDIA_FILE_STORAGE', 'core.storage.ContentAddressedFileSystemStorage')
+    return import_string(storage_path)()
+
+
+def acquire(names):
+    """
+    Add a reference to each stored name.
+    """
+    for name in filter(None, names):
+        if StoredBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1):
+            continue
+        blob, created = StoredBlob.objects.get_or_create(name=name, defaults={'ref_count': 1})
+        if not created:
+            StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+
+def release(names, storage):
+    """
+    Drop a reference to each stored name, deleting files that are no longer referenced.
+    """
+    for name in filter(None, names):
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                continue
+            if blob.ref_count > 1:
+                StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                continue
+            released_at = timezone.now()
+            StoredBlob.objects.filter(pk=blob.pk).update(ref_count=0, updated_at=released_at)
+        transaction.on_commit(
+            lambda name=name, released_at=released_at: _delete_released(
+                name, released_at, released_at - RESERVE_GRACE, storage
+            )
+        )
+
+
+def _delete_released(name, released_at, reserved_before, storage):
+    """
+    Delete a file released at ``released_at`` unless it was acquired or
+    released since, or reserved after ``reserved_before``.
+    """
+    with transaction.atomic():
+        # The row is removed first and the file before commit: a concurrent
+        # reserve() either marked the row before (nothing is deleted here) or
+        # waits for this commit and then finds the file gone
+        deleted, _ = StoredBlob.objects.filter(
+            Q(reserved_at__isnull=True) | Q(reserved_at__lt=reserved_before),
+            name=name,
+            ref_count=0,
+            updated_at=released_at,
+        ).delete()
+        if deleted:
+            storage.delete(name)
+        return bool(deleted)
+
+
+def delete_unreferenced(storage, now=None):
+    """
+    Delete the files left unreferenced because an upload reserved them around their release.
+
+    Returns the number of files deleted.
+    """
+    cutoff = (now or timezone.now()) - RESERVE_GRACE
+    released = StoredBlob.objects.filter(ref_count=0, updated_at__lt=cutoff).filter(
+        Q(reserved_at__isnull=True) | Q(reserved_at__lt=cutoff)
+    ).values_list('name', 'updated_at')
+    count = 0
+    for name, released_at in released.iterator():
+        if _delete_released(name, released_at, cutoff, storage):
+            count += 1
+    return count
+
+
+def rebuild_references(names, batch_size=500):
+    """
+    Replace every reference count with the number of occurrences in ``names``.
+    """
+    counts = {}
+    for name in filter(None, names):
+        counts[name] = counts.get(name, 0) + 1
+
+    with transaction.atomic():
+        StoredBlob.objects.all().delete()
+        StoredBlob.objects.bulk_create(
+            [StoredBlob(name=name, ref_count=count) for name, count in counts.items()],
+            batch_size=batch_size,
+        )
+    return len(counts)
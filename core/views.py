@@ -4,7 +4,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.contrib.auth import logout
 
-from posts.models import Post
+from posts.timeline import get_timeline_queryset
 
 
 class HomeView(LoginRequiredMixin, TemplateView):
@@ -20,19 +20,8 @@ class HomeView(LoginRequiredMixin, TemplateView):
         """
         context = super().get_context_data(**kwargs)
         
-        # Get the current user
-        user = self.request.user
-        
-        # Get the IDs of users the current user follows
-        following_users = user.following.values_list('following_id', flat=True)
-        
-        # Get posts from followed users
-        posts = Post.objects.filter(
-            user_id__in=following_users, 
-            is_deleted=False
-        ).select_related('user').prefetch_related('media', 'hashtags')
-        
-        context['posts'] = posts
+        # Read the precomputed timeline of the current user
+        context['posts'] = get_timeline_queryset(self.request.user)
         return context
 
 
@@ -9,11 +9,11 @@ class PostAdmin(admin.ModelAdmin):
     """
     Admin for the Post model.
     """
-    list_display = ('id', 'user', 'description_preview', 'location', 'created_at', 'is_deleted')
+    list_display = ('id', 'user', 'description_preview', 'location', 'likes_count', 'comments_count', 'created_at', 'is_deleted')
     list_filter = ('is_deleted', 'created_at')
     search_fields = ('description', 'location', 'user__username', 'user__email')
     ordering = ('-created_at',)
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'likes_count', 'dislikes_count', 'comments_count')
     
     def description_preview(self, obj):
         """
@@ -48,11 +48,13 @@ class MediaAdmin(admin.ModelAdmin):
     """
     Admin for the Media model.
     """
-    list_display = ('id', 'post', 'file_type', 'caption_preview', 'created_at')
-    list_filter = ('file_type', 'created_at')
+    list_display = ('id', 'post', 'file_type', 'caption_preview', 'processing_status', 'created_at')
+    list_filter = ('file_type', 'processing_status', 'created_at')
     search_fields = ('caption', 'post__description')
     ordering = ('-created_at',)
-    readonly_fields = ('created_at',)
+    readonly_fields = (
+        'thumbnail', 'feed_rendition', 'width', 'height', 'size', 'processing_status', 'created_at'
+    )
     
     def caption_preview(self, obj):
         """
@@ -8,22 +8,32 @@ from .views import (
     CommentRetrieveUpdateDestroyAPIView,
     MediaCreateAPIView,
     MediaRetrieveUpdateDestroyAPIView,
+    UploadSessionCreateAPIView,
+    UploadSessionAPIView,
+    UploadFinalizeAPIView,
     HashtagListAPIView,
     HashtagPostsAPIView,
     ExploreAPIView,
-    SearchAPIView
+    SearchAPIView,
+    FeedView,
+    UserPostsView
 )
 
 app_name = 'posts_api'
 
 urlpatterns = [
     path('', PostListCreateAPIView.as_view(), name='post-list-create'),
+    path('feed/', FeedView.as_view(), name='feed'),
+    path('users/<int:user_id>/', UserPostsView.as_view(), name='user-posts'),
     path('<int:pk>/', PostRetrieveUpdateDestroyAPIView.as_view(), name='post-detail-api'),
     path('<int:pk>/like/', PostLikeAPIView.as_view(), name='post-like'),
     path('<int:post_id>/comments/', CommentListCreateAPIView.as_view(), name='comment-list-create'),
     path('comments/<int:pk>/', CommentRetrieveUpdateDestroyAPIView.as_view(), name='comment-detail'),
     path('media/', MediaCreateAPIView.as_view(), name='media-create'),
     path('media/<int:pk>/', MediaRetrieveUpdateDestroyAPIView.as_view(), name='media-detail'),
+    path('uploads/', UploadSessionCreateAPIView.as_view(), name='upload-create'),
+    path('uploads/<uuid:pk>/', UploadSessionAPIView.as_view(), name='upload-detail'),
+    path('uploads/<uuid:pk>/finalize/', UploadFinalizeAPIView.as_view(), name='upload-finalize'),
     path('hashtags/', HashtagListAPIView.as_view(), name='hashtag-list'),
     path('hashtags/<str:title>/', HashtagPostsAPIView.as_view(), name='hashtag-posts-api'),
     path('explore/', ExploreAPIView.as_view(), name='explore-api'),
@@ -0,0 +1,86 @@
+"""
+Shared hashtag ingestion for post create and update paths.
+"""
+import re
+
+from django.db import router
+from django.db.models.signals import m2m_changed
+
+from .models import Hashtag
+from .signals import hashtags_created
+
+HASHTAG_SEPARATORS = re.compile(r'[\s,]+')
+MAX_TITLE_LENGTH = Hashtag._meta.get_field('title').max_length
+
+
+def get_hashtag_values(data, key='hashtags'):
+    """
+    Get the raw hashtag values of request data (QueryDict or parsed JSON).
+    """
+    if hasattr(data, 'getlist'):
+        return data.getlist(key, [])
+    value = data.get(key) or []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def normalize_hashtags(values):
+    """
+    Normalize raw hashtag values into distinct titles, in order.
+
+    Values may hold several tags separated by commas or whitespace; the ``#``
+    sign is dropped, titles are lowercased and overlong titles are skipped.
+    """
+    titles = []
+    for value in values:
+        for title in HASHTAG_SEPARATORS.split(str(value)):
+            title = title.lstrip('#').lower()
+            if title and len(title) <= MAX_TITLE_LENGTH and title not in titles:
+                titles.append(title)
+    return titles
+
+
+def get_or_create_hashtags(titles):
+    """
+    Get the hashtags with the given titles, creating the missing ones in bulk.
+    """
+    hashtags = {hashtag.title: hashtag for hashtag in Hashtag.objects.filter(title__in=titles)}
+    missing = [title for title in titles if title not in hashtags]
+    if missing:
+        Hashtag.objects.bulk_create([Hashtag(title=title) for title in missing], ignore_conflicts=True)
+        created = list(Hashtag.objects.filter(title__in=missing))
+        hashtags.update({hashtag.title: hashtag for hashtag in created})
+        hashtags_created.send(sender=Hashtag, hashtags=created)
+    return [hashtags[title] for title in titles if title in hashtags]
+
+
+def set_post_hashtags(post, values, replace=False):
+    """
+    Link a post to the hashtags in ``values`` with bulk writes.
+
+    With ``replace`` the post's current hashtags are diffed against the new
+    ones and only the difference is written. ``m2m_changed`` is sent like the
+    related manager would, so its receivers keep working.
+    """
+    Through = Hashtag.posts.through
+    hashtag_ids = {hashtag.id for hashtag in get_or_create_hashtags(normalize_hashtags(values))}
+    current_ids = set(Through.objects.filter(post_id=post.id).values_list('hashtag_id', flat=True))
+    using = router.db_for_write(Through, instance=post)
+
+    to_remove = current_ids - hashtag_ids if replace else set()
+    if to_remove:
+        signal_kwargs = dict(sender=Through, instance=post, reverse=True, model=Hashtag, pk_set=to_remove, using=using)
+        m2m_changed.send(action='pre_remove', **signal_kwargs)
+        Through.objects.filter(post_id=post.id, hashtag_id__in=to_remove).delete()
+        m2m_changed.send(action='post_remove', **signal_kwargs)
+
+    to_add = hashtag_ids - current_ids
+    if to_add:
+        signal_kwargs = dict(sender=Through, instance=post, reverse=True, model=Hashtag, pk_set=to_add, using=using)
+        m2m_changed.send(action='pre_add', **signal_kwargs)
+        Through.objects.bulk_create(
+            [Through(post_id=post.id, hashtag_id=hashtag_id) for hashtag_id in to_add],
+            ignore_conflicts=True,
+        )
+        m2m_changed.send(action='post_add', **signal_kwargs)
+
+    return hashtag_ids
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from core import storage
+from posts import uploads
+from posts.models import Media
+
+
+class Command(BaseCommand):
+    """
+    Management command to delete expired resumable uploads and unreferenced media files.
+    """
+    help = _('Delete unfinished uploads that expired and their part files, and unreferenced media files')
+
+    def handle(self, *args, **options):
+        """
+        Handle the command.
+        """
+        count = uploads.cleanup_expired_sessions()
+        files_count = storage.delete_unreferenced(Media._meta.get_field('file').storage)
+        self.stdout.write(
+            self.style.SUCCESS(
+                _('Deleted %(count)d expired uploads and %(files)d unreferenced files') % {
+                    'count': count,
+                    'files': files_count,
+                }
+            )
+        )
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from core import storage
+from posts.models import Media
+
+
+class Command(BaseCommand):
+    """
+    Management command to move existing media files to content-addressed names.
+    """
+    help = _('Move media files to content-addressed storage, merge duplicates and rebuild reference counts')
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help=_('Number of media rows updated per query (default: 500)')
+        )
+        parser.add_argument(
+            '--keep-originals',
+            action='store_true',
+            help=_('Keep the files stored under their old names')
+        )
+
+    def handle(self, *args, **options):
+        """
+        Handle the command.
+        """
+        batch_size = options['batch_size']
+        media_storage = Media._meta.get_field('file').storage
+        renamed = {}
+        missing_count = 0
+        batch = []
+
+        for media in Media.objects.only(*Media.file_fields).order_by('id').iterator(chunk_size=batch_size):
+            changed = False
+            for field in Media.file_fields:
+                name = getattr(media, field).name
+                if not name or storage.is_content_name(name):
+                    continue
+                if name not in renamed:
+                    if not media_storage.exists(name):
+                        missing_count += 1
+                        self.stderr.write(_('Missing file: %(name)s') % {'name': name})
+                        continue
+                    with media_storage.open(name, 'rb') as content:
+                        renamed[name] = media_storage.save(name, content)
+                setattr(media, field, renamed[name])
+                changed = True
+
+            if changed:
+                batch.append(media)
+            if len(batch) >= batch_size:
+                Media.objects.bulk_update(batch, Media.file_fields)
+                batch = []
+        if batch:
+            Media.objects.bulk_update(batch, Media.file_fields)
+
+        if not options['keep_originals']:
+            for name in renamed:
+                media_storage.delete(name)
+
+        names = Media.objects.values_list(*Media.file_fields)
+        blobs_count = storage.rebuild_references(
+            (name for row in names.iterator() for name in row),
+            batch_size=batch_size
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                _('Moved %(moved)d files into %(blobs)d stored files (%(missing)d missing)') % {
+                    'moved': len(renamed),
+                    'blobs': blobs_count,
+                    'missing': missing_count,
+                }
+            )
+        )
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from posts import media_pipeline
+from posts.models import Media
+
+
+class Command(BaseCommand):
+    """
+    Management command to generate missing media renditions.
+    """
+    help = _('Generate renditions for media that are pending or failed processing')
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help=_('Reprocess every media, including the ones that are already ready')
+        )
+
+    def handle(self, *args, **options):
+        """
+        Handle the command.
+        """
+        media = Media.objects.order_by('id')
+        if not options['all']:
+            media = media.exclude(processing_status=Media.READY)
+
+        processed_count = 0
+        failed_count = 0
+        for item in media.iterator():
+            try:
+                media_pipeline.process_media(item)
+                processed_count += 1
+            except Exception as e:
+                Media.objects.filter(pk=item.pk).update(processing_status=Media.FAILED)
+                failed_count += 1
+                self.stderr.write(_('Failed to process media %(id)d: %(error)s') % {'id': item.pk, 'error': e})
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                _('Processed %(processed)d media (%(failed)d failed)') % {
+                    'processed': processed_count,
+                    'failed': failed_count,
+                }
+            )
+        )
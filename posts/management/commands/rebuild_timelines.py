@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from posts import timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Management command to rebuild materialized home timelines.
+    """
+    help = _('Rebuild materialized home timelines from the follow graph')
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help=_('Only rebuild the timeline of this user ID (can be repeated)')
+        )
+
+    def handle(self, *args, **options):
+        """
+        Handle the command.
+        """
+        users = User.objects.filter(is_active=True, is_deleted=False)
+        if options['user_ids']:
+            users = users.filter(id__in=options['user_ids'])
+
+        # Recompute the set of accounts that are merged at read time
+        timeline.get_celebrity_ids(refresh=True)
+
+        users_count = 0
+        entries_count = 0
+        for user in users.iterator():
+            entries_count += timeline.rebuild_timeline(user)
+            users_count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                _('Rebuilt %(users)d timelines with %(entries)d entries') % {
+                    'users': users_count,
+                    'entries': entries_count,
+                }
+            )
+        )
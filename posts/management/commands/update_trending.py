@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from posts.trending import update_trending
+
+
+class Command(BaseCommand):
+    """
+    Management command to fold new interactions into the trending scores.
+    """
+    help = _('Update time-decayed trending scores from interactions since the last run')
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help=_('Keep running as a worker instead of exiting after one pass')
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help=_('Seconds to sleep between passes in loop mode (default: 60)')
+        )
+
+    def handle(self, *args, **options):
+        """
+        Handle the command.
+        """
+        while True:
+            count = update_trending()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    _('Updated trending scores of %(count)d posts') % {'count': count}
+                )
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,176 @@
+"""
+Background generation of media renditions.
+
+Creating a ``Media`` row only enqueues its processing once the transaction
+commits. A per-process thread pool then auto-orients the image, rewrites
+the original without its EXIF metadata (GPS position included), writes
+fixed-width thumbnail and feed renditions and records the dimensions and
+byte size of the original. Rows left ``pending`` or
+``failed`` (for example by a restart) are handled by the ``process_media``
+management command.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+
+from core import storage
+
+from .models import Media
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Get the process-wide worker pool, starting it on first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'MEDIA_PIPELINE_WORKERS', 2),
+                thread_name_prefix='media-pipeline',
+            )
+        return _executor
+
+
+def get_rendition_widths():
+    """
+    Get the target width of each rendition field.
+    """
+    return {
+        'thumbnail': getattr(settings, 'MEDIA_THUMBNAIL_WIDTH', 320),
+        'feed_rendition': getattr(settings, 'MEDIA_FEED_WIDTH', 1080),
+    }
+
+
+def encode(image):
+    """
+    Encode an image without metadata, as PNG when it has transparency and JPEG otherwise.
+
+    Returns the encoded bytes and the file extension.
+    """
+    buffer = BytesIO()
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image.convert('RGBA').save(buffer, 'PNG', optimize=True)
+        return buffer.getvalue(), '.png'
+    image.convert('RGB').save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+    return buffer.getvalue(), '.jpg'
+
+
+def render(image, width):
+    """
+    Scale an image down to ``width`` and encode it without metadata.
+
+    Returns the encoded bytes and the file extension.
+    """
+    if image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+    return encode(image)
+
+
+def has_metadata(image):
+    """
+    Check whether an opened image carries EXIF or XMP metadata.
+    """
+    return bool(image.getexif()) or 'exif' in image.info or 'xmp' in image.info
+
+
+def sanitize_original(image, image_format):
+    """
+    Encode an auto-oriented original without metadata, keeping its format where possible.
+
+    Returns the encoded bytes and the file extension.
+    """
+    buffer = BytesIO()
+    if image_format == 'JPEG':
+        image.convert('RGB').save(buffer, 'JPEG', quality=95, optimize=True)
+        return buffer.getvalue(), '.jpg'
+    if image_format in ('PNG', 'WEBP'):
+        # Pillow only writes metadata to these formats when asked to
+        image.save(buffer, image_format, **({'lossless': True} if image_format == 'WEBP' else {}))
+        return buffer.getvalue(), f'.{image_format.lower()}'
+    return encode(image)
+
+
+def process_media(media):
+    """
+    Generate the renditions of a media row and record its metadata.
+    """
+    fields = {'size': media.file.size}
+    replaced_names = []
+    written_names = []
+
+    if media.file_type == Media.IMAGE:
+        with media.file.open('rb') as source:
+            original = Image.open(source)
+            image_format = original.format
+            sanitize = has_metadata(original)
+            image = ImageOps.exif_transpose(original)
+            image.load()
+        fields['width'], fields['height'] = image.size
+
+        base_name = os.path.splitext(os.path.basename(media.file.name))[0]
+        if sanitize:
+            # The original is served too, so it must not keep the EXIF either
+            content, extension = sanitize_original(image, image_format)
+            replaced_names.append(media.file.name)
+            media.file.save(f"{base_name}{extension}", ContentFile(content), save=False)
+            written_names.append(media.file.name)
+            fields['file'] = media.file.name
+            fields['size'] = len(content)
+
+        for field_name, width in get_rendition_widths().items():
+            content, extension = render(image, width)
+            rendition = getattr(media, field_name)
+            replaced_names.append(rendition.name)
+            rendition.save(f"{base_name}_{width}{extension}", ContentFile(content), save=False)
+            written_names.append(rendition.name)
+            fields[field_name] = rendition.name
+
+    fields['processing_status'] = Media.READY
+    # Update only the pipeline columns so concurrent caption edits are kept
+    if Media.objects.filter(pk=media.pk).update(**fields):
+        # Stored files are content-addressed and shared, so they are reference counted
+        storage.acquire(written_names)
+        storage.release(replaced_names, media.file.storage)
+    else:
+        # The media was deleted meanwhile; nothing will reference these files,
+        # which are deleted unless another row shares them
+        storage.acquire(written_names)
+        storage.release(written_names, media.file.storage)
+
+
+def run(media_id):
+    """
+    Process one media row in a worker thread.
+    """
+    try:
+        media = Media.objects.filter(pk=media_id).first()
+        if media is None:
+            return
+        try:
+            process_media(media)
+        except Exception:
+            logger.exception("Failed to process media %s", media_id)
+            Media.objects.filter(pk=media_id).update(processing_status=Media.FAILED)
+    finally:
+        connection.close()
+
+
+def enqueue_media(media_id):
+    """
+    Schedule the processing of a media row after the current transaction commits.
+    """
+    transaction.on_commit(lambda: get_executor().submit(run, media_id))
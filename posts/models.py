@@ -1,10 +1,15 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
+from core.models import CounterCacheModel
+from core.storage import get_media_storage
+
 
-class Post(models.Model):
+class Post(CounterCacheModel):
     """
     Post model for user posts.
     """
@@ -14,6 +19,11 @@ class Post(models.Model):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     is_deleted = models.BooleanField(_('deleted'), default=False)
+    likes_count = models.PositiveIntegerField(_('likes count'), default=0)
+    dislikes_count = models.PositiveIntegerField(_('dislikes count'), default=0)
+    comments_count = models.PositiveIntegerField(_('comments count'), default=0)
+
+    counter_fields = ('likes_count', 'dislikes_count', 'comments_count')
 
     class Meta:
         verbose_name = _('post')
@@ -21,7 +31,8 @@ class Post(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user']),
-            models.Index(fields=['-created_at']),
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['user', '-created_at', '-id']),
         ]
 
     def __str__(self):
@@ -43,24 +54,24 @@ class Post(models.Model):
         """
         Get the number of likes for this post.
         """
-        from social_interactions.models import Like
-        from django.contrib.contenttypes.models import ContentType
-        content_type = ContentType.objects.get_for_model(self)
-        return Like.objects.filter(content_type=content_type, object_id=self.id).count()
+        return self.likes_count
 
     def get_comments_count(self):
         """
         Get the number of comments for this post.
         """
-        return self.comments.count()
+        return self.comments_count
 
 
 class Media(models.Model):
     """
     Media model for post images and videos.
+
+    Files are content-addressed, so rows with identical bytes share one
+    stored file (see ``core.storage``).
     """
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='media')
-    file = models.FileField(_('media file'), upload_to='post_media/')
+    file = models.FileField(_('media file'), upload_to='post_media/', storage=get_media_storage)
     caption = models.CharField(_('caption'), max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     
@@ -77,17 +88,81 @@ class Media(models.Model):
         choices=FILE_TYPE_CHOICES,
         default=IMAGE,
     )
+    
+    # Derivatives produced by the media pipeline (posts.media_pipeline)
+    thumbnail = models.ImageField(
+        _('thumbnail'), upload_to='post_media/renditions/', storage=get_media_storage, blank=True, null=True
+    )
+    feed_rendition = models.ImageField(
+        _('feed rendition'), upload_to='post_media/renditions/', storage=get_media_storage, blank=True, null=True
+    )
+    width = models.PositiveIntegerField(_('width'), blank=True, null=True)
+    height = models.PositiveIntegerField(_('height'), blank=True, null=True)
+    size = models.PositiveBigIntegerField(_('size in bytes'), blank=True, null=True)
+    
+    # Processing status choices
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+    PROCESSING_STATUS_CHOICES = [
+        (PENDING, _('Pending')),
+        (READY, _('Ready')),
+        (FAILED, _('Failed')),
+    ]
+    processing_status = models.CharField(
+        _('processing status'),
+        max_length=10,
+        choices=PROCESSING_STATUS_CHOICES,
+        default=PENDING,
+    )
 
     class Meta:
         verbose_name = _('media')
         verbose_name_plural = _('media')
         indexes = [
             models.Index(fields=['post']),
+            models.Index(fields=['processing_status']),
         ]
 
+    # File fields whose stored names are reference counted
+    file_fields = ('file', 'thumbnail', 'feed_rendition')
+
     def __str__(self):
         return f"Media for post {self.post.id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the stored file names so references follow file changes.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_file_names = instance.get_file_names()
+        return instance
+
+    def get_file_names(self):
+        """
+        Get the stored name of every loaded file field.
+        """
+        return {
+            field: getattr(self, field).name
+            for field in self.file_fields
+            if field in self.__dict__
+        }
+
+    @property
+    def thumbnail_url(self):
+        """
+        URL of the thumbnail rendition, falling back to the original file.
+        """
+        return (self.thumbnail or self.file).url
+
+    @property
+    def feed_url(self):
+        """
+        URL of the feed-width rendition, falling back to the original file.
+        """
+        return (self.feed_rendition or self.file).url
+
 
 class Hashtag(models.Model):
     """
@@ -112,3 +187,98 @@ class Hashtag(models.Model):
         Get the number of posts using this hashtag.
         """
         return self.posts.count()
+
+
+class TimelineEntry(models.Model):
+    """
+    Materialized home timeline entry (one post in one user's inbox).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    # Copy of the post's created_at so the inbox can be read from the index alone
+    created_at = models.DateTimeField(_('created at'))
+
+    class Meta:
+        verbose_name = _('timeline entry')
+        verbose_name_plural = _('timeline entries')
+        ordering = ['-created_at']
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in timeline of user {self.user_id}"
+
+
+class TrendingPost(models.Model):
+    """
+    Time-decayed trending score of a post, maintained by ``update_trending``.
+
+    Scores use forward decay: every interaction adds its weight scaled by
+    ``2 ** ((interaction_time - epoch) / half_life)``, so older scores never
+    have to be rewritten and the stored order matches the decayed order.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    score = models.FloatField(_('score'), default=0)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('trending post')
+        verbose_name_plural = _('trending posts')
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['-score']),
+        ]
+
+    def __str__(self):
+        return f"Trending score {self.score:.3f} for post {self.post_id}"
+
+
+class TrendingState(models.Model):
+    """
+    Single-row bookkeeping of the trending engine (decay epoch and watermark).
+    """
+    epoch = models.DateTimeField(_('epoch'))
+    watermark = models.DateTimeField(_('watermark'), blank=True, null=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('trending state')
+        verbose_name_plural = _('trending state')
+
+    def __str__(self):
+        return f"Trending state at {self.watermark}"
+
+
+class UploadSession(models.Model):
+    """
+    Resumable chunked upload of a media file into a post.
+
+    Chunks are appended to a part file in ``MEDIA_UPLOAD_TEMP_DIR`` and
+    ``offset`` records how many bytes have been received so far.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='upload_sessions')
+    file_name = models.CharField(_('file name'), max_length=255)
+    file_type = models.CharField(_('file type'), max_length=10, choices=Media.FILE_TYPE_CHOICES, default=Media.IMAGE)
+    caption = models.TextField(_('caption'), blank=True, null=True)
+    size = models.PositiveBigIntegerField(_('size in bytes'))
+    offset = models.PositiveBigIntegerField(_('received bytes'), default=0)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('upload session')
+        verbose_name_plural = _('upload sessions')
+        indexes = [
+            models.Index(fields=['user', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"Upload {self.id} of {self.file_name} ({self.offset}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.offset == self.size
@@ -1,10 +1,14 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
-from .models import Post, Media, Hashtag
-from social_interactions.models import Like, Comment
+from . import uploads
+from .hashtags import set_post_hashtags
+from .models import Post, Media, Hashtag, UploadSession
+from core.pagination import KeysetPagination
+from social_interactions.models import Comment, PostLike
 
 User = get_user_model()
 
@@ -31,10 +35,64 @@ class MediaSerializer(serializers.ModelSerializer):
     """
     Serializer for the Media model.
     """
+    thumbnail = serializers.FileField(read_only=True)
+    feed_rendition = serializers.FileField(read_only=True)
+
     class Meta:
         model = Media
-        fields = ['id', 'file', 'caption', 'file_type', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = [
+            'id', 'file', 'thumbnail', 'feed_rendition', 'caption', 'file_type',
+            'width', 'height', 'size', 'processing_status', 'created_at'
+        ]
+        read_only_fields = ['id', 'width', 'height', 'size', 'processing_status', 'created_at']
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for opening and inspecting a resumable upload.
+    """
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'post', 'file_name', 'file_type', 'caption', 'size', 'offset',
+            'chunk_size', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'offset', 'created_at', 'updated_at']
+
+    def get_chunk_size(self, obj):
+        """
+        Get the largest chunk the server accepts per request.
+        """
+        return uploads.get_chunk_size()
+
+    def validate_post(self, value):
+        """
+        Validate that the media is attached to a post of the uploader.
+        """
+        if value.user_id != self.context['request'].user.id or value.is_deleted:
+            raise serializers.ValidationError(_("You can only upload media to your own posts."))
+        return value
+
+    def validate_size(self, value):
+        """
+        Validate that the announced file size is within the upload limit.
+        """
+        if value <= 0:
+            raise serializers.ValidationError(_("The file must not be empty."))
+        if value > uploads.get_max_size():
+            raise serializers.ValidationError(_("The file is too large."))
+        return value
+
+    def validate(self, attrs):
+        """
+        Validate that the user has not reached the number of concurrent uploads.
+        """
+        active_count = uploads.get_active_sessions(self.context['request'].user).count()
+        if active_count >= uploads.get_max_active_sessions():
+            raise serializers.ValidationError(_("Too many uploads in progress. Finish or cancel one first."))
+        return attrs
 
 
 class PostCreateSerializer(serializers.ModelSerializer):
@@ -106,12 +164,7 @@ class PostCreateSerializer(serializers.ModelSerializer):
             )
         
         # Create or get hashtags and associate them with the post
-        for title in hashtag_titles:
-            # Remove # if present
-            title = title.strip().lstrip('#')
-            if title:
-                hashtag, _ = Hashtag.objects.get_or_create(title=title.lower())
-                post.hashtags.add(hashtag)
+        set_post_hashtags(post, hashtag_titles)
         
         return post
 
@@ -123,15 +176,13 @@ class PostListSerializer(serializers.ModelSerializer):
     user = serializers.SerializerMethodField()
     media = MediaSerializer(many=True, read_only=True)
     hashtags = HashtagSerializer(many=True, read_only=True)
-    likes_count = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
         fields = [
             'id', 'user', 'description', 'location', 'created_at',
-            'media', 'hashtags', 'likes_count', 'comments_count', 'is_liked'
+            'media', 'hashtags', 'likes_count', 'dislikes_count', 'comments_count', 'is_liked'
         ]
         read_only_fields = fields
     
@@ -145,30 +196,21 @@ class PostListSerializer(serializers.ModelSerializer):
             'profile_picture': obj.user.profile_picture.url if obj.user.profile_picture else None
         }
     
-    def get_likes_count(self, obj):
-        """
-        Get the number of likes for this post.
-        """
-        return obj.get_likes_count()
-    
-    def get_comments_count(self, obj):
-        """
-        Get the number of comments for this post.
-        """
-        return obj.get_comments_count()
-    
     def get_is_liked(self, obj):
         """
         Check if the current user has liked this post.
         """
+        # List views resolve the likes of a whole page at once
+        liked_post_ids = self.context.get('liked_post_ids')
+        if liked_post_ids is not None:
+            return obj.id in liked_post_ids
+        
         user = self.context.get('request').user
         if user.is_authenticated:
-            content_type = ContentType.objects.get_for_model(Post)
-            return Like.objects.filter(
+            return PostLike.objects.filter(
                 user=user,
-                content_type=content_type,
-                object_id=obj.id,
-                like_type=Like.LIKE
+                post_id=obj.id,
+                like_type=PostLike.LIKE
             ).exists()
         return False
 
@@ -178,17 +220,51 @@ class PostDetailSerializer(PostListSerializer):
     Serializer for detailed Post view.
     """
     comments = serializers.SerializerMethodField()
+    comments_next = serializers.SerializerMethodField()
     
     class Meta(PostListSerializer.Meta):
-        fields = PostListSerializer.Meta.fields + ['comments']
+        fields = PostListSerializer.Meta.fields + ['comments', 'comments_next']
+    
+    def get_comment_page(self, obj):
+        """
+        Get the newest top-level comments of the post and whether there are more.
+        """
+        if not hasattr(self, '_comment_pages'):
+            self._comment_pages = {}
+        if obj.pk not in self._comment_pages:
+            limit = getattr(settings, 'POST_DETAIL_COMMENTS', 20)
+            comments = list(
+                obj.comments.filter(parent_comment=None).select_related('user').order_by('-created_at', '-id')[:limit + 1]
+            )
+            self._comment_pages[obj.pk] = (comments[:limit], len(comments) > limit)
+        return self._comment_pages[obj.pk]
     
     def get_comments(self, obj):
         """
-        Get the top-level comments for this post.
+        Get the newest top-level comments for this post with their first replies.
         """
         from social_interactions.serializers import CommentSerializer
+        from social_interactions.threads import get_thread_comment_ids, load_threads
+        from social_interactions.utils import get_liked_object_ids
+        
+        comments = load_threads(self.get_comment_page(obj)[0])
+        context = dict(self.context)
+        context['liked_comment_ids'] = get_liked_object_ids(
+            self.context.get('request').user, Comment, get_thread_comment_ids(comments)
+        )
+        serializer = CommentSerializer(comments, many=True, context=context)
+        return serializer.data
+    
+    def get_comments_next(self, obj):
+        """
+        Get the URL of the comments that follow the ones included in ``comments``.
+        """
+        comments, has_more = self.get_comment_page(obj)
+        if not has_more:
+            return None
         
-        # Get top-level comments (not replies)
-        comments = obj.comments.filter(parent_comment=None)
-        serializer = CommentSerializer(comments, many=True, context=self.context)
-        return serializer.data 
\ No newline at end of file
+        pagination = KeysetPagination()
+        url = reverse('social_interactions:comment-list', kwargs={'post_id': obj.pk})
+        request = self.context.get('request')
+        pagination.base_url = request.build_absolute_uri(url) if request is not None else url
+        return pagination.encode_cursor(comments[-1]) 
\ No newline at end of file
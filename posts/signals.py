@@ -0,0 +1,94 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from core import storage
+from social_interactions.models import Follow
+from social_interactions.signals import follows_created, follows_deleted, is_bulk_unfollow
+
+from . import media_pipeline, timeline
+from .models import Media, Post
+
+# Sent with ``hashtags`` after hashtags are created in bulk (no post_save is sent)
+hashtags_created = Signal()
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    """
+    Push a newly created post into the timelines of its author's followers.
+    """
+    if created and not instance.is_deleted:
+        transaction.on_commit(lambda: timeline.fan_out_post(instance))
+
+
+@receiver(post_save, sender=Media)
+def enqueue_media_processing(sender, instance, created, **kwargs):
+    """
+    Generate the renditions of a new upload in the background.
+    """
+    if created:
+        media_pipeline.enqueue_media(instance.pk)
+
+
+@receiver(post_save, sender=Media)
+def track_media_files(sender, instance, created, **kwargs):
+    """
+    Reference the stored files of a media and release the ones it replaced.
+    """
+    names = instance.get_file_names()
+    loaded = {} if created else getattr(instance, '_loaded_file_names', names)
+    changed = [field for field in names if loaded.get(field) != names[field]]
+    storage.acquire(names[field] for field in changed)
+    storage.release(
+        (loaded.get(field) for field in changed),
+        Media._meta.get_field('file').storage
+    )
+    instance._loaded_file_names = names
+
+
+@receiver(post_delete, sender=Media)
+def release_media_files(sender, instance, **kwargs):
+    """
+    Release the stored files of a deleted media.
+    """
+    storage.release(instance.get_file_names().values(), Media._meta.get_field('file').storage)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline_on_follow(sender, instance, created, **kwargs):
+    """
+    Back-fill the follower's timeline with the followed user's recent posts.
+    """
+    if created:
+        transaction.on_commit(
+            lambda: timeline.backfill_follow(instance.follower_id, instance.following_id)
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline_on_unfollow(sender, instance, origin=None, **kwargs):
+    """
+    Remove the unfollowed user's posts from the follower's timeline.
+    """
+    if is_bulk_unfollow(origin):
+        return
+    transaction.on_commit(
+        lambda: timeline.remove_follow(instance.follower_id, instance.following_id)
+    )
+
+
+@receiver(follows_created)
+def backfill_timeline_on_bulk_follow(sender, follower_id, following_ids, **kwargs):
+    """
+    Back-fill the follower's timeline with the recent posts of users followed in bulk.
+    """
+    transaction.on_commit(lambda: timeline.backfill_follows(follower_id, following_ids))
+
+
+@receiver(follows_deleted)
+def prune_timeline_on_bulk_unfollow(sender, follower_id, following_ids, **kwargs):
+    """
+    Remove the posts of users unfollowed in bulk from the follower's timeline.
+    """
+    transaction.on_commit(lambda: timeline.remove_follows(follower_id, following_ids))
@@ -0,0 +1,187 @@
+"""
+Fan-out-on-write home timelines.
+
+Every user has an inbox of ``TimelineEntry`` rows that is filled when someone
+they follow publishes a post, trimmed to ``TIMELINE_MAX_LENGTH`` entries and
+back-filled or pruned when they follow or unfollow someone. Posts by accounts
+with more than ``TIMELINE_FANOUT_FOLLOWER_LIMIT`` followers are not fanned out;
+they are merged into the feed at read time instead.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from social_interactions.graph import follow_graph
+
+from .models import Post, TimelineEntry
+
+CELEBRITY_CACHE_KEY = 'timeline:celebrity_ids'
+CELEBRITY_CACHE_TIMEOUT = 600
+BATCH_SIZE = 500
+
+
+def get_max_length():
+    """
+    Get the maximum number of entries kept in a single inbox.
+    """
+    return getattr(settings, 'TIMELINE_MAX_LENGTH', 800)
+
+
+def get_fanout_follower_limit():
+    """
+    Get the follower count above which posts are merged at read time.
+    """
+    return getattr(settings, 'TIMELINE_FANOUT_FOLLOWER_LIMIT', 10000)
+
+
+def get_celebrity_ids(refresh=False):
+    """
+    Get the IDs of users whose posts are not fanned out.
+    """
+    celebrity_ids = None if refresh else cache.get(CELEBRITY_CACHE_KEY)
+    if celebrity_ids is None:
+        from social_interactions.models import Follow
+
+        celebrity_ids = set(
+            Follow.objects.values('following_id').annotate(
+                count=Count('id')
+            ).filter(count__gt=get_fanout_follower_limit()).values_list('following_id', flat=True)
+        )
+        cache.set(CELEBRITY_CACHE_KEY, celebrity_ids, CELEBRITY_CACHE_TIMEOUT)
+    return celebrity_ids
+
+
+def trim_timelines(user_ids):
+    """
+    Delete the entries that fall beyond the maximum length of each inbox.
+    """
+    user_ids = list(user_ids)
+    max_length = get_max_length()
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        overflow = TimelineEntry.objects.filter(
+            user_id__in=user_ids[start:start + BATCH_SIZE]
+        ).annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=[F('user_id')],
+                order_by=F('created_at').desc(),
+            )
+        ).filter(position__gt=max_length).values_list('id', flat=True)
+        overflow_ids = list(overflow)
+        if overflow_ids:
+            TimelineEntry.objects.filter(id__in=overflow_ids).delete()
+
+
+def fan_out_post(post):
+    """
+    Push a new post into the inbox of every follower of its author.
+
+    Returns the number of inboxes written, or 0 if the author has too many
+    followers and the post is merged at read time instead.
+    """
+    from social_interactions.models import Follow
+
+    limit = get_fanout_follower_limit()
+    follower_ids = list(
+        Follow.objects.filter(following_id=post.user_id).values_list('follower_id', flat=True)[:limit + 1]
+    )
+    if len(follower_ids) > limit:
+        return 0
+
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=follower_id, post_id=post.id, created_at=post.created_at)
+            for follower_id in follower_ids
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim_timelines(follower_ids)
+    return len(follower_ids)
+
+
+def backfill_follow(follower_id, following_id):
+    """
+    Copy the recent posts of a newly followed user into the follower's inbox.
+    """
+    backfill_follows(follower_id, [following_id])
+
+
+def backfill_follows(follower_id, following_ids):
+    """
+    Copy the recent posts of newly followed users into the follower's inbox.
+    """
+    following_ids = set(following_ids) - get_celebrity_ids()
+    if not following_ids:
+        return
+
+    recent_posts = Post.objects.filter(
+        user_id__in=following_ids, is_deleted=False
+    ).order_by('-created_at').values_list('id', 'created_at')[:get_max_length()]
+
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=follower_id, post_id=post_id, created_at=created_at)
+            for post_id, created_at in recent_posts
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim_timelines([follower_id])
+
+
+def remove_follow(follower_id, following_id):
+    """
+    Remove the posts of an unfollowed user from the follower's inbox.
+    """
+    remove_follows(follower_id, [following_id])
+
+
+def remove_follows(follower_id, following_ids):
+    """
+    Remove the posts of unfollowed users from the follower's inbox.
+    """
+    TimelineEntry.objects.filter(user_id=follower_id, post__user_id__in=list(following_ids)).delete()
+
+
+def rebuild_timeline(user):
+    """
+    Rebuild a user's inbox from scratch from the users they follow.
+    """
+    following_ids = set(follow_graph.get_following_ids(user.id)) - get_celebrity_ids()
+
+    TimelineEntry.objects.filter(user=user).delete()
+    recent_posts = Post.objects.filter(
+        user_id__in=following_ids, is_deleted=False
+    ).order_by('-created_at').values_list('id', 'created_at')[:get_max_length()]
+
+    entries = TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user.id, post_id=post_id, created_at=created_at)
+            for post_id, created_at in recent_posts
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return len(entries)
+
+
+def get_timeline_queryset(user):
+    """
+    Get the home feed of a user, newest first.
+
+    The inbox is read as one indexed slice; posts of followed accounts that
+    are too large to fan out are merged into the same query.
+    """
+    inbox = TimelineEntry.objects.filter(user=user).order_by('-created_at').values('post_id')[:get_max_length()]
+    condition = Q(id__in=inbox)
+
+    celebrity_ids = get_celebrity_ids()
+    if celebrity_ids:
+        followed_celebrities = celebrity_ids.intersection(follow_graph.get_following_ids(user.id))
+        if followed_celebrities:
+            condition |= Q(user_id__in=followed_celebrities)
+
+    return Post.objects.filter(condition, is_deleted=False).select_related('user').prefetch_related(
+        'media', 'hashtags'
+    ).order_by('-created_at')
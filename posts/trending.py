@@ -0,0 +1,150 @@
+"""
+Incremental time-decayed trending engine.
+
+``update_trending`` reads only the likes and comments created since the last
+watermark and adds their decayed weights to ``TrendingPost.score``. The
+explore views read the top posts from that table with one indexed query.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Post, TrendingPost, TrendingState
+
+BATCH_SIZE = 500
+
+
+def get_half_life():
+    """
+    Get the time it takes for an interaction's weight to halve.
+    """
+    return timedelta(hours=getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 24))
+
+
+def get_weights():
+    """
+    Get the weight of a like and of a comment.
+    """
+    return (
+        getattr(settings, 'TRENDING_LIKE_WEIGHT', 1.0),
+        getattr(settings, 'TRENDING_COMMENT_WEIGHT', 2.0),
+    )
+
+
+def decay_factor(moment, epoch):
+    """
+    Get the forward-decay multiplier of an interaction made at ``moment``.
+    """
+    return 2 ** ((moment - epoch) / get_half_life())
+
+
+def get_state(now=None):
+    """
+    Get the engine state, creating it on first use.
+    """
+    now = now or timezone.now()
+    state, created = TrendingState.objects.get_or_create(pk=1, defaults={'epoch': now})
+    return state
+
+
+def rebase(state, now):
+    """
+    Move the decay epoch to ``now`` so stored scores stay in float range.
+    """
+    factor = 1 / decay_factor(now, state.epoch)
+    scores = list(TrendingPost.objects.all())
+    for trending in scores:
+        trending.score *= factor
+    TrendingPost.objects.bulk_update(scores, ['score'], batch_size=BATCH_SIZE)
+    state.epoch = now
+
+
+def prune(state, now):
+    """
+    Drop posts whose decayed score has fallen below ``TRENDING_MIN_SCORE``.
+    """
+    min_score = getattr(settings, 'TRENDING_MIN_SCORE', 0.05)
+    deleted, _ = TrendingPost.objects.filter(score__lt=min_score * decay_factor(now, state.epoch)).delete()
+    return deleted
+
+
+def collect_increments(since, until, epoch):
+    """
+    Sum the decayed weights of the interactions made in ``(since, until]`` per post.
+    """
+    from social_interactions.models import Comment, PostLike
+
+    like_weight, comment_weight = get_weights()
+    increments = defaultdict(float)
+
+    likes = PostLike.objects.filter(
+        like_type=PostLike.LIKE,
+        created_at__gt=since,
+        created_at__lte=until
+    ).values_list('post_id', 'created_at')
+    for post_id, created_at in likes.iterator():
+        increments[post_id] += like_weight * decay_factor(created_at, epoch)
+
+    comments = Comment.objects.filter(
+        created_at__gt=since,
+        created_at__lte=until
+    ).values_list('post_id', 'created_at')
+    for post_id, created_at in comments.iterator():
+        increments[post_id] += comment_weight * decay_factor(created_at, epoch)
+
+    return increments
+
+
+def update_trending(now=None):
+    """
+    Fold the interactions made since the last run into the trending scores.
+
+    Returns the number of posts whose score changed.
+    """
+    now = now or timezone.now()
+    # Leave a small lag so rows from transactions still in flight are not skipped
+    until = now - timedelta(seconds=getattr(settings, 'TRENDING_WATERMARK_LAG_SECONDS', 5))
+
+    with transaction.atomic():
+        state = TrendingState.objects.select_for_update().get(pk=get_state(now).pk)
+        since = state.watermark or until - timedelta(days=getattr(settings, 'TRENDING_BACKFILL_DAYS', 7))
+        if until <= since:
+            return 0
+
+        if until - state.epoch > get_half_life() * getattr(settings, 'TRENDING_REBASE_HALF_LIVES', 64):
+            rebase(state, until)
+
+        increments = collect_increments(since, until, state.epoch)
+        existing = TrendingPost.objects.in_bulk(list(increments))
+        valid_ids = set(Post.objects.filter(id__in=list(increments)).values_list('id', flat=True))
+
+        updated = []
+        created = []
+        for post_id, increment in increments.items():
+            if post_id in existing:
+                existing[post_id].score += increment
+                existing[post_id].updated_at = now
+                updated.append(existing[post_id])
+            elif post_id in valid_ids:
+                created.append(TrendingPost(post_id=post_id, score=increment))
+
+        TrendingPost.objects.bulk_update(updated, ['score', 'updated_at'], batch_size=BATCH_SIZE)
+        TrendingPost.objects.bulk_create(created, batch_size=BATCH_SIZE)
+        prune(state, until)
+
+        state.watermark = until
+        state.save()
+
+    return len(updated) + len(created)
+
+
+def get_trending_posts(limit=20):
+    """
+    Get the top trending posts, read from the score index in one query.
+    """
+    return Post.objects.filter(
+        trending__isnull=False, is_deleted=False
+    ).select_related('user').prefetch_related('media', 'hashtags').order_by('-trending__score')[:limit]
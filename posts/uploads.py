@@ -0,0 +1,241 @@
+"""
+Resumable chunked uploads.
+
+A client opens an ``UploadSession`` for a post, sends the file as sequential
+``PUT`` requests with a ``Content-Range`` header and finalizes the session,
+which moves the assembled part file into media storage as a ``Media`` row.
+Chunks are streamed from the request body to disk in small blocks, so no
+request ever holds a whole file in memory, and a dropped connection only
+costs the chunk in flight: ``offset`` tells the client where to resume.
+
+Requests for the same session are serialized with an exclusive lock on
+its part file (``flock``, or ``msvcrt.locking`` on Windows) rather than a
+row lock, so no database transaction stays open while a slow client sends
+its bytes.
+"""
+import os
+import re
+from contextlib import contextmanager
+from datetime import timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Media, UploadSession
+
+# Size of the blocks copied from the request body to the part file
+COPY_BLOCK_SIZE = 64 * 1024
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadError(Exception):
+    """
+    Raised when a chunk cannot be applied to an upload session.
+    """
+
+
+class OffsetMismatch(UploadError):
+    """
+    Raised when a chunk does not start at the current offset of the session.
+    """
+
+
+def get_chunk_size():
+    return getattr(settings, 'MEDIA_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+
+
+def get_max_size():
+    return getattr(settings, 'MEDIA_UPLOAD_MAX_SIZE', 1024 * 1024 * 1024)
+
+
+def get_max_active_sessions():
+    return getattr(settings, 'MEDIA_UPLOAD_MAX_ACTIVE_SESSIONS', 3)
+
+
+def get_expiry_threshold(now=None):
+    """
+    Get the moment before which inactive sessions are considered expired.
+    """
+    hours = getattr(settings, 'MEDIA_UPLOAD_SESSION_TTL_HOURS', 24)
+    return (now or timezone.now()) - timedelta(hours=hours)
+
+
+def get_active_sessions(user):
+    """
+    Get the unexpired upload sessions of a user.
+    """
+    return UploadSession.objects.filter(user=user, updated_at__gte=get_expiry_threshold())
+
+
+def get_part_path(session):
+    """
+    Get the path of the part file that collects the chunks of a session.
+    """
+    return os.path.join(settings.MEDIA_UPLOAD_TEMP_DIR, f"{session.id}.part")
+
+
+def parse_content_range(header, size):
+    """
+    Parse a ``Content-Range: bytes start-end/total`` header into ``(start, length)``.
+    """
+    match = CONTENT_RANGE_RE.match(header or '')
+    if not match:
+        raise UploadError('Content-Range header must be of the form "bytes start-end/total".')
+
+    start, end, total = (int(value) for value in match.groups())
+    if total != size or end < start or end >= size:
+        raise UploadError('Content-Range does not fit the size of the upload.')
+    return start, end - start + 1
+
+
+def lock_part(part):
+    """
+    Wait for an exclusive lock on an open part file.
+    """
+    if fcntl is not None:
+        fcntl.flock(part, fcntl.LOCK_EX)
+        return
+    # Locks the first byte, which may lie past the end of the file
+    part.seek(0)
+    while True:
+        try:
+            msvcrt.locking(part.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK gives up after 10 seconds; keep waiting like flock
+            continue
+
+
+def unlock_part(part):
+    """
+    Release the lock taken by ``lock_part``.
+    """
+    if fcntl is not None:
+        fcntl.flock(part, fcntl.LOCK_UN)
+        return
+    part.flush()
+    part.seek(0)
+    msvcrt.locking(part.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def open_part(session, mode):
+    """
+    Open the part file of a session, locked exclusively while the block runs.
+    """
+    path = get_part_path(session)
+    if 'a' in mode:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, mode) as part:
+        lock_part(part)
+        try:
+            yield part
+        finally:
+            unlock_part(part)
+
+
+def write_chunk(session, stream, start, length):
+    """
+    Append ``length`` bytes read from ``stream`` at ``start`` to a session.
+
+    The part file is locked while the chunk is written, so concurrent
+    requests for the same session are applied one after the other. Returns
+    the new offset.
+    """
+    with open_part(session, 'ab') as part:
+        # Read under the lock, after any chunk that was being written
+        offset = UploadSession.objects.filter(pk=session.pk).values_list('offset', flat=True).first()
+        if offset is None:
+            raise UploadError('The upload session no longer exists.')
+        received = os.fstat(part.fileno()).st_size
+        if received < offset:
+            # The part file lost data (e.g. the temporary directory was cleaned)
+            UploadSession.objects.filter(pk=session.pk, offset=offset).update(
+                offset=received, updated_at=timezone.now()
+            )
+            offset = received
+
+        if start != offset:
+            raise OffsetMismatch(offset)
+
+        # Drop bytes left behind by an interrupted chunk
+        part.truncate(offset)
+
+        remaining = length
+        while remaining:
+            block = stream.read(min(COPY_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            part.write(block)
+            remaining -= len(block)
+        part.flush()
+
+        if remaining:
+            raise UploadError('The request body is shorter than its Content-Range.')
+
+        # Only advances the offset the chunk was written at
+        if not UploadSession.objects.filter(pk=session.pk, offset=start).update(
+            offset=F('offset') + length, updated_at=timezone.now()
+        ):
+            raise UploadError('The upload session changed while the chunk was written.')
+    return start + length
+
+
+def finalize(session):
+    """
+    Move the assembled file of a complete session into a ``Media`` row.
+    """
+    path = get_part_path(session)
+    if not os.path.exists(path):
+        raise UploadError('The upload is not complete.')
+
+    with open_part(session, 'rb') as part:
+        session = UploadSession.objects.filter(pk=session.pk).first()
+        if session is None or not session.is_complete:
+            raise UploadError('The upload is not complete.')
+
+        # The file is copied into storage before any transaction is opened
+        media = Media(
+            post=session.post,
+            caption=session.caption,
+            file_type=session.file_type,
+        )
+        media.file.save(os.path.basename(session.file_name), File(part), save=False)
+        with transaction.atomic():
+            media.save()
+            session.delete()
+
+    os.remove(path)
+    return media
+
+
+def discard(session):
+    """
+    Delete a session and its part file.
+    """
+    path = get_part_path(session)
+    session.delete()
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def cleanup_expired_sessions(now=None):
+    """
+    Delete the sessions that have been inactive for too long. Returns their number.
+    """
+    sessions = UploadSession.objects.filter(updated_at__lt=get_expiry_threshold(now))
+    count = 0
+    for session in sessions.iterator():
+        discard(session)
+        count += 1
+    return count
@@ -15,7 +15,9 @@ from .views import (
     HashtagListAPIView,
     HashtagPostsAPIView,
     ExploreAPIView,
-    SearchAPIView
+    SearchAPIView,
+    FeedView,
+    UserPostsView
 )
 
 app_name = 'posts'
@@ -23,6 +25,8 @@ app_name = 'posts'
 # API Endpoints
 api_urlpatterns = [
     path('', PostListCreateAPIView.as_view(), name='post-list-create'),
+    path('feed/', FeedView.as_view(), name='feed'),
+    path('users/<int:user_id>/', UserPostsView.as_view(), name='user-posts'),
     path('<int:pk>/', PostRetrieveUpdateDestroyAPIView.as_view(), name='post-detail-api'),
     path('<int:pk>/like/', PostLikeAPIView.as_view(), name='post-like'),
     path('<int:post_id>/comments/', CommentListCreateAPIView.as_view(), name='comment-list-create'),
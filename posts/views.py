@@ -4,28 +4,41 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import generics, status, permissions, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.contrib.contenttypes.models import ContentType
-from social_interactions.models import Like, Comment
+from social_interactions.models import Comment, PostLike
 from django.views.generic import TemplateView, DetailView, CreateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.utils import timezone
 from datetime import timedelta
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
 from django.urls import reverse_lazy
 from django.db import models
 
+from . import uploads
 from .models import Post, Media, Hashtag
 from .serializers import (
     PostListSerializer, PostDetailSerializer,
-    MediaSerializer, HashtagSerializer
+    MediaSerializer, HashtagSerializer, UploadSessionSerializer
 )
+from .hashtags import get_hashtag_values, set_post_hashtags
+from .timeline import get_timeline_queryset
+from .trending import get_trending_posts
+from core.pagination import KeysetPagination
+from social_interactions.like_buffer import like_buffer
+from social_interactions.likes import toggle_like
+from social_interactions.mixins import CommentThreadsMixin, LikedPostsMixin
 from social_interactions.serializers import CommentSerializer
+from social_interactions.suggestions import get_suggested_users
 from accounts.models import User
+from search.backends import InvalidCursor
+from search.index import search_objects
 
 
-class PostListCreateAPIView(generics.ListCreateAPIView):
+class PostListCreateAPIView(LikedPostsMixin, generics.ListCreateAPIView):
     queryset = Post.objects.all().order_by('-created_at')
     serializer_class = PostListSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
     
@@ -33,24 +46,8 @@ class PostListCreateAPIView(generics.ListCreateAPIView):
         # Save post with current user
         post = serializer.save(user=self.request.user)
         
-        # Process hashtags
-        hashtags = self.request.data.getlist('hashtags', [])
-        print(f"Hashtags from request: {hashtags}")
-        
-        # If the hashtags parameter is not a list, try to get it as a single value
-        if not hashtags and self.request.data.get('hashtags'):
-            hashtag_value = self.request.data.get('hashtags')
-            if isinstance(hashtag_value, str):
-                # Split by spaces or commas
-                if ',' in hashtag_value:
-                    hashtags = [tag.strip() for tag in hashtag_value.split(',') if tag.strip()]
-                else:
-                    hashtags = [tag.strip() for tag in hashtag_value.split() if tag.strip()]
-                print(f"Processed hashtags from string: {hashtags}")
-        
-        for hashtag_title in hashtags:
-            hashtag, created = Hashtag.objects.get_or_create(title=hashtag_title)
-            post.hashtags.add(hashtag)
+        # Process hashtags (separated by commas or spaces)
+        set_post_hashtags(post, get_hashtag_values(self.request.data))
         
         # Process media files - first try with 'media_files', then with 'media'
         media_files = self.request.FILES.getlist('media_files', [])
@@ -132,13 +129,9 @@ class PostRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
     def perform_update(self, serializer):
         post = serializer.save()
         
-        # Update hashtags if provided
+        # Update hashtags if provided, writing only the difference
         if 'hashtags' in self.request.data:
-            post.hashtags.clear()
-            hashtags = self.request.data.getlist('hashtags', [])
-            for tag_name in hashtags:
-                tag, created = Hashtag.objects.get_or_create(title=tag_name.lower())
-                post.hashtags.add(tag)
+            set_post_hashtags(post, get_hashtag_values(self.request.data), replace=True)
         
         return post
 
@@ -147,40 +140,43 @@ class PostLikeAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request, pk):
-        post = get_object_or_404(Post, pk=pk)
         user = request.user
-        
-        like, created = Like.objects.get_or_create(
-            user=user,
-            content_type=ContentType.objects.get_for_model(Post),
-            object_id=post.id
-        )
-        
-        if not created:
-            # User already liked the post, so unlike it
-            like.delete()
-            liked = False
+        like_type = request.data.get('like_type', PostLike.LIKE)
+        if like_type not in dict(PostLike.LIKE_TYPE_CHOICES):
+            return Response(
+                {'error': _('Invalid like type.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if like_buffer.is_enabled():
+            post = get_object_or_404(Post.objects.only('likes_count', 'dislikes_count'), pk=pk)
+            # The toggle is written by the buffer's next flush; the counts
+            # include the toggles still waiting in this process
+            new_type, (likes_delta, dislikes_delta) = like_buffer.toggle(user.id, PostLike, post.id, like_type)
+            likes_count = max(post.likes_count + likes_delta, 0)
+            dislikes_count = max(post.dislikes_count + dislikes_delta, 0)
         else:
-            liked = True
-        
-        like_count = Like.objects.filter(
-            content_type=ContentType.objects.get_for_model(Post),
-            object_id=post.id
-        ).count()
-        
+            try:
+                new_type, likes_count, dislikes_count = toggle_like(PostLike, user.id, pk, like_type)
+            except Post.DoesNotExist:
+                raise NotFound()
+
         return Response({
-            'liked': liked,
-            'count': like_count
+            'liked': new_type == PostLike.LIKE,
+            'like_type': new_type,
+            'count': likes_count,
+            'dislikes_count': dislikes_count
         })
 
 
-class CommentListCreateAPIView(generics.ListCreateAPIView):
+class CommentListCreateAPIView(CommentThreadsMixin, generics.ListCreateAPIView):
     serializer_class = CommentSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
         post_id = self.kwargs.get('post_id')
-        return Comment.objects.filter(post_id=post_id).order_by('-created_at')
+        return Comment.objects.filter(post_id=post_id).select_related('user').order_by('-created_at')
     
     def perform_create(self, serializer):
         post_id = self.kwargs.get('post_id')
@@ -224,6 +220,101 @@ class MediaRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
         return Media.objects.filter(post__user=self.request.user)
 
 
+class UploadSessionCreateAPIView(generics.CreateAPIView):
+    """
+    API view for opening a resumable upload for a post.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class UploadSessionMixin:
+    """
+    Mixin for views that act on an unexpired upload session of the user.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_session(self, pk):
+        return get_object_or_404(uploads.get_active_sessions(self.request.user), pk=pk)
+
+
+class UploadSessionAPIView(UploadSessionMixin, APIView):
+    """
+    API view for resuming an upload: GET/HEAD report the received offset,
+    PUT appends a chunk described by ``Content-Range`` and DELETE cancels it.
+    """
+
+    def get(self, request, pk):
+        session = self.get_session(pk)
+        response = Response(UploadSessionSerializer(session, context={'request': request}).data)
+        response['Upload-Offset'] = session.offset
+        return response
+
+    def put(self, request, pk):
+        session = self.get_session(pk)
+        try:
+            start, length = uploads.parse_content_range(request.META.get('HTTP_CONTENT_RANGE'), session.size)
+        except uploads.UploadError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if length > uploads.get_chunk_size():
+            return Response(
+                {'detail': _('Chunks must not be larger than %(size)d bytes.') % {'size': uploads.get_chunk_size()}},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        if not request.META.get('CONTENT_LENGTH'):
+            return Response({'detail': _('Content-Length is required.')}, status=status.HTTP_411_LENGTH_REQUIRED)
+        try:
+            content_length = int(request.META['CONTENT_LENGTH'])
+        except ValueError:
+            content_length = None
+        if content_length != length:
+            return Response(
+                {'detail': _('Content-Length does not match Content-Range.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # The body is read straight from the request stream, never through the parsers
+        try:
+            offset = uploads.write_chunk(session, request.stream, start, length)
+        except uploads.OffsetMismatch as e:
+            response = Response(
+                {'detail': _('Chunk does not start at the received offset.'), 'offset': e.args[0]},
+                status=status.HTTP_409_CONFLICT
+            )
+            response['Upload-Offset'] = e.args[0]
+            return response
+        except uploads.UploadError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = Response({'offset': offset, 'complete': offset == session.size})
+        response['Upload-Offset'] = offset
+        return response
+
+    def delete(self, request, pk):
+        uploads.discard(self.get_session(pk))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadFinalizeAPIView(UploadSessionMixin, APIView):
+    """
+    API view for turning a complete upload into a media of its post.
+    """
+
+    def post(self, request, pk):
+        session = self.get_session(pk)
+        try:
+            media = uploads.finalize(session)
+        except uploads.UploadError as e:
+            return Response({'detail': str(e), 'offset': session.offset}, status=status.HTTP_409_CONFLICT)
+
+        serializer = MediaSerializer(media, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
 class HashtagListAPIView(generics.ListAPIView):
     """
     API view for listing hashtags.
@@ -235,11 +326,12 @@ class HashtagListAPIView(generics.ListAPIView):
     search_fields = ['title']
 
 
-class HashtagPostsAPIView(generics.ListAPIView):
+class HashtagPostsAPIView(LikedPostsMixin, generics.ListAPIView):
     """
     API view for listing posts with a specific hashtag.
     """
     serializer_class = PostListSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
@@ -250,7 +342,7 @@ class HashtagPostsAPIView(generics.ListAPIView):
         return Post.objects.filter(hashtags__title=hashtag_title, is_deleted=False).select_related('user').prefetch_related('media', 'hashtags')
 
 
-class ExploreAPIView(generics.ListAPIView):
+class ExploreAPIView(LikedPostsMixin, generics.ListAPIView):
     """
     API view for the explore page.
     """
@@ -273,43 +365,59 @@ class ExploreAPIView(generics.ListAPIView):
             # Get posts with videos
             return Post.objects.filter(is_deleted=False, media__file_type='video').distinct().order_by('-created_at')[:20]
         else:
-            # Get trending posts (most liked and commented)
-            return Post.objects.filter(is_deleted=False).annotate(
-                interaction_count=Count('likes') + Count('comments')
-            ).order_by('-interaction_count', '-created_at')[:20]
+            # Get trending posts from the precomputed trending scores
+            return get_trending_posts(20)
 
 
-class SearchAPIView(generics.ListAPIView):
+class SearchAPIView(LikedPostsMixin, generics.ListAPIView):
     """
     API view for searching posts, users, and hashtags.
     """
     serializer_class = PostListSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    pagination_class = KeysetPagination
+    
     def get_queryset(self):
         """
-        Get the queryset of posts matching the search query.
+        Get the queryset the ranked search results are loaded from.
         """
-        query = self.request.query_params.get('q', '')
-        
-        if query:
-            return Post.objects.filter(
-                Q(description__icontains=query) | 
-                Q(hashtags__title__icontains=query) |
-                Q(user__username__icontains=query) |
-                Q(user__first_name__icontains=query) |
-                Q(user__last_name__icontains=query),
-                is_deleted=False
-            ).distinct().select_related('user').prefetch_related('media', 'hashtags')
-        
-        return Post.objects.none()
+        return Post.objects.filter(is_deleted=False).select_related('user').prefetch_related('media', 'hashtags')
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Return one page of ranked posts matching the search query.
+        """
+        query = request.query_params.get('q', '')
+        paginator = self.paginator
+        try:
+            posts, next_cursor = search_objects(
+                Post, query,
+                limit=paginator.get_page_size(request),
+                cursor=request.query_params.get(paginator.cursor_query_param),
+                queryset=self.get_queryset()
+            )
+        except InvalidCursor:
+            raise NotFound(paginator.invalid_cursor_message)
+        
+        serializer = self.get_serializer(posts, many=True)
+        next_link = None
+        if next_cursor:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), paginator.cursor_query_param, next_cursor
+            )
+        return Response({
+            'next': next_link,
+            'results': serializer.data
+        })
 
 
-class PostListView(generics.ListAPIView):
+class PostListView(LikedPostsMixin, generics.ListAPIView):
     """
     API view for listing posts.
     """
     serializer_class = PostListSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
@@ -345,10 +453,9 @@ class PostDetailView(LoginRequiredMixin, DetailView):
         comments = Comment.objects.filter(post=post).order_by('-created_at')
         
         # Check if the current user has liked this post
-        user_liked = Like.objects.filter(
+        user_liked = PostLike.objects.filter(
             user=self.request.user,
-            content_type=ContentType.objects.get_for_model(Post),
-            object_id=post.id
+            post=post
         ).exists()
         
         context.update({
@@ -396,11 +503,12 @@ class PostDeleteView(generics.DestroyAPIView):
         instance.save()
 
 
-class UserPostsView(generics.ListAPIView):
+class UserPostsView(LikedPostsMixin, generics.ListAPIView):
     """
     API view for listing a user's posts.
     """
     serializer_class = PostListSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
@@ -411,20 +519,19 @@ class UserPostsView(generics.ListAPIView):
         return Post.objects.filter(user_id=user_id, is_deleted=False).select_related('user').prefetch_related('media', 'hashtags')
 
 
-class FeedView(generics.ListAPIView):
+class FeedView(LikedPostsMixin, generics.ListAPIView):
     """
     API view for the user's feed (posts from followed users).
     """
     serializer_class = PostListSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
         """
         Get the queryset of posts from users the current user follows.
         """
-        user = self.request.user
-        following_users = user.following.values_list('following_id', flat=True)
-        return Post.objects.filter(user_id__in=following_users, is_deleted=False).select_related('user').prefetch_related('media', 'hashtags')
+        return get_timeline_queryset(self.request.user)
 
 
 class ExploreView(LoginRequiredMixin, TemplateView):
@@ -437,41 +544,8 @@ class ExploreView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Get trending posts (most liked in the last 7 days)
-        week_ago = timezone.now() - timedelta(days=7)
-        
-        # Using aggregation to count likes
-        post_content_type = ContentType.objects.get_for_model(Post)
-        
-        from django.db.models import Count, Q
-        from social_interactions.models import Like
-        
-        # First, get post IDs that have likes within the last week
-        like_counts = Like.objects.filter(
-            content_type=post_content_type,
-            created_at__gte=week_ago
-        ).values('object_id').annotate(
-            count=Count('id')
-        ).order_by('-count')[:20]
-        
-        # Collect post IDs from the like counts
-        post_ids = [item['object_id'] for item in like_counts]
-        
-        # Then fetch those posts preserving the order
-        from django.db.models import Case, When, IntegerField
-        
-        if post_ids:
-            # Create a Case expression to preserve the ordering
-            preserved_order = Case(
-                *[When(id=pk, then=pos) for pos, pk in enumerate(post_ids)],
-                output_field=IntegerField()
-            )
-            
-            # Get posts ordered by the case expression
-            trending_posts = Post.objects.filter(id__in=post_ids).order_by(preserved_order)
-        else:
-            # Fallback if no liked posts
-            trending_posts = Post.objects.none()
+        # Get trending posts from the precomputed trending scores
+        trending_posts = get_trending_posts(20)
         
         # Get latest posts
         latest_posts = Post.objects.order_by('-created_at')[:20]
@@ -481,10 +555,16 @@ class ExploreView(LoginRequiredMixin, TemplateView):
             post_count=Count('posts')
         ).order_by('-post_count')[:10]
         
+        # Get precomputed follow suggestions
+        suggested_users = [
+            suggestion.suggested for suggestion in get_suggested_users(self.request.user, 5)
+        ]
+        
         context.update({
             'trending_posts': trending_posts,
             'latest_posts': latest_posts,
-            'trending_hashtags': trending_hashtags
+            'trending_hashtags': trending_hashtags,
+            'suggested_users': suggested_users
         })
         
         return context
@@ -528,30 +608,17 @@ class SearchView(LoginRequiredMixin, TemplateView):
         query = self.request.GET.get('q', '')
         
         if query:
-            # Search users
-            users = User.objects.filter(
-                Q(username__icontains=query) | 
-                Q(first_name__icontains=query) | 
-                Q(last_name__icontains=query)
-            )[:10]
-            
-            # Search posts
-            posts = Post.objects.filter(
-                Q(description__icontains=query) |
-                Q(location__icontains=query)
-            )[:20]
-            
-            # Search hashtags
-            hashtags = Hashtag.objects.filter(
-                title__icontains=query
-            )[:10]
+            # Ranked lookups in the search index
+            users, _next = search_objects(User, query, limit=10)
+            posts, _next = search_objects(Post, query, limit=20)
+            hashtags, _next = search_objects(Hashtag, query, limit=10)
             
             context.update({
                 'query': query,
                 'users': users,
                 'posts': posts,
                 'hashtags': hashtags,
-                'has_results': users.exists() or posts.exists() or hashtags.exists()
+                'has_results': bool(users or posts or hashtags)
             })
         
         return context
@@ -0,0 +1,223 @@
+"""
+In-memory prefix index for hashtag and username autocomplete.
+
+Each process keeps a sorted array of lowercase keys per kind, so a prefix
+lookup is two binary searches plus a top-N selection over the matching
+slice. The index is built in a background thread on first use (the database
+answers while it is cold), patched by model signals for writes made in this
+process and rebuilt every ``AUTOCOMPLETE_REBUILD_SECONDS`` to pick up writes
+made by other workers.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+
+from posts.models import Hashtag
+
+User = get_user_model()
+
+HASHTAG = 'hashtag'
+USER = 'user'
+# Prefixes up to this length match many entries, so their results are memoized
+MEMO_PREFIX_LENGTH = 2
+
+
+class PrefixIndex:
+    """
+    Sorted array of ``(key, object_id)`` with a popularity weight per entry.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []
+        self._ids = []
+        self._entries = {}
+        self._memo = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def build(self, entries):
+        """
+        Replace the content of the index with ``(object_id, label, weight)`` entries.
+        """
+        rows = sorted((label.lower(), object_id, label, weight) for object_id, label, weight in entries)
+        with self._lock:
+            self._keys = [row[0] for row in rows]
+            self._ids = [row[1] for row in rows]
+            self._entries = {row[1]: (row[2], row[3]) for row in rows}
+            self._memo = {}
+
+    def upsert(self, object_id, label, weight=None):
+        """
+        Add an entry or replace its label and weight (kept as is when ``None``).
+        """
+        with self._lock:
+            if weight is None:
+                weight = self._entries.get(object_id, (label, 0))[1]
+            self.remove(object_id)
+            key = label.lower()
+            position = bisect_left(self._keys, key)
+            self._keys.insert(position, key)
+            self._ids.insert(position, object_id)
+            self._entries[object_id] = (label, weight)
+            self._memo = {}
+
+    def remove(self, object_id):
+        """
+        Remove an entry if it is present.
+        """
+        with self._lock:
+            entry = self._entries.pop(object_id, None)
+            if entry is None:
+                return
+            key = entry[0].lower()
+            position = bisect_left(self._keys, key)
+            while self._ids[position] != object_id:
+                position += 1
+            del self._keys[position]
+            del self._ids[position]
+            self._memo = {}
+
+    def add_weight(self, object_id, delta):
+        """
+        Change the weight of an entry by ``delta``.
+        """
+        with self._lock:
+            entry = self._entries.get(object_id)
+            if entry is not None:
+                self._entries[object_id] = (entry[0], max(entry[1] + delta, 0))
+                self._memo = {}
+
+    def top(self, prefix, limit=10):
+        """
+        Get the ``limit`` heaviest ``(object_id, label, weight)`` entries starting with ``prefix``.
+        """
+        prefix = prefix.lower()
+        memo_key = (prefix, limit)
+        with self._lock:
+            if memo_key in self._memo:
+                return self._memo[memo_key]
+
+            start = bisect_left(self._keys, prefix)
+            end = bisect_left(self._keys, prefix + '\U0010ffff', start)
+            matches = heapq.nlargest(
+                limit,
+                self._ids[start:end],
+                key=lambda object_id: self._entries[object_id][1],
+            )
+            results = [(object_id,) + self._entries[object_id] for object_id in matches]
+            if len(prefix) <= MEMO_PREFIX_LENGTH:
+                self._memo[memo_key] = results
+            return results
+
+
+def load_hashtag_entries():
+    """
+    Get the autocomplete entries of all hashtags, weighted by post count.
+    """
+    return Hashtag.objects.annotate(weight=Count('posts')).values_list('id', 'title', 'weight')
+
+
+def load_user_entries():
+    """
+    Get the autocomplete entries of all active users, weighted by follower count.
+    """
+    return User.objects.filter(is_active=True, is_deleted=False).annotate(
+        weight=Count('followers')
+    ).values_list('id', 'username', 'weight')
+
+
+class Autocomplete:
+    """
+    Per-process registry of the hashtag and username prefix indexes.
+    """
+    loaders = {
+        HASHTAG: load_hashtag_entries,
+        USER: load_user_entries,
+    }
+
+    def __init__(self):
+        self.indexes = {kind: PrefixIndex() for kind in self.loaders}
+        self.built_at = None
+        self._building = threading.Lock()
+
+    @property
+    def is_warm(self):
+        return self.built_at is not None
+
+    def is_stale(self):
+        """
+        Check whether the indexes are cold or older than the rebuild interval.
+        """
+        max_age = getattr(settings, 'AUTOCOMPLETE_REBUILD_SECONDS', 300)
+        return self.built_at is None or time.monotonic() - self.built_at > max_age
+
+    def rebuild(self):
+        """
+        Reload every index from the database.
+        """
+        if not self._building.acquire(blocking=False):
+            return
+        try:
+            for kind, load_entries in self.loaders.items():
+                self.indexes[kind].build(list(load_entries()))
+            self.built_at = time.monotonic()
+        finally:
+            self._building.release()
+            if threading.current_thread() is not threading.main_thread():
+                connection.close()
+
+    def ensure_fresh(self):
+        """
+        Start a background rebuild when the indexes are cold or stale.
+        """
+        if self.is_stale() and not self._building.locked():
+            threading.Thread(target=self.rebuild, daemon=True).start()
+
+    def complete(self, kind, prefix, limit=10):
+        """
+        Get the top ``(object_id, label, weight)`` entries of a kind for a prefix.
+        """
+        self.ensure_fresh()
+        if self.is_warm:
+            return self.indexes[kind].top(prefix, limit)
+        return self.complete_from_database(kind, prefix, limit)
+
+    def complete_from_database(self, kind, prefix, limit=10):
+        """
+        Answer a prefix query from the database while the index is cold.
+        """
+        field = 'title' if kind == HASHTAG else 'username'
+        entries = self.loaders[kind]().filter(**{f'{field}__istartswith': prefix}).order_by('-weight')
+        return list(entries[:limit])
+
+    def upsert(self, kind, object_id, label, weight=None):
+        """
+        Patch an entry into a warm index.
+        """
+        if self.is_warm:
+            self.indexes[kind].upsert(object_id, label, weight)
+
+    def remove(self, kind, object_id):
+        """
+        Patch an entry out of a warm index.
+        """
+        if self.is_warm:
+            self.indexes[kind].remove(object_id)
+
+    def add_weight(self, kind, object_id, delta):
+        """
+        Patch the weight of an entry of a warm index.
+        """
+        if self.is_warm:
+            self.indexes[kind].add_weight(object_id, delta)
+
+
+autocomplete = Autocomplete()
@@ -0,0 +1,291 @@
+"""
+Search index backends.
+
+Every backend stores ``SearchDocument``-shaped records (kind, object ID,
+title and body) and answers ranked queries with keyset cursors over
+``(score, object_id)``. ``get_backend`` picks native full-text search when
+the database has it (PostgreSQL tsvector, SQLite FTS5) and falls back to
+the portable ``SearchTerm`` inverted index otherwise.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.utils.module_loading import import_string
+
+from .models import SearchDocument, SearchTerm
+from .text import tokenize_query, weigh_terms
+
+BATCH_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a search cursor cannot be decoded.
+    """
+
+
+def encode_cursor(score, object_id):
+    """
+    Encode the position of the last result of a page into an opaque cursor.
+    """
+    data = json.dumps([score, object_id], separators=(',', ':')).encode('ascii')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor into ``(score, object_id)``.
+    """
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        score, object_id = json.loads(base64.urlsafe_b64decode(cursor + padding).decode('ascii'))
+        return float(score), int(object_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+
+
+class BaseSearchBackend:
+    """
+    Interface of a search index backend.
+    """
+
+    def setup(self):
+        """
+        Create any database structures the backend needs.
+        """
+
+    def index(self, documents):
+        """
+        Add or replace the given unsaved ``SearchDocument`` instances.
+        """
+        raise NotImplementedError
+
+    def remove(self, kind, object_ids):
+        """
+        Remove the documents of the given kind and object IDs.
+        """
+        raise NotImplementedError
+
+    def clear(self, kind):
+        """
+        Remove every document of a kind.
+        """
+        raise NotImplementedError
+
+    def rank(self, kind, terms, limit, after):
+        """
+        Get up to ``limit`` ``(object_id, score)`` pairs matching all terms,
+        best first, positioned after the ``(score, object_id)`` pair ``after``.
+        """
+        raise NotImplementedError
+
+    def search(self, kind, query, limit=20, cursor=None):
+        """
+        Get the ranked object IDs matching a query and the cursor of the next page.
+        """
+        terms = tokenize_query(query)
+        if not terms:
+            return [], None
+
+        after = decode_cursor(cursor) if cursor else None
+        hits = self.rank(kind, terms, limit + 1, after)
+        next_cursor = encode_cursor(hits[limit - 1][1], hits[limit - 1][0]) if len(hits) > limit else None
+        return [object_id for object_id, score in hits[:limit]], next_cursor
+
+
+class InvertedIndexBackend(BaseSearchBackend):
+    """
+    Portable inverted index stored in the ``SearchTerm`` table.
+    """
+
+    def index(self, documents):
+        for start in range(0, len(documents), BATCH_SIZE):
+            batch = documents[start:start + BATCH_SIZE]
+            kinds = {document.kind for document in batch}
+            for kind in kinds:
+                self.remove(kind, [document.object_id for document in batch if document.kind == kind])
+
+            SearchTerm.objects.bulk_create(
+                [
+                    SearchTerm(term=term, kind=document.kind, object_id=document.object_id, weight=weight)
+                    for document in batch
+                    for term, weight in weigh_terms(document.title, document.body).items()
+                ],
+                batch_size=BATCH_SIZE,
+            )
+
+    def remove(self, kind, object_ids):
+        SearchTerm.objects.filter(kind=kind, object_id__in=list(object_ids)).delete()
+
+    def clear(self, kind):
+        SearchTerm.objects.filter(kind=kind).delete()
+
+    def rank(self, kind, terms, limit, after):
+        hits = SearchTerm.objects.filter(kind=kind, term__in=terms).values('object_id').annotate(
+            score=Sum('weight'),
+            matched=Count('term'),
+        ).filter(matched=len(terms))
+
+        if after is not None:
+            score, object_id = after
+            hits = hits.filter(Q(score__lt=score) | Q(score=score, object_id__lt=object_id))
+
+        hits = hits.order_by('-score', '-object_id')[:limit]
+        return [(hit['object_id'], hit['score']) for hit in hits]
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    Native SQLite full-text search on an FTS5 virtual table ranked with BM25.
+
+    The rowid packs the kind and object ID so replacing a document is a
+    primary-key operation instead of a scan.
+    """
+    table = 'search_fts'
+    kind_codes = {SearchDocument.POST: 1, SearchDocument.USER: 2, SearchDocument.HASHTAG: 3}
+    # BM25 weights of the kind, object_id, title and body columns
+    rank_expression = 'bm25(search_fts, 0.0, 0.0, 3.0, 1.0)'
+    _ready = False
+
+    def setup(self):
+        if SQLiteFTS5Backend._ready:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                "kind UNINDEXED, object_id UNINDEXED, title, body, tokenize='unicode61')"
+            )
+        SQLiteFTS5Backend._ready = True
+
+    def get_rowid(self, kind, object_id):
+        return object_id * 4 + self.kind_codes[kind]
+
+    def index(self, documents):
+        self.setup()
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (rowid, kind, object_id, title, body) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                [
+                    (self.get_rowid(document.kind, document.object_id), document.kind,
+                     document.object_id, document.title, document.body)
+                    for document in documents
+                ],
+            )
+
+    def remove(self, kind, object_ids):
+        self.setup()
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s",
+                [(self.get_rowid(kind, object_id),) for object_id in object_ids],
+            )
+
+    def clear(self, kind):
+        self.setup()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE kind = %s", [kind])
+
+    def rank(self, kind, terms, limit, after):
+        self.setup()
+        match = ' '.join('"%s"' % term.replace('"', '""') for term in terms)
+        sql = (
+            f"SELECT object_id, score FROM (SELECT object_id, -{self.rank_expression} AS score "
+            f"FROM {self.table} WHERE {self.table} MATCH %s AND kind = %s)"
+        )
+        params = [match, kind]
+        if after is not None:
+            sql += " WHERE score < %s OR (score = %s AND object_id < %s)"
+            params += [after[0], after[0], after[1]]
+        sql += " ORDER BY score DESC, object_id DESC LIMIT %s"
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [(int(object_id), score) for object_id, score in cursor.fetchall()]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Native PostgreSQL full-text search over ``SearchDocument`` with a GIN
+    expression index on the weighted tsvector.
+    """
+    vector = "(setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B'))"
+    index_name = 'search_document_vector_idx'
+    _ready = False
+
+    def setup(self):
+        if PostgresSearchBackend._ready:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.index_name} "
+                f"ON {SearchDocument._meta.db_table} USING gin ({self.vector})"
+            )
+        PostgresSearchBackend._ready = True
+
+    def index(self, documents):
+        SearchDocument.objects.bulk_create(
+            documents,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=['title', 'body', 'updated_at'],
+        )
+
+    def remove(self, kind, object_ids):
+        SearchDocument.objects.filter(kind=kind, object_id__in=list(object_ids)).delete()
+
+    def clear(self, kind):
+        SearchDocument.objects.filter(kind=kind).delete()
+
+    def rank(self, kind, terms, limit, after):
+        self.setup()
+        sql = (
+            f"SELECT object_id, score FROM (SELECT object_id, ts_rank({self.vector}, query)::float8 AS score "
+            f"FROM {SearchDocument._meta.db_table}, plainto_tsquery('simple', %s) query "
+            f"WHERE kind = %s AND {self.vector} @@ query) ranked"
+        )
+        params = [' '.join(terms), kind]
+        if after is not None:
+            sql += " WHERE score < %s OR (score = %s AND object_id < %s)"
+            params += [after[0], after[0], after[1]]
+        sql += " ORDER BY score DESC, object_id DESC LIMIT %s"
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [(object_id, score) for object_id, score in cursor.fetchall()]
+
+
+def sqlite_has_fts5():
+    """
+    Check whether the SQLite library was compiled with FTS5.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+_backend = None
+
+
+def get_backend():
+    """
+    Get the configured search backend (``SEARCH_BACKEND`` setting, default ``'auto'``).
+    """
+    global _backend
+    if _backend is None:
+        backend_path = getattr(settings, 'SEARCH_BACKEND', 'auto')
+        if backend_path != 'auto':
+            _backend = import_string(backend_path)()
+        elif connection.vendor == 'postgresql':
+            _backend = PostgresSearchBackend()
+        elif connection.vendor == 'sqlite' and sqlite_has_fts5():
+            _backend = SQLiteFTS5Backend()
+        else:
+            _backend = InvertedIndexBackend()
+    return _backend
@@ -0,0 +1,122 @@
+"""
+Mapping of posts, users and hashtags to search documents.
+"""
+from django.contrib.auth import get_user_model
+
+from posts.models import Hashtag, Post
+
+from .backends import get_backend
+from .models import SearchDocument
+
+User = get_user_model()
+
+
+def get_post_document(post):
+    """
+    Build the search document of a post.
+    """
+    hashtags = ' '.join(hashtag.title for hashtag in post.hashtags.all())
+    return SearchDocument(
+        kind=SearchDocument.POST,
+        object_id=post.id,
+        title=f"{hashtags} {post.user.username}",
+        body=' '.join(filter(None, [
+            post.description, post.location, post.user.first_name, post.user.last_name
+        ])),
+    )
+
+
+def get_user_document(user):
+    """
+    Build the search document of a user.
+    """
+    return SearchDocument(
+        kind=SearchDocument.USER,
+        object_id=user.id,
+        title=user.username,
+        body=' '.join(filter(None, [user.first_name, user.last_name])),
+    )
+
+
+def get_hashtag_document(hashtag):
+    """
+    Build the search document of a hashtag.
+    """
+    return SearchDocument(kind=SearchDocument.HASHTAG, object_id=hashtag.id, title=hashtag.title)
+
+
+# Kind, searchable queryset and document builder of every indexed model
+INDEXED_MODELS = {
+    Post: (
+        SearchDocument.POST,
+        lambda: Post.objects.filter(is_deleted=False).select_related('user').prefetch_related('hashtags'),
+        get_post_document,
+    ),
+    User: (
+        SearchDocument.USER,
+        lambda: User.objects.filter(is_active=True, is_deleted=False),
+        get_user_document,
+    ),
+    Hashtag: (
+        SearchDocument.HASHTAG,
+        lambda: Hashtag.objects.all(),
+        get_hashtag_document,
+    ),
+}
+
+
+def index_objects(model, object_ids):
+    """
+    Re-index the given objects, dropping the ones that are no longer searchable.
+    """
+    object_ids = set(object_ids)
+    if not object_ids:
+        return
+
+    kind, get_queryset, get_document = INDEXED_MODELS[model]
+    objects = list(get_queryset().filter(pk__in=object_ids))
+    backend = get_backend()
+    backend.index([get_document(obj) for obj in objects])
+    backend.remove(kind, object_ids - {obj.pk for obj in objects})
+
+
+def remove_objects(model, object_ids):
+    """
+    Remove the given objects from the index.
+    """
+    kind = INDEXED_MODELS[model][0]
+    get_backend().remove(kind, list(object_ids))
+
+
+def rebuild_index(model, batch_size=500):
+    """
+    Rebuild the whole index of a model. Returns the number of indexed objects.
+    """
+    kind, get_queryset, get_document = INDEXED_MODELS[model]
+    backend = get_backend()
+    backend.setup()
+    backend.clear(kind)
+
+    count = 0
+    batch = []
+    for obj in get_queryset().order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(get_document(obj))
+        if len(batch) >= batch_size:
+            backend.index(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        backend.index(batch)
+        count += len(batch)
+    return count
+
+
+def search_objects(model, query, limit=20, cursor=None, queryset=None):
+    """
+    Get the ranked objects of a model matching a query and the next-page cursor.
+    """
+    kind, get_queryset, get_document = INDEXED_MODELS[model]
+    object_ids, next_cursor = get_backend().search(kind, query, limit=limit, cursor=cursor)
+    queryset = get_queryset() if queryset is None else queryset
+    objects = queryset.in_bulk(object_ids)
+    return [objects[object_id] for object_id in object_ids if object_id in objects], next_cursor
@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from posts.models import Hashtag, Post
+from search.index import rebuild_index
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Management command to rebuild the search index.
+    """
+    help = _('Rebuild the search index of posts, users and hashtags')
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help=_('Number of objects indexed per batch (default: 500)')
+        )
+
+    def handle(self, *args, **options):
+        """
+        Handle the command.
+        """
+        for label, model in (('posts', Post), ('users', User), ('hashtags', Hashtag)):
+            count = rebuild_index(model, batch_size=options['batch_size'])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    _('Indexed %(count)d %(label)s') % {'count': count, 'label': label}
+                )
+            )
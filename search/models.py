@@ -0,0 +1,51 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of a post, user or hashtag.
+    """
+    POST = 'post'
+    USER = 'user'
+    HASHTAG = 'hashtag'
+    KIND_CHOICES = [
+        (POST, _('Post')),
+        (USER, _('User')),
+        (HASHTAG, _('Hashtag')),
+    ]
+    kind = models.CharField(_('kind'), max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField(_('object ID'))
+    # High-weight text (usernames, hashtags) and regular text (descriptions, names)
+    title = models.TextField(_('title'), blank=True, default='')
+    body = models.TextField(_('body'), blank=True, default='')
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('search document')
+        verbose_name_plural = _('search documents')
+        unique_together = ('kind', 'object_id')
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class SearchTerm(models.Model):
+    """
+    Inverted index posting: one token of one search document.
+    """
+    term = models.CharField(_('term'), max_length=64)
+    kind = models.CharField(_('kind'), max_length=10, choices=SearchDocument.KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField(_('object ID'))
+    weight = models.FloatField(_('weight'), default=1)
+
+    class Meta:
+        verbose_name = _('search term')
+        verbose_name_plural = _('search terms')
+        unique_together = ('kind', 'term', 'object_id')
+        indexes = [
+            models.Index(fields=['kind', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.kind} {self.object_id}"
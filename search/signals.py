@@ -0,0 +1,225 @@
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from posts.models import Hashtag, Post
+from posts.signals import hashtags_created
+from social_interactions.models import Follow
+from social_interactions.signals import follows_created, follows_deleted, is_bulk_unfollow
+
+from .autocomplete import HASHTAG, USER, autocomplete
+from .index import index_objects, remove_objects
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+# User fields that appear in the search documents of users and their posts
+USER_INDEXED_FIELDS = {'username', 'first_name', 'last_name', 'is_active', 'is_deleted'}
+
+
+def _on_commit(func, *args):
+    """
+    Update the index after the transaction commits; indexing errors never break writes.
+    """
+    def run():
+        try:
+            func(*args)
+        except Exception:
+            logger.exception("Search index update failed")
+    transaction.on_commit(run)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    """
+    Index a saved post.
+    """
+    _on_commit(index_objects, Post, [instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    """
+    Remove a deleted post from the index.
+    """
+    _on_commit(remove_objects, Post, [instance.pk])
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, update_fields=None, **kwargs):
+    """
+    Re-index a user and their posts when an indexed field changes.
+    """
+    # Saves such as the last_login update do not touch indexed fields
+    if update_fields is not None and not USER_INDEXED_FIELDS.intersection(update_fields):
+        return
+    _on_commit(index_objects, User, [instance.pk])
+    _on_commit(index_objects, Post, list(instance.posts.values_list('id', flat=True)))
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, **kwargs):
+    """
+    Remove a deleted user from the index.
+    """
+    _on_commit(remove_objects, User, [instance.pk])
+
+
+@receiver(post_save, sender=Hashtag)
+def index_hashtag(sender, instance, **kwargs):
+    """
+    Index a saved hashtag.
+    """
+    _on_commit(index_objects, Hashtag, [instance.pk])
+
+
+@receiver(hashtags_created, sender=Hashtag)
+def index_created_hashtags(sender, hashtags, **kwargs):
+    """
+    Index hashtags created in bulk.
+    """
+    _on_commit(index_objects, Hashtag, [hashtag.pk for hashtag in hashtags])
+
+
+@receiver(pre_delete, sender=Hashtag)
+def remember_hashtag_posts(sender, instance, **kwargs):
+    """
+    Remember the posts of a hashtag before it is deleted.
+    """
+    instance._search_post_ids = list(instance.posts.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Hashtag)
+def unindex_hashtag(sender, instance, **kwargs):
+    """
+    Remove a deleted hashtag and re-index the posts that used it.
+    """
+    _on_commit(remove_objects, Hashtag, [instance.pk])
+    _on_commit(index_objects, Post, getattr(instance, '_search_post_ids', []))
+
+
+@receiver(m2m_changed, sender=Hashtag.posts.through)
+def reindex_hashtag_posts(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Re-index posts whose hashtags changed, from either side of the relation.
+    """
+    if reverse:
+        # post.hashtags.add/remove/clear(): the instance is the post
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            _on_commit(index_objects, Post, [instance.pk])
+    elif action == 'pre_clear':
+        instance._search_post_ids = list(instance.posts.values_list('id', flat=True))
+    elif action == 'post_clear':
+        _on_commit(index_objects, Post, getattr(instance, '_search_post_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        _on_commit(index_objects, Post, pk_set or [])
+
+
+# Autocomplete index patches (applied on commit, so rolled-back rows never show up)
+
+@receiver(post_save, sender=Hashtag)
+def autocomplete_hashtag_saved(sender, instance, created, **kwargs):
+    """
+    Add a new or renamed hashtag to the autocomplete index.
+    """
+    _on_commit(autocomplete.upsert, HASHTAG, instance.pk, instance.title, 0 if created else None)
+
+
+@receiver(hashtags_created, sender=Hashtag)
+def autocomplete_hashtags_created(sender, hashtags, **kwargs):
+    """
+    Add hashtags created in bulk to the autocomplete index.
+    """
+    for hashtag in hashtags:
+        _on_commit(autocomplete.upsert, HASHTAG, hashtag.pk, hashtag.title, 0)
+
+
+@receiver(post_delete, sender=Hashtag)
+def autocomplete_hashtag_deleted(sender, instance, **kwargs):
+    """
+    Remove a deleted hashtag from the autocomplete index.
+    """
+    _on_commit(autocomplete.remove, HASHTAG, instance.pk)
+
+
+@receiver(m2m_changed, sender=Hashtag.posts.through)
+def autocomplete_hashtag_weights(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Follow the post counts of hashtags as posts are tagged and untagged.
+    """
+    if action == 'pre_clear' and reverse:
+        instance._autocomplete_hashtag_ids = list(instance.hashtags.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    delta = 1 if action == 'post_add' else -1
+    if not reverse:
+        if action == 'post_clear':
+            _on_commit(autocomplete.upsert, HASHTAG, instance.pk, instance.title, 0)
+        else:
+            _on_commit(autocomplete.add_weight, HASHTAG, instance.pk, delta * len(pk_set or ()))
+        return
+
+    hashtag_ids = pk_set if action != 'post_clear' else getattr(instance, '_autocomplete_hashtag_ids', [])
+    for hashtag_id in hashtag_ids or ():
+        _on_commit(autocomplete.add_weight, HASHTAG, hashtag_id, delta)
+
+
+@receiver(post_save, sender=User)
+def autocomplete_user_saved(sender, instance, created, **kwargs):
+    """
+    Add, rename or drop a user in the autocomplete index.
+    """
+    if instance.is_active and not instance.is_deleted:
+        _on_commit(autocomplete.upsert, USER, instance.pk, instance.username, 0 if created else None)
+    else:
+        _on_commit(autocomplete.remove, USER, instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def autocomplete_user_deleted(sender, instance, **kwargs):
+    """
+    Remove a deleted user from the autocomplete index.
+    """
+    _on_commit(autocomplete.remove, USER, instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def autocomplete_follow_created(sender, instance, created, **kwargs):
+    """
+    Count a new follower in the weight of the followed user.
+    """
+    if created:
+        _on_commit(autocomplete.add_weight, USER, instance.following_id, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def autocomplete_follow_deleted(sender, instance, origin=None, **kwargs):
+    """
+    Stop counting a removed follower in the weight of the followed user.
+    """
+    if is_bulk_unfollow(origin):
+        return
+    _on_commit(autocomplete.add_weight, USER, instance.following_id, -1)
+
+
+@receiver(follows_created)
+def autocomplete_follows_created(sender, following_ids, **kwargs):
+    """
+    Count a new follower in the weight of each user followed in bulk.
+    """
+    for following_id in following_ids:
+        _on_commit(autocomplete.add_weight, USER, following_id, 1)
+
+
+@receiver(follows_deleted)
+def autocomplete_follows_deleted(sender, following_ids, **kwargs):
+    """
+    Stop counting a removed follower in the weight of each user unfollowed in bulk.
+    """
+    for following_id in following_ids:
+        _on_commit(autocomplete.add_weight, USER, following_id, -1)
@@ -0,0 +1,38 @@
+import re
+from collections import Counter
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+
+
+def tokenize(text):
+    """
+    Split text into lowercase word tokens (hashtag signs and punctuation are dropped).
+    """
+    if not text:
+        return []
+    return [token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(text.lower())]
+
+
+def tokenize_query(query):
+    """
+    Get the distinct terms of a search query, in order, up to ``MAX_QUERY_TERMS``.
+    """
+    terms = []
+    for token in tokenize(query):
+        if token not in terms:
+            terms.append(token)
+    return terms[:MAX_QUERY_TERMS]
+
+
+def weigh_terms(title, body, title_weight=3.0, body_weight=1.0):
+    """
+    Get the weight of every term of a document, title terms counting more.
+    """
+    weights = Counter()
+    for token in tokenize(title):
+        weights[token] += title_weight
+    for token in tokenize(body):
+        weights[token] += body_weight
+    return weights
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import AutocompleteAPIView
+
+app_name = 'search'
+
+urlpatterns = [
+    path('autocomplete/', AutocompleteAPIView.as_view(), name='autocomplete'),
+]
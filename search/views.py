@@ -0,0 +1,52 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .autocomplete import HASHTAG, USER, autocomplete
+
+
+class AutocompleteAPIView(APIView):
+    """
+    API view for hashtag and username autocomplete.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request):
+        """
+        Get the most popular hashtags and/or usernames starting with ``q``.
+
+        A leading ``#`` only searches hashtags and a leading ``@`` only usernames.
+        """
+        query = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('type', 'all')
+
+        if query.startswith('#'):
+            query, kind = query[1:], HASHTAG
+        elif query.startswith('@'):
+            query, kind = query[1:], USER
+
+        if kind not in ('all', HASHTAG, USER):
+            return Response({
+                'error': _('Invalid type.')
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+
+        data = {}
+        if query and kind in ('all', HASHTAG):
+            data['hashtags'] = [
+                {'id': object_id, 'title': title, 'posts_count': weight}
+                for object_id, title, weight in autocomplete.complete(HASHTAG, query, limit)
+            ]
+        if query and kind in ('all', USER):
+            data['users'] = [
+                {'id': object_id, 'username': username, 'followers_count': weight}
+                for object_id, username, weight in autocomplete.complete(USER, query, limit)
+            ]
+        return Response(data)
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
-from .models import Comment, Like, Follow
+from .models import Comment, CommentLike, Follow, Like, PostLike
 
 
 @admin.register(Comment)
@@ -9,11 +9,11 @@ class CommentAdmin(admin.ModelAdmin):
     """
     Admin for the Comment model.
     """
-    list_display = ('id', 'user', 'post', 'description_preview', 'is_reply', 'created_at')
+    list_display = ('id', 'user', 'post', 'description_preview', 'is_reply', 'likes_count', 'replies_count', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('description', 'user__username', 'post__description')
     ordering = ('-created_at',)
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'likes_count', 'dislikes_count', 'replies_count')
     
     def description_preview(self, obj):
         """
@@ -31,10 +31,34 @@ class CommentAdmin(admin.ModelAdmin):
     is_reply.short_description = _('Is reply')
 
 
+@admin.register(PostLike)
+class PostLikeAdmin(admin.ModelAdmin):
+    """
+    Admin for the PostLike model.
+    """
+    list_display = ('id', 'user', 'post', 'like_type', 'created_at')
+    list_filter = ('like_type', 'created_at')
+    search_fields = ('user__username', 'post__id')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at',)
+
+
+@admin.register(CommentLike)
+class CommentLikeAdmin(admin.ModelAdmin):
+    """
+    Admin for the CommentLike model.
+    """
+    list_display = ('id', 'user', 'comment', 'like_type', 'created_at')
+    list_filter = ('like_type', 'created_at')
+    search_fields = ('user__username', 'comment__id')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at',)
+
+
 @admin.register(Like)
 class LikeAdmin(admin.ModelAdmin):
     """
-    Admin for the Like model.
+    Admin for the legacy Like model.
     """
     list_display = ('id', 'user', 'content_type', 'object_id', 'like_type', 'created_at')
     list_filter = ('like_type', 'content_type', 'created_at')
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class SocialInteractionsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'social_interactions'
+
+    def ready(self):
+        from . import signals  # noqa: F401
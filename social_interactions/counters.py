@@ -0,0 +1,83 @@
+"""
+Maintenance of the denormalized like and comment counters on posts and comments.
+
+Counters are only changed with ``F()`` expressions so concurrent requests
+never overwrite each other's increments.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import BaseLike, Comment, CommentLike, PostLike
+
+
+def get_like_counter_field(like_type):
+    """
+    Get the counter column that tracks the given like type.
+    """
+    return 'dislikes_count' if like_type == BaseLike.DISLIKE else 'likes_count'
+
+
+def adjust_like_counter(like_model, object_id, like_type, delta):
+    """
+    Atomically add ``delta`` to the like or dislike counter of a liked object.
+    """
+    model = like_model.get_target_model()
+    field = get_like_counter_field(like_type)
+    model.objects.filter(pk=object_id).update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+def adjust_comment_counters(comment, delta):
+    """
+    Atomically add ``delta`` to the counters affected by a comment.
+    """
+    from posts.models import Post
+
+    Post.objects.filter(pk=comment.post_id).update(
+        comments_count=Greatest(F('comments_count') + delta, Value(0))
+    )
+    if comment.parent_comment_id is not None:
+        Comment.objects.filter(pk=comment.parent_comment_id).update(
+            replies_count=Greatest(F('replies_count') + delta, Value(0))
+        )
+
+
+def _count_subquery(queryset, group_field):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(group_field).annotate(total=Count('pk')).values('total')
+        ),
+        Value(0),
+    )
+
+
+def _like_count_subquery(like_model, like_type):
+    likes = like_model.objects.filter(**like_model.target_lookup(OuterRef('pk')), like_type=like_type)
+    return _count_subquery(likes, like_model.target_field)
+
+
+def rebuild_post_counters(queryset=None):
+    """
+    Recompute the counters of posts in a single bulk UPDATE.
+    """
+    from posts.models import Post
+
+    queryset = Post.objects.all() if queryset is None else queryset
+    return queryset.update(
+        likes_count=_like_count_subquery(PostLike, PostLike.LIKE),
+        dislikes_count=_like_count_subquery(PostLike, PostLike.DISLIKE),
+        comments_count=_count_subquery(Comment.objects.filter(post=OuterRef('pk')), 'post'),
+    )
+
+
+def rebuild_comment_counters(queryset=None):
+    """
+    Recompute the counters of comments in a single bulk UPDATE.
+    """
+    queryset = Comment.objects.all() if queryset is None else queryset
+    return queryset.update(
+        likes_count=_like_count_subquery(CommentLike, CommentLike.LIKE),
+        dislikes_count=_like_count_subquery(CommentLike, CommentLike.DISLIKE),
+        replies_count=_count_subquery(
+            Comment.objects.filter(parent_comment=OuterRef('pk')), 'parent_comment'
+        ),
+    )
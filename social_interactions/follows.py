@@ -0,0 +1,98 @@
+"""
+Bulk follow operations.
+
+``follow_users`` and ``unfollow_users`` change many follows of one user in a
+single transaction with one insert or delete query. They send
+``follows_created`` and ``follows_deleted`` so the follow graph, timelines
+and search weights are updated once per batch; bulk inserts send no
+``post_save``, and the built-in ``post_delete`` receivers skip rows
+removed by ``unfollow_users``. ``get_relationships`` reads the follow
+status between a user and a list of users in one query.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Follow
+from .signals import follows_created, follows_deleted
+
+User = get_user_model()
+
+
+def get_bulk_max():
+    """
+    Get the largest number of users accepted by a bulk operation.
+    """
+    return getattr(settings, 'FOLLOW_BULK_MAX', 100)
+
+
+def follow_users(follower, user_ids):
+    """
+    Follow the given users, skipping the follower and inactive or already followed users.
+
+    Returns the IDs of the users followed now.
+    """
+    user_ids = set(user_ids) - {follower.id}
+    with transaction.atomic():
+        candidate_ids = set(User.objects.filter(
+            id__in=user_ids, is_active=True, is_deleted=False
+        ).values_list('id', flat=True))
+        candidate_ids -= set(Follow.objects.filter(
+            follower=follower, following_id__in=candidate_ids
+        ).values_list('following_id', flat=True))
+        # A concurrent request may follow some of them first; the unique
+        # constraint keeps the rows single
+        Follow.objects.bulk_create(
+            [Follow(follower=follower, following_id=user_id) for user_id in candidate_ids],
+            ignore_conflicts=True,
+        )
+        followed_ids = sorted(candidate_ids)
+        if followed_ids:
+            follows_created.send(sender=Follow, follower_id=follower.id, following_ids=followed_ids)
+    return followed_ids
+
+
+def unfollow_users(follower, user_ids):
+    """
+    Unfollow the given users.
+
+    Returns the IDs of the users unfollowed now.
+    """
+    with transaction.atomic():
+        follows = Follow.objects.select_for_update().filter(follower=follower, following_id__in=set(user_ids))
+        unfollowed_ids = sorted(follows.values_list('following_id', flat=True))
+        if unfollowed_ids:
+            # The per-row post_delete receivers recognize this queryset as
+            # the origin and leave the batch to follows_deleted
+            follows = Follow.objects.filter(follower=follower, following_id__in=unfollowed_ids)
+            follows.sends_follows_deleted = True
+            follows.delete()
+            follows_deleted.send(sender=Follow, follower_id=follower.id, following_ids=unfollowed_ids)
+    return unfollowed_ids
+
+
+def get_relationships(user, user_ids):
+    """
+    Get whether a user follows and is followed by each of the given users.
+
+    Returns a dict mapping each ID to ``following``, ``followed_by`` and
+    ``mutual`` flags.
+    """
+    user_ids = set(user_ids)
+    relationships = {
+        user_id: {'following': False, 'followed_by': False, 'mutual': False}
+        for user_id in user_ids
+    }
+    follows = Follow.objects.filter(
+        Q(follower=user, following_id__in=user_ids) | Q(following=user, follower_id__in=user_ids)
+    ).values_list('follower_id', 'following_id')
+
+    for follower_id, following_id in follows:
+        if follower_id == user.id and following_id in relationships:
+            relationships[following_id]['following'] = True
+        if following_id == user.id and follower_id in relationships:
+            relationships[follower_id]['followed_by'] = True
+    for relationship in relationships.values():
+        relationship['mutual'] = relationship['following'] and relationship['followed_by']
+    return relationships
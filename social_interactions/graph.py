@@ -0,0 +1,153 @@
+"""
+In-process follow-graph cache.
+
+Each worker keeps, per user, the sorted IDs of the users they follow as a
+compact ``array('q')`` plus their follower and following counts, so
+"does A follow B", "who does A follow" and the counts are answered from
+memory. Every user has a version number in the shared Django cache that
+is bumped whenever one of their follows changes; a worker reloads an entry
+when its version no longer matches, so all gunicorn workers see a change
+on their next lookup. Entries also expire after
+``FOLLOW_GRAPH_LOCAL_TTL`` seconds, which bounds staleness when the
+configured cache is not shared between workers.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_CACHE_KEY = 'follow_graph:version:%s'
+VERSION_CACHE_TIMEOUT = None
+
+
+class GraphEntry:
+    """
+    Cached follow data of one user; fields are loaded on first use.
+    """
+    __slots__ = ('version', 'loaded_at', 'following_ids', 'following_count', 'followers_count')
+
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.following_ids = None
+        self.following_count = None
+        self.followers_count = None
+
+
+class FollowGraph:
+    """
+    Per-process LRU cache of follow data, invalidated through versions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_max_entries(self):
+        return getattr(settings, 'FOLLOW_GRAPH_CACHE_SIZE', 10000)
+
+    def get_local_ttl(self):
+        return getattr(settings, 'FOLLOW_GRAPH_LOCAL_TTL', 60)
+
+    def get_versions(self, user_ids):
+        """
+        Get the current version of each user from the shared cache.
+        """
+        keys = {VERSION_CACHE_KEY % user_id: user_id for user_id in user_ids}
+        found = cache.get_many(list(keys))
+        return {user_id: found.get(key, 0) for key, user_id in keys.items()}
+
+    def get_entry(self, user_id, version=None):
+        """
+        Get the up-to-date entry of a user, replacing a stale one.
+        """
+        if version is None:
+            version = self.get_versions([user_id])[user_id]
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if (
+                entry is None
+                or entry.version != version
+                or time.monotonic() - entry.loaded_at > self.get_local_ttl()
+            ):
+                entry = GraphEntry(version)
+                self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.get_max_entries():
+                self._entries.popitem(last=False)
+            return entry
+
+    def get_following_ids(self, user_id):
+        """
+        Get the sorted IDs of the users a user follows.
+        """
+        entry = self.get_entry(user_id)
+        if entry.following_ids is None:
+            from .models import Follow
+
+            entry.following_ids = array('q', Follow.objects.filter(
+                follower_id=user_id
+            ).order_by('following_id').values_list('following_id', flat=True))
+            entry.following_count = len(entry.following_ids)
+        return entry.following_ids
+
+    def is_following(self, follower_id, following_id):
+        """
+        Check whether a user follows another one.
+        """
+        following_ids = self.get_following_ids(follower_id)
+        position = bisect_left(following_ids, following_id)
+        return position < len(following_ids) and following_ids[position] == following_id
+
+    def get_following_count(self, user_id):
+        """
+        Get the number of users a user follows.
+        """
+        entry = self.get_entry(user_id)
+        if entry.following_count is None:
+            from .models import Follow
+
+            entry.following_count = Follow.objects.filter(follower_id=user_id).count()
+        return entry.following_count
+
+    def get_followers_count(self, user_id):
+        """
+        Get the number of followers of a user.
+
+        Only the count is cached: follower lists of large accounts are too
+        big to keep in every worker.
+        """
+        entry = self.get_entry(user_id)
+        if entry.followers_count is None:
+            from .models import Follow
+
+            entry.followers_count = Follow.objects.filter(following_id=user_id).count()
+        return entry.followers_count
+
+    def invalidate(self, *user_ids):
+        """
+        Bump the versions of the given users so every worker reloads them.
+        """
+        for user_id in user_ids:
+            key = VERSION_CACHE_KEY % user_id
+            try:
+                cache.incr(key)
+            except ValueError:
+                # incr fails on a missing key; a fresh one starts above the implicit 0
+                cache.set(key, 1, VERSION_CACHE_TIMEOUT)
+            with self._lock:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        """
+        Drop every entry of this process.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+follow_graph = FollowGraph()
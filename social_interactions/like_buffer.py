@@ -0,0 +1,328 @@
+"""
+Write-behind buffering of like toggles.
+
+With ``LIKE_WRITE_BEHIND`` enabled, a like toggle only records the wanted
+state of the ``(user, object)`` pair in this process's buffer; a background
+thread writes the buffer to the like tables every ``LIKE_FLUSH_INTERVAL`` seconds.
+Repeated toggles of the same pair collapse into one entry, so a burst of
+clicks on a hot post costs one bulk insert, one bulk delete and one counter
+update per object instead of a row lock per click.
+
+Counts returned while a toggle is buffered are optimistic: the persisted
+counter plus the pending changes of this process. Buffered toggles are lost
+if the process is killed before a flush; a clean exit flushes them.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+
+from .counters import adjust_like_counter
+from .models import BaseLike
+
+logger = logging.getLogger(__name__)
+
+
+class PendingLike:
+    """
+    Buffered state of one ``(user, object)`` pair.
+
+    ``persisted`` is the like type stored when the pair was first buffered
+    and ``wanted`` the like type to store, ``None`` meaning no like.
+    """
+    __slots__ = ('persisted', 'wanted')
+
+    def __init__(self, persisted):
+        self.persisted = persisted
+        self.wanted = persisted
+
+
+class LikeBuffer:
+    """
+    Per-process buffer of like toggles with a background flush thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        # Entries being written by the running flush
+        self._flushing = {}
+        # Pending change of the like and dislike counts of each object, by
+        # ``(like_model, object_id, like_type)``, including the batch being flushed
+        self._deltas = defaultdict(int)
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    def is_enabled(self):
+        return getattr(settings, 'LIKE_WRITE_BEHIND', False)
+
+    def get_flush_interval(self):
+        return getattr(settings, 'LIKE_FLUSH_INTERVAL', 0.3)
+
+    def get_flush_batch_size(self):
+        return getattr(settings, 'LIKE_FLUSH_BATCH_SIZE', 500)
+
+    def toggle(self, user_id, like_model, object_id, like_type=BaseLike.LIKE):
+        """
+        Toggle a user's ``like_type`` reaction on an object, ``like_model`` being ``PostLike`` or ``CommentLike``.
+
+        Returns the reaction buffered now (``None`` when removed) and the
+        pending changes of the object's like and dislike counts.
+        """
+        key = (user_id, like_model, object_id)
+        with self._lock:
+            buffered = key in self._pending or key in self._flushing
+        if not buffered:
+            persisted = like_model.objects.filter(
+                user_id=user_id, **like_model.target_lookup(object_id)
+            ).values_list('like_type', flat=True).first()
+
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                flushing = self._flushing.get(key)
+                # The running flush stores the in-flight state; otherwise use
+                # what was read, unless the flush finished in between
+                if flushing is not None:
+                    persisted = flushing.wanted
+                elif buffered:
+                    persisted = like_model.objects.filter(
+                        user_id=user_id, **like_model.target_lookup(object_id)
+                    ).values_list('like_type', flat=True).first()
+                entry = self._pending[key] = PendingLike(persisted)
+            # The same reaction is removed, another one is replaced
+            previous = entry.wanted
+            entry.wanted = None if previous == like_type else like_type
+            self._move(like_model, object_id, previous, entry.wanted)
+            wanted = entry.wanted
+            deltas = self._get_deltas(like_model, object_id)
+
+        self._ensure_thread()
+        return wanted, deltas
+
+    def _move(self, like_model, object_id, old_type, new_type):
+        """
+        Count a change of reaction in the pending counts; the lock must be held.
+        """
+        for like_type, delta in ((old_type, -1), (new_type, 1)):
+            if like_type is None:
+                continue
+            key = (like_model, object_id, like_type)
+            self._deltas[key] += delta
+            if not self._deltas[key]:
+                del self._deltas[key]
+
+    def _get_deltas(self, like_model, object_id):
+        return tuple(
+            self._deltas.get((like_model, object_id, like_type), 0)
+            for like_type in (BaseLike.LIKE, BaseLike.DISLIKE)
+        )
+
+    def get_pending_counts(self, like_model, object_id):
+        """
+        Get the pending changes of the like and dislike counts of an object.
+        """
+        with self._lock:
+            return self._get_deltas(like_model, object_id)
+
+    def get_pending_states(self, user_id, like_model):
+        """
+        Get the buffered like types of a user's likes of one model, by object ID.
+        """
+        with self._lock:
+            return {
+                object_id: entry.wanted
+                for entries in (self._flushing, self._pending)
+                for (pending_user_id, pending_model, object_id), entry in entries.items()
+                if pending_user_id == user_id and pending_model is like_model
+            }
+
+    def _ensure_thread(self):
+        """
+        Start the flush thread of this process if it is not running.
+        """
+        # Threads do not survive a fork, so each worker starts its own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='like-buffer-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.get_flush_interval()):
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered likes")
+
+    def stop(self):
+        """
+        Stop the flush thread and write what is left in the buffer.
+        """
+        self._stop.set()
+        self.flush()
+
+    def flush(self):
+        """
+        Write the buffered toggles to the database.
+
+        Returns the number of likes created, deleted or changed.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._flushing = pending
+            items = [(key, entry) for key, entry in pending.items() if entry.wanted != entry.persisted]
+
+            batch_size = self.get_flush_batch_size()
+            written = 0
+            try:
+                for start in range(0, len(items), batch_size):
+                    batch = items[start:start + batch_size]
+                    try:
+                        written += self._write_batch({key: entry.wanted for key, entry in batch})
+                    except Exception:
+                        # Put the unwritten toggles back unless newer ones replaced them
+                        with self._lock:
+                            replaced = [
+                                (key, entry) for key, entry in items[start:]
+                                if self._pending.setdefault(key, entry) is not entry
+                            ]
+                        self._discount(replaced)
+                        raise
+                    self._discount(batch)
+            finally:
+                with self._lock:
+                    self._flushing = {}
+            return written
+
+    def _discount(self, batch):
+        """
+        Remove the toggles of a written or superseded batch from the pending counts.
+        """
+        with self._lock:
+            for (user_id, like_model, object_id), entry in batch:
+                self._move(like_model, object_id, entry.wanted, entry.persisted)
+
+    def _write_batch(self, wanted_types):
+        """
+        Apply a batch of wanted like types in one transaction.
+        """
+        by_model = defaultdict(dict)
+        for (user_id, like_model, object_id), wanted in wanted_types.items():
+            by_model[like_model][(user_id, object_id)] = wanted
+
+        written = 0
+        with transaction.atomic():
+            for like_model, model_wanted_types in by_model.items():
+                written += self._write_model_batch(like_model, model_wanted_types)
+        return written
+
+    def _write_model_batch(self, like_model, wanted_types):
+        """
+        Apply the wanted like types of one like model, keyed by ``(user_id, object_id)``.
+        """
+        target_id_field = f'{like_model.target_field}_id'
+        conditions = Q()
+        for user_id, object_id in wanted_types:
+            conditions |= Q(user_id=user_id, **like_model.target_lookup(object_id))
+
+        stored = {
+            (like.user_id, like.object_id): like
+            for like in like_model.objects.select_for_update().filter(conditions).only(
+                'id', 'user_id', target_id_field, 'like_type'
+            )
+        }
+
+        # Likes of objects or users deleted since the toggle cannot be
+        # created; they are dropped so the rest of the batch is written
+        missing = self._get_missing_keys(like_model, [
+            key for key, wanted in wanted_types.items() if wanted is not None and key not in stored
+        ])
+        if missing:
+            logger.warning(
+                "Dropping %d buffered %s toggles of deleted objects or users",
+                len(missing), like_model._meta.object_name,
+            )
+
+        counter_deltas = defaultdict(int)
+        to_create = []
+        to_delete = []
+        to_update = []
+        for key, wanted in wanted_types.items():
+            like = stored.get(key)
+            stored_type = like.like_type if like is not None else None
+            if stored_type == wanted or key in missing:
+                continue
+            user_id, object_id = key
+            if stored_type is not None:
+                counter_deltas[(object_id, stored_type)] -= 1
+            if wanted is not None:
+                counter_deltas[(object_id, wanted)] += 1
+
+            if like is None:
+                to_create.append(like_model(user_id=user_id, like_type=wanted, **like_model.target_lookup(object_id)))
+            elif wanted is None:
+                to_delete.append(like.id)
+            else:
+                like.like_type = wanted
+                to_update.append(like)
+
+        # Bulk queries skip the like signals, so the counters are adjusted
+        # here once per object
+        like_model.objects.bulk_create(to_create)
+        self._delete_rows(like_model, to_delete)
+        like_model.objects.bulk_update(to_update, ['like_type'])
+        for (object_id, like_type), delta in counter_deltas.items():
+            if delta:
+                adjust_like_counter(like_model, object_id, like_type, delta)
+        return len(to_create) + len(to_delete) + len(to_update)
+
+    def _get_missing_keys(self, like_model, keys):
+        """
+        Get the ``(user_id, object_id)`` keys whose user or object no longer exists.
+        """
+        if not keys:
+            return set()
+        user_model = like_model._meta.get_field('user').related_model
+        user_ids = set(user_model.objects.filter(
+            pk__in={user_id for user_id, object_id in keys}
+        ).values_list('pk', flat=True))
+        object_ids = set(like_model.get_target_model().objects.filter(
+            pk__in={object_id for user_id, object_id in keys}
+        ).values_list('pk', flat=True))
+        return {
+            (user_id, object_id) for user_id, object_id in keys
+            if user_id not in user_ids or object_id not in object_ids
+        }
+
+    def _delete_rows(self, like_model, like_ids):
+        """
+        Delete likes by ID with plain ``DELETE`` queries that send no ``post_delete``.
+        """
+        qn = connection.ops.quote_name
+        batch_size = self.get_flush_batch_size()
+        with connection.cursor() as cursor:
+            for start in range(0, len(like_ids), batch_size):
+                batch = like_ids[start:start + batch_size]
+                cursor.execute(
+                    f'DELETE FROM {qn(like_model._meta.db_table)} WHERE {qn(like_model._meta.pk.column)} '
+                    f'IN ({", ".join(["%s"] * len(batch))})',
+                    batch,
+                )
+
+
+like_buffer = LikeBuffer()
+atexit.register(like_buffer.stop)
@@ -0,0 +1,154 @@
+"""
+Atomic like toggling.
+
+``toggle_like`` removes, switches or adds the reaction of a user on an
+object and returns the new reaction together with the object's counters,
+all in one transaction:
+
+* a no-op ``UPDATE ... RETURNING`` on the liked object checks that it
+  exists and locks it, before any like row is written;
+* ``DELETE ... RETURNING like_type`` removes the current reaction and tells
+  which one it was; concurrent toggles of the same pair queue on the row
+  lock instead of both seeing "not liked";
+* a conditional ``INSERT`` (``ON CONFLICT DO NOTHING`` / ``INSERT OR
+  IGNORE``) adds the new reaction unless it was the one removed;
+* one ``UPDATE ... RETURNING`` applies the resulting counter changes and
+  reads the new counts.
+
+Backends without ``RETURNING`` fall back to row locks through the ORM.
+"""
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models.constants import OnConflict
+
+from .counters import get_like_counter_field
+from .models import BaseLike
+
+ToggleResult = namedtuple('ToggleResult', ['like_type', 'likes_count', 'dislikes_count'])
+
+# Backends that support RETURNING on DELETE, INSERT and UPDATE alike
+RETURNING_VENDORS = {'postgresql', 'sqlite'}
+
+
+def _decrement_sql(column):
+    return f'CASE WHEN {column} > 0 THEN {column} - 1 ELSE 0 END'
+
+
+def _toggle_returning(like_model, user_id, object_id, like_type):
+    """
+    Toggle a reaction with ``RETURNING`` statements; must run in a transaction.
+    """
+    qn = connection.ops.quote_name
+    meta = like_model._meta
+    target_model = like_model.get_target_model()
+    like_table = qn(meta.db_table)
+    target_column = qn(meta.get_field(like_model.target_field).column)
+    user_column = qn(meta.get_field('user').column)
+    type_column = qn(meta.get_field('like_type').column)
+    created_at = meta.get_field('created_at')
+
+    def counter_column(like_type):
+        return qn(target_model._meta.get_field(get_like_counter_field(like_type)).column)
+
+    likes_column = counter_column(BaseLike.LIKE)
+    dislikes_column = counter_column(BaseLike.DISLIKE)
+    target_table = qn(target_model._meta.db_table)
+    target_pk_column = qn(target_model._meta.pk.column)
+
+    with connection.cursor() as cursor:
+        # SQLite checks foreign keys only at commit, so a missing object must
+        # be caught before the insert
+        cursor.execute(
+            f'UPDATE {target_table} SET {likes_column} = {likes_column} '
+            f'WHERE {target_pk_column} = %s RETURNING {target_pk_column}',
+            [object_id],
+        )
+        if cursor.fetchone() is None:
+            raise target_model.DoesNotExist
+
+        cursor.execute(
+            f'DELETE FROM {like_table} WHERE {user_column} = %s AND {target_column} = %s '
+            f'RETURNING {type_column}',
+            [user_id, object_id],
+        )
+        row = cursor.fetchone()
+        removed_type = row[0] if row else None
+
+        new_type = None if removed_type == like_type else like_type
+        added = False
+        if new_type is not None:
+            cursor.execute(
+                f'{connection.ops.insert_statement(on_conflict=OnConflict.IGNORE)} {like_table} '
+                f'({user_column}, {target_column}, {type_column}, {qn(created_at.column)}) '
+                f'VALUES (%s, %s, %s, %s) '
+                f'{connection.ops.on_conflict_suffix_sql([], OnConflict.IGNORE, None, None)} '
+                f'RETURNING {qn(meta.pk.column)}',
+                [user_id, object_id, new_type, created_at.get_db_prep_value(created_at.default(), connection)],
+            )
+            added = cursor.fetchone() is not None
+            if not added:
+                # A concurrent toggle of the same pair inserted first; keep its reaction
+                new_type = like_model.objects.filter(
+                    user_id=user_id, **like_model.target_lookup(object_id)
+                ).values_list('like_type', flat=True).first()
+
+        assignments = []
+        if removed_type is not None:
+            column = counter_column(removed_type)
+            assignments.append(f'{column} = {_decrement_sql(column)}')
+        if added:
+            column = counter_column(new_type)
+            assignments.append(f'{column} = {column} + 1')
+        if not assignments:
+            # No change of ours to count; the UPDATE still reads the counts
+            assignments.append(f'{likes_column} = {likes_column}')
+
+        cursor.execute(
+            f'UPDATE {target_table} SET {", ".join(assignments)} '
+            f'WHERE {target_pk_column} = %s RETURNING {likes_column}, {dislikes_column}',
+            [object_id],
+        )
+        row = cursor.fetchone()
+    return ToggleResult(new_type, *row)
+
+
+def _toggle_locked(like_model, user_id, object_id, like_type):
+    """
+    Toggle a reaction through the ORM with row locks; must run in a transaction.
+    """
+    target_model = like_model.get_target_model()
+    target = target_model.objects.select_for_update().only('likes_count', 'dislikes_count').get(pk=object_id)
+    like = like_model.objects.select_for_update().filter(
+        user_id=user_id, **like_model.target_lookup(object_id)
+    ).first()
+
+    # The like signals keep the counters in sync
+    if like is None:
+        like_model.objects.create(user_id=user_id, like_type=like_type, **like_model.target_lookup(object_id))
+        new_type = like_type
+    elif like.like_type == like_type:
+        like.delete()
+        new_type = None
+    else:
+        like.like_type = like_type
+        like.save(update_fields=['like_type'])
+        new_type = like_type
+
+    target.refresh_from_db(fields=['likes_count', 'dislikes_count'])
+    return ToggleResult(new_type, target.likes_count, target.dislikes_count)
+
+
+def toggle_like(like_model, user_id, object_id, like_type=BaseLike.LIKE):
+    """
+    Toggle a user's ``like_type`` reaction on an object.
+
+    The reaction is removed if it is the current one, and otherwise replaces
+    the current one. Returns the new reaction (``None`` when removed) and the
+    object's like and dislike counts; raises the liked model's
+    ``DoesNotExist`` when the object is missing.
+    """
+    with transaction.atomic():
+        if connection.vendor in RETURNING_VENDORS and connection.features.can_return_columns_from_insert:
+            return _toggle_returning(like_model, user_id, object_id, like_type)
+        return _toggle_locked(like_model, user_id, object_id, like_type)
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from social_interactions import suggestions
+
+
+class Command(BaseCommand):
+    """
+    Management command to recompute the friends-of-friends follow suggestions.
+    """
+    help = _('Recompute the follow suggestions of every user from the follow graph')
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=None,
+            help=_('Number of worker processes (default: number of CPUs, 1 disables multiprocessing)')
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=suggestions.BATCH_SIZE,
+            help=_('Number of users scored per batch (default: %(default)s)')
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help=_('Only recompute the suggestions of this user ID (can be repeated)')
+        )
+
+    def handle(self, *args, **options):
+        """
+        Handle the command.
+        """
+        users_count, suggestions_count = suggestions.compute_suggestions(
+            user_ids=options['user_ids'],
+            processes=options['processes'],
+            batch_size=options['batch_size'],
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                _('Stored %(suggestions)d suggestions for %(users)d users') % {
+                    'suggestions': suggestions_count,
+                    'users': users_count,
+                }
+            )
+        )
@@ -0,0 +1,82 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from social_interactions.models import LIKE_MODELS, Like
+
+
+class Command(BaseCommand):
+    """
+    Management command to copy the legacy generic likes into the typed like tables.
+    """
+    help = _('Copy legacy likes into the post and comment like tables in batches')
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help=_('Number of legacy likes copied per query (default: 1000)')
+        )
+        parser.add_argument(
+            '--delete-legacy',
+            action='store_true',
+            help=_('Delete the legacy likes once copied')
+        )
+
+    def handle(self, *args, **options):
+        """
+        Handle the command.
+        """
+        batch_size = options['batch_size']
+        copied_count = skipped_count = 0
+
+        for like_model in LIKE_MODELS.values():
+            target_model = like_model.get_target_model()
+            content_type = ContentType.objects.get_for_model(target_model)
+            legacy_likes = Like.objects.filter(content_type=content_type).order_by('id')
+            last_id = 0
+
+            while True:
+                batch = list(legacy_likes.filter(id__gt=last_id).values(
+                    'id', 'user_id', 'object_id', 'like_type', 'created_at'
+                )[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1]['id']
+
+                # Generic relations have no cascade, so likes can point to deleted objects
+                existing_ids = set(target_model.objects.filter(
+                    id__in={row['object_id'] for row in batch}
+                ).values_list('id', flat=True))
+                rows = [row for row in batch if row['object_id'] in existing_ids]
+                skipped_count += len(batch) - len(rows)
+
+                # Rows copied by an earlier run are skipped by the unique constraint;
+                # the counters already include these likes, so no signals are needed
+                like_model.objects.bulk_create([
+                    like_model(
+                        user_id=row['user_id'],
+                        like_type=row['like_type'],
+                        created_at=row['created_at'],
+                        **like_model.target_lookup(row['object_id'])
+                    )
+                    for row in rows
+                ], ignore_conflicts=True)
+                copied_count += len(rows)
+
+                if options['delete_legacy']:
+                    # Nothing listens to legacy like deletes, so this is a single DELETE
+                    legacy_likes.filter(id__in=[row['id'] for row in batch]).delete()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                _('Copied %(copied)d likes (%(skipped)d pointed to deleted objects)') % {
+                    'copied': copied_count,
+                    'skipped': skipped_count,
+                }
+            )
+        )
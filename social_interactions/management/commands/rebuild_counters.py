@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from social_interactions.counters import rebuild_comment_counters, rebuild_post_counters
+
+
+class Command(BaseCommand):
+    """
+    Management command to recompute the denormalized like and comment counters.
+    """
+    help = _('Recompute like, dislike, comment and reply counters of posts and comments')
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument(
+            '--posts-only',
+            action='store_true',
+            help=_('Only recompute post counters')
+        )
+        parser.add_argument(
+            '--comments-only',
+            action='store_true',
+            help=_('Only recompute comment counters')
+        )
+
+    def handle(self, *args, **options):
+        """
+        Handle the command.
+        """
+        if not options['comments_only']:
+            count = rebuild_post_counters()
+            self.stdout.write(
+                self.style.SUCCESS(_('Recomputed counters of %(count)d posts') % {'count': count})
+            )
+
+        if not options['posts_only']:
+            count = rebuild_comment_counters()
+            self.stdout.write(
+                self.style.SUCCESS(_('Recomputed counters of %(count)d comments') % {'count': count})
+            )
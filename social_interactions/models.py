@@ -1,11 +1,14 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 
+from core.models import CounterCacheModel
 
-class Comment(models.Model):
+
+class Comment(CounterCacheModel):
     """
     Comment model for post comments and replies.
     """
@@ -15,6 +18,11 @@ class Comment(models.Model):
     parent_comment = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    likes_count = models.PositiveIntegerField(_('likes count'), default=0)
+    dislikes_count = models.PositiveIntegerField(_('dislikes count'), default=0)
+    replies_count = models.PositiveIntegerField(_('replies count'), default=0)
+
+    counter_fields = ('likes_count', 'dislikes_count', 'replies_count')
 
     class Meta:
         verbose_name = _('comment')
@@ -24,6 +32,7 @@ class Comment(models.Model):
             models.Index(fields=['post']),
             models.Index(fields=['user']),
             models.Index(fields=['parent_comment']),
+            models.Index(fields=['post', 'parent_comment', '-created_at', '-id']),
         ]
 
     def __str__(self):
@@ -45,23 +54,13 @@ class Comment(models.Model):
         """
         Get the number of likes for this comment.
         """
-        content_type = ContentType.objects.get_for_model(self)
-        return Like.objects.filter(content_type=content_type, object_id=self.id).count()
+        return self.likes_count
 
 
-class Like(models.Model):
+class BaseLike(models.Model):
     """
-    Like model for liking posts and comments using generic relations.
+    Fields and behaviour shared by the like models.
     """
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='likes')
-    
-    # Generic relation to support liking different types of content
-    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
-    object_id = models.PositiveIntegerField()
-    content_object = GenericForeignKey('content_type', 'object_id')
-    
-    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
-    
     # Like type choices
     LIKE = 'like'
     DISLIKE = 'dislike'
@@ -75,10 +74,138 @@ class Like(models.Model):
         choices=LIKE_TYPE_CHOICES,
         default=LIKE,
     )
+    # Not auto_now_add, so likes copied by copy_likes keep their date
+    created_at = models.DateTimeField(_('created at'), default=timezone.now)
+
+    # Name of the foreign key to the liked object, set by subclasses
+    target_field = None
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.get_like_type_display()} by {self.user.username} on {getattr(self, self.target_field)}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the stored like type so counters can follow type changes.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_like_type = instance.__dict__.get('like_type')
+        return instance
+
+    @classmethod
+    def get_target_model(cls):
+        """
+        Get the model of the liked objects.
+        """
+        return cls._meta.get_field(cls.target_field).related_model
+
+    @classmethod
+    def target_lookup(cls, object_id):
+        """
+        Get the filter keyword arguments that select the likes of an object.
+        """
+        return {f'{cls.target_field}_id': object_id}
+
+    @property
+    def object_id(self):
+        return getattr(self, f'{self.target_field}_id')
+
+
+class PostLike(BaseLike):
+    """
+    Like or dislike of a post.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='post_likes')
+    post = models.ForeignKey('posts.Post', on_delete=models.CASCADE, related_name='likes')
+
+    target_field = 'post'
+
+    class Meta:
+        verbose_name = _('post like')
+        verbose_name_plural = _('post likes')
+        constraints = [
+            # Ensure a user can only like/dislike a post once
+            models.UniqueConstraint(fields=['post', 'user'], name='unique_post_like'),
+        ]
+        indexes = [
+            # Covers the "which of these posts did the user like" lookup
+            models.Index(fields=['user', 'like_type', 'post']),
+            # Covers counter rebuilds
+            models.Index(fields=['post', 'like_type']),
+            # Trending reads the likes made since its last run
+            models.Index(fields=['created_at']),
+        ]
+
+
+class CommentLike(BaseLike):
+    """
+    Like or dislike of a comment.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='comment_likes')
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name='likes')
+
+    target_field = 'comment'
+
+    class Meta:
+        verbose_name = _('comment like')
+        verbose_name_plural = _('comment likes')
+        constraints = [
+            # Ensure a user can only like/dislike a comment once
+            models.UniqueConstraint(fields=['comment', 'user'], name='unique_comment_like'),
+        ]
+        indexes = [
+            # Covers the "which of these comments did the user like" lookup
+            models.Index(fields=['user', 'like_type', 'comment']),
+            # Covers counter rebuilds
+            models.Index(fields=['comment', 'like_type']),
+        ]
+
+
+# Like models by the content type names accepted by the API
+LIKE_MODELS = {
+    'post': PostLike,
+    'comment': CommentLike,
+}
+
+
+def get_like_model(model):
+    """
+    Get the like model of a likeable model.
+    """
+    for like_model in LIKE_MODELS.values():
+        if like_model.get_target_model() is model:
+            return like_model
+    raise LookupError(model)
+
+
+class Like(models.Model):
+    """
+    Legacy like of any object through a generic relation.
+
+    Superseded by ``PostLike`` and ``CommentLike``; kept only until
+    ``copy_likes`` has moved the existing rows.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='likes')
+    
+    # Generic relation to support liking different types of content
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    like_type = models.CharField(
+        _('like type'),
+        max_length=10,
+        choices=BaseLike.LIKE_TYPE_CHOICES,
+        default=BaseLike.LIKE,
+    )
 
     class Meta:
-        verbose_name = _('like')
-        verbose_name_plural = _('likes')
+        verbose_name = _('legacy like')
+        verbose_name_plural = _('legacy likes')
         # Ensure a user can only like/dislike an object once
         unique_together = ('user', 'content_type', 'object_id')
         indexes = [
@@ -114,7 +241,43 @@ class Follow(models.Model):
         indexes = [
             models.Index(fields=['follower']),
             models.Index(fields=['following']),
+            models.Index(fields=['follower', '-created_at', '-id']),
+            models.Index(fields=['following', '-created_at', '-id']),
+        ]
+
+    def __str__(self):
+        return f"{self.follower.username} follows {self.following.username}" 
+
+
+class SuggestedUser(models.Model):
+    """
+    Precomputed follow suggestion, kept as a bounded top-K list per user.
+
+    Rows are replaced in bulk by the ``compute_suggestions`` command.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='suggestions'
+    )
+    suggested = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='suggested_to'
+    )
+    rank = models.PositiveSmallIntegerField(_('rank'))
+    score = models.FloatField(_('score'))
+    mutual_count = models.PositiveIntegerField(_('followed by people you follow'), default=0)
+    follows_you = models.BooleanField(_('follows you'), default=False)
+    computed_at = models.DateTimeField(_('computed at'))
+
+    class Meta:
+        verbose_name = _('suggested user')
+        verbose_name_plural = _('suggested users')
+        unique_together = ('user', 'suggested')
+        indexes = [
+            models.Index(fields=['user', 'rank']),
         ]
 
     def __str__(self):
-        return f"{self.follower.username} follows {self.following.username}" 
\ No newline at end of file
+        return f"Suggest user {self.suggested_id} to user {self.user_id} (#{self.rank})"
@@ -1,10 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import gettext_lazy as _
 
-from .models import Comment, Like, Follow
-from posts.models import Post
+from .follows import get_bulk_max
+from .models import LIKE_MODELS, BaseLike, Comment, CommentLike, Follow, SuggestedUser
+from .threads import get_replies_next_link, load_threads
 
 User = get_user_model()
 
@@ -15,16 +15,20 @@ class CommentSerializer(serializers.ModelSerializer):
     """
     user = serializers.SerializerMethodField()
     replies = serializers.SerializerMethodField()
-    likes_count = serializers.SerializerMethodField()
+    replies_next = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     
     class Meta:
         model = Comment
         fields = [
             'id', 'user', 'post', 'description', 'parent_comment',
-            'created_at', 'updated_at', 'replies', 'likes_count', 'is_liked'
+            'created_at', 'updated_at', 'replies', 'replies_count', 'replies_next',
+            'likes_count', 'dislikes_count', 'is_liked'
+        ]
+        read_only_fields = [
+            'id', 'user', 'created_at', 'updated_at', 'replies', 'replies_count', 'replies_next',
+            'likes_count', 'dislikes_count', 'is_liked'
         ]
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at', 'replies', 'likes_count', 'is_liked']
     
     def get_user(self, obj):
         """
@@ -38,32 +42,37 @@ class CommentSerializer(serializers.ModelSerializer):
     
     def get_replies(self, obj):
         """
-        Get the replies to this comment.
+        Get the first replies to this comment.
         """
         # Only get replies for top-level comments
-        if obj.parent_comment is None:
-            replies = obj.replies.all()
-            return CommentSerializer(replies, many=True, context=self.context).data
-        return []
+        if obj.parent_comment_id is not None:
+            return []
+        # List views load the previews of a whole page at once
+        if not hasattr(obj, 'preview_replies'):
+            load_threads([obj])
+        return CommentSerializer(obj.preview_replies, many=True, context=self.context).data
     
-    def get_likes_count(self, obj):
+    def get_replies_next(self, obj):
         """
-        Get the number of likes for this comment.
+        Get the URL of the replies that follow the ones included in ``replies``.
         """
-        return obj.get_likes_count()
+        return get_replies_next_link(obj, self.context.get('request'))
     
     def get_is_liked(self, obj):
         """
         Check if the current user has liked this comment.
         """
+        # List views resolve the likes of a whole page, replies included, at once
+        liked_comment_ids = self.context.get('liked_comment_ids')
+        if liked_comment_ids is not None:
+            return obj.id in liked_comment_ids
+        
         user = self.context.get('request').user
         if user.is_authenticated:
-            content_type = ContentType.objects.get_for_model(Comment)
-            return Like.objects.filter(
+            return CommentLike.objects.filter(
                 user=user,
-                content_type=content_type,
-                object_id=obj.id,
-                like_type=Like.LIKE
+                comment_id=obj.id,
+                like_type=CommentLike.LIKE
             ).exists()
         return False
     
@@ -76,17 +85,15 @@ class CommentSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(serializers.Serializer):
     """
-    Serializer for the Like model.
+    Serializer for a like of a post or a comment.
     """
+    id = serializers.IntegerField(read_only=True)
     content_type_str = serializers.CharField(write_only=True)
     object_id = serializers.IntegerField()
-    
-    class Meta:
-        model = Like
-        fields = ['id', 'content_type_str', 'object_id', 'like_type', 'created_at']
-        read_only_fields = ['id', 'created_at']
+    like_type = serializers.ChoiceField(choices=BaseLike.LIKE_TYPE_CHOICES, default=BaseLike.LIKE)
+    created_at = serializers.DateTimeField(read_only=True)
     
     def validate(self, attrs):
         """
@@ -95,26 +102,17 @@ class LikeSerializer(serializers.ModelSerializer):
         content_type_str = attrs.pop('content_type_str')
         object_id = attrs.get('object_id')
         
-        # Map content type string to model
-        content_type_map = {
-            'post': Post,
-            'comment': Comment
-        }
-        
-        if content_type_str not in content_type_map:
+        if content_type_str not in LIKE_MODELS:
             raise serializers.ValidationError(_("Invalid content type."))
         
-        model = content_type_map[content_type_str]
-        content_type = ContentType.objects.get_for_model(model)
+        like_model = LIKE_MODELS[content_type_str]
         
         # Check if the object exists
-        try:
-            model.objects.get(id=object_id)
-        except model.DoesNotExist:
+        if not like_model.get_target_model().objects.filter(id=object_id).exists():
             raise serializers.ValidationError(_("Object does not exist."))
         
-        # Add content_type to validated data
-        attrs['content_type'] = content_type
+        # Add the like model to validated data
+        attrs['like_model'] = like_model
         
         return attrs
     
@@ -123,15 +121,14 @@ class LikeSerializer(serializers.ModelSerializer):
         Create or update a like with the validated data.
         """
         user = self.context.get('request').user
-        content_type = validated_data.get('content_type')
+        like_model = validated_data.get('like_model')
         object_id = validated_data.get('object_id')
         like_type = validated_data.get('like_type')
         
         # Check if the user has already liked/disliked this object
-        like, created = Like.objects.update_or_create(
+        like, created = like_model.objects.update_or_create(
             user=user,
-            content_type=content_type,
-            object_id=object_id,
+            **like_model.target_lookup(object_id),
             defaults={'like_type': like_type}
         )
         
@@ -180,4 +177,45 @@ class FollowSerializer(serializers.ModelSerializer):
             following=following
         )
         
-        return follow 
\ No newline at end of file
+        return follow 
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    """
+    Serializer for the users of a bulk follow or unfollow.
+    """
+    user_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+    def validate_user_ids(self, value):
+        """
+        Validate that no more users than allowed are given.
+        """
+        if len(set(value)) > get_bulk_max():
+            raise serializers.ValidationError(
+                _("At most %(max)d users can be given at once.") % {'max': get_bulk_max()}
+            )
+        return value
+
+
+class SuggestedUserSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a follow suggestion.
+    """
+    user = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SuggestedUser
+        fields = ['user', 'score', 'mutual_count', 'follows_you']
+        read_only_fields = fields
+
+    def get_user(self, obj):
+        """
+        Get the suggested user.
+        """
+        return {
+            'id': obj.suggested.id,
+            'username': obj.suggested.username,
+            'first_name': obj.suggested.first_name,
+            'last_name': obj.suggested.last_name,
+            'profile_picture': obj.suggested.profile_picture.url if obj.suggested.profile_picture else None
+        }
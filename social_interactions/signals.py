@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .counters import adjust_comment_counters, adjust_like_counter
+from .graph import follow_graph
+from .models import Comment, CommentLike, Follow, PostLike
+
+# Sent with ``follower_id`` and ``following_ids`` after follows are created or
+# deleted in bulk (no post_save/post_delete is sent for those rows)
+follows_created = Signal()
+follows_deleted = Signal()
+
+
+def is_bulk_unfollow(origin):
+    """
+    Check whether a follow deletion comes from ``unfollow_users``.
+
+    Its ``follows_deleted`` signal covers the whole batch, so the per-row
+    ``post_delete`` receivers skip these rows; ``origin`` is the argument
+    Django sends with ``post_delete``.
+    """
+    return getattr(origin, 'sends_follows_deleted', False)
+
+
+@receiver(post_save, sender=PostLike)
+@receiver(post_save, sender=CommentLike)
+def update_counters_on_like_save(sender, instance, created, **kwargs):
+    """
+    Keep the like counters of the liked object in sync with a saved like.
+    """
+    previous_type = getattr(instance, '_loaded_like_type', None)
+    if created:
+        adjust_like_counter(sender, instance.object_id, instance.like_type, 1)
+    elif previous_type is not None and previous_type != instance.like_type:
+        # A like switched to a dislike or the other way around
+        adjust_like_counter(sender, instance.object_id, previous_type, -1)
+        adjust_like_counter(sender, instance.object_id, instance.like_type, 1)
+    instance._loaded_like_type = instance.like_type
+
+
+@receiver(post_delete, sender=PostLike)
+@receiver(post_delete, sender=CommentLike)
+def update_counters_on_like_delete(sender, instance, **kwargs):
+    """
+    Decrement the like counters of the object a deleted like pointed to.
+    """
+    like_type = getattr(instance, '_loaded_like_type', None) or instance.like_type
+    adjust_like_counter(sender, instance.object_id, like_type, -1)
+
+
+@receiver(post_save, sender=Comment)
+def update_counters_on_comment_save(sender, instance, created, **kwargs):
+    """
+    Increment the comment and reply counters for a new comment.
+    """
+    if created:
+        adjust_comment_counters(instance, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def update_counters_on_comment_delete(sender, instance, **kwargs):
+    """
+    Decrement the comment and reply counters for a deleted comment.
+    """
+    adjust_comment_counters(instance, -1)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_graph(sender, instance, origin=None, **kwargs):
+    """
+    Make every worker reload the follow data of both users once the change is committed.
+    """
+    if is_bulk_unfollow(origin):
+        return
+    transaction.on_commit(lambda: follow_graph.invalidate(instance.follower_id, instance.following_id))
+
+
+@receiver(follows_created)
+@receiver(follows_deleted)
+def invalidate_follow_graph_in_bulk(sender, follower_id, following_ids, **kwargs):
+    """
+    Make every worker reload the follow data of the users of a bulk change.
+    """
+    transaction.on_commit(lambda: follow_graph.invalidate(follower_id, *following_ids))
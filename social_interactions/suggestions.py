@@ -0,0 +1,196 @@
+"""
+Friends-of-friends follow suggestions.
+
+``compute_suggestions`` loads the follow graph once, then scores the
+second-degree neighbourhood of every user in parallel batches on a pool of
+forked worker processes (in this process where ``fork`` is unavailable):
+
+* every account a user follows contributes ``1 / log2(2 + n)`` to each
+  account it follows, ``n`` being how many accounts it follows, so mutual
+  connections through selective users count more than through prolific ones;
+* accounts that already follow the user get ``SUGGESTIONS_FOLLOWS_YOU_WEIGHT``
+  on top, since a follow back is the most likely follow;
+* the user, the accounts they already follow and inactive accounts are
+  excluded.
+
+The best ``SUGGESTIONS_PER_USER`` candidates of each user are stored as
+``SuggestedUser`` rows and served with one indexed read.
+"""
+import heapq
+import math
+import multiprocessing
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .graph import follow_graph
+from .models import Follow, SuggestedUser
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+
+# Follow graph of a worker process, set by ``init_worker``
+_graph = None
+
+
+def get_suggestions_per_user():
+    return getattr(settings, 'SUGGESTIONS_PER_USER', 20)
+
+
+def get_follows_you_weight():
+    return getattr(settings, 'SUGGESTIONS_FOLLOWS_YOU_WEIGHT', 2.0)
+
+
+class FollowGraphSnapshot:
+    """
+    Adjacency sets of the whole follow graph, in both directions.
+    """
+
+    def __init__(self, following, followers, active_ids):
+        self.following = following
+        self.followers = followers
+        self.active_ids = active_ids
+
+    @classmethod
+    def load(cls):
+        """
+        Read every follow edge and the IDs of active users.
+        """
+        following = defaultdict(set)
+        followers = defaultdict(set)
+        edges = Follow.objects.values_list('follower_id', 'following_id').order_by()
+        for follower_id, following_id in edges.iterator(chunk_size=10000):
+            following[follower_id].add(following_id)
+            followers[following_id].add(follower_id)
+
+        active_ids = frozenset(
+            User.objects.filter(is_active=True, is_deleted=False).values_list('id', flat=True)
+        )
+        return cls(
+            {user_id: frozenset(ids) for user_id, ids in following.items()},
+            {user_id: frozenset(ids) for user_id, ids in followers.items()},
+            active_ids,
+        )
+
+    def score_user(self, user_id, limit, follows_you_weight):
+        """
+        Get the top ``(suggested_id, score, mutual_count, follows_you)`` candidates of a user.
+        """
+        followed = self.following.get(user_id, frozenset())
+        user_followers = self.followers.get(user_id, frozenset())
+        scores = defaultdict(float)
+        mutual_counts = defaultdict(int)
+
+        for friend_id in followed:
+            friend_following = self.following.get(friend_id)
+            if not friend_following:
+                continue
+            weight = 1 / math.log2(2 + len(friend_following))
+            for candidate_id in friend_following:
+                scores[candidate_id] += weight
+                mutual_counts[candidate_id] += 1
+
+        for candidate_id in user_followers:
+            scores[candidate_id] += follows_you_weight
+
+        candidates = (
+            candidate_id for candidate_id in scores
+            if candidate_id != user_id and candidate_id not in followed and candidate_id in self.active_ids
+        )
+        top = heapq.nlargest(limit, candidates, key=lambda candidate_id: (scores[candidate_id], -candidate_id))
+        return [
+            (candidate_id, scores[candidate_id], mutual_counts[candidate_id], candidate_id in user_followers)
+            for candidate_id in top
+        ]
+
+
+def init_worker(graph, limit, follows_you_weight):
+    """
+    Keep the graph snapshot and scoring parameters in a worker process.
+    """
+    global _graph
+    _graph = (graph, limit, follows_you_weight)
+
+
+def score_batch(user_ids):
+    """
+    Score a batch of users in a worker process.
+    """
+    graph, limit, follows_you_weight = _graph
+    return [(user_id, graph.score_user(user_id, limit, follows_you_weight)) for user_id in user_ids]
+
+
+def store_suggestions(results, computed_at):
+    """
+    Replace the stored suggestions of the users of a scored batch.
+    """
+    rows = [
+        SuggestedUser(
+            user_id=user_id,
+            suggested_id=suggested_id,
+            rank=rank,
+            score=score,
+            mutual_count=mutual_count,
+            follows_you=follows_you,
+            computed_at=computed_at,
+        )
+        for user_id, candidates in results
+        for rank, (suggested_id, score, mutual_count, follows_you) in enumerate(candidates, start=1)
+    ]
+    with transaction.atomic():
+        SuggestedUser.objects.filter(user_id__in=[user_id for user_id, candidates in results]).delete()
+        SuggestedUser.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def compute_suggestions(user_ids=None, processes=None, batch_size=BATCH_SIZE):
+    """
+    Recompute the suggestions of the given users (all active users by default).
+
+    Returns the number of users and of stored suggestions.
+    """
+    graph = FollowGraphSnapshot.load()
+    if user_ids is None:
+        user_ids = sorted(graph.active_ids)
+    else:
+        user_ids = [user_id for user_id in user_ids if user_id in graph.active_ids]
+    batches = [user_ids[start:start + batch_size] for start in range(0, len(user_ids), batch_size)]
+
+    computed_at = timezone.now()
+    init_args = (graph, get_suggestions_per_user(), get_follows_you_weight())
+    stored_count = 0
+
+    # Workers are forked so they inherit the loaded apps; spawned ones would
+    # import this module before Django is set up
+    can_fork = 'fork' in multiprocessing.get_all_start_methods()
+    if processes == 1 or len(batches) <= 1 or not can_fork:
+        init_worker(*init_args)
+        for batch in batches:
+            stored_count += store_suggestions(score_batch(batch), computed_at)
+    else:
+        # Forked children must not reuse the parent's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(processes, initializer=init_worker, initargs=init_args) as pool:
+            for results in pool.imap_unordered(score_batch, batches):
+                stored_count += store_suggestions(results, computed_at)
+
+    return len(user_ids), stored_count
+
+
+def get_suggested_users(user, limit=10):
+    """
+    Get the stored suggestions of a user, best first, skipping users followed since.
+    """
+    suggestions = SuggestedUser.objects.filter(
+        user=user, suggested__is_active=True, suggested__is_deleted=False
+    ).select_related('suggested').order_by('rank')
+    following_ids = set(follow_graph.get_following_ids(user.id))
+    return [
+        suggestion for suggestion in suggestions[:limit * 2]
+        if suggestion.suggested_id not in following_ids
+    ][:limit]
@@ -0,0 +1,42 @@
+from django.test import TestCase, override_settings
+
+from accounts.models import User
+from posts.models import Post
+
+from .like_buffer import LikeBuffer
+from .models import PostLike
+
+
+@override_settings(LIKE_WRITE_BEHIND=True, LIKE_FLUSH_INTERVAL=3600)
+class LikeBufferTests(TestCase):
+    """
+    Tests of the write-behind like buffer.
+    """
+
+    def setUp(self):
+        self.buffer = LikeBuffer()
+        self.user = User.objects.create_user(username='liker', email='liker@example.com', password='password')
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='password')
+
+    def tearDown(self):
+        self.buffer._stop.set()
+
+    def test_flush_drops_likes_of_deleted_posts(self):
+        """
+        A post deleted before the flush does not block the likes of other posts.
+        """
+        deleted_post = Post.objects.create(user=self.author, description='deleted')
+        post = Post.objects.create(user=self.author, description='kept')
+        self.buffer.toggle(self.user.id, PostLike, deleted_post.id)
+        self.buffer.toggle(self.user.id, PostLike, post.id)
+        deleted_post_id = deleted_post.id
+        deleted_post.delete()
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertTrue(PostLike.objects.filter(user=self.user, post=post).exists())
+        self.assertEqual(self.buffer.get_pending_counts(PostLike, deleted_post_id), (0, 0))
+        post.refresh_from_db()
+        self.assertEqual(post.likes_count, 1)
+
+        # Nothing was put back, so the next flush has nothing to write
+        self.assertEqual(self.buffer.flush(), 0)
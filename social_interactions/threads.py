@@ -0,0 +1,83 @@
+"""
+Comment thread loading.
+
+A page of top-level comments is shown with only the first replies of each
+thread. ``load_threads`` fetches those replies for the whole page with one
+window query and attaches them as ``preview_replies``. The remaining
+replies are paged through the replies endpoint with ``ReplyPagination``,
+starting from the cursor after the last preview reply.
+"""
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.urls import reverse
+
+from core.pagination import KeysetPagination
+
+from .models import Comment
+
+
+class ReplyPagination(KeysetPagination):
+    """
+    Cursor pagination of the replies of a comment, oldest first.
+    """
+    descending = False
+
+
+def get_reply_preview_limit():
+    """
+    Get the number of replies shown with each top-level comment.
+    """
+    return getattr(settings, 'COMMENT_REPLIES_PREVIEW', 3)
+
+
+def load_threads(comments, limit=None):
+    """
+    Attach the first ``limit`` replies of each top-level comment as ``preview_replies``.
+
+    The replies of the whole page are read in a single query.
+    """
+    limit = get_reply_preview_limit() if limit is None else limit
+    comments = list(comments)
+    parents = {comment.id: comment for comment in comments if comment.parent_comment_id is None}
+    for comment in parents.values():
+        comment.preview_replies = []
+    if not parents or limit <= 0:
+        return comments
+
+    replies = Comment.objects.filter(parent_comment_id__in=list(parents)).annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F('parent_comment_id')],
+            order_by=[F('created_at').asc(), F('id').asc()],
+        )
+    ).filter(position__lte=limit).select_related('user').order_by('parent_comment_id', 'created_at', 'id')
+
+    for reply in replies:
+        parents[reply.parent_comment_id].preview_replies.append(reply)
+    return comments
+
+
+def get_thread_comment_ids(comments):
+    """
+    Get the IDs of the given comments and of their loaded preview replies.
+    """
+    ids = []
+    for comment in comments:
+        ids.append(comment.id)
+        ids.extend(reply.id for reply in getattr(comment, 'preview_replies', ()))
+    return ids
+
+
+def get_replies_next_link(comment, request=None):
+    """
+    Get the URL of the replies that follow the preview of a thread, if any.
+    """
+    replies = getattr(comment, 'preview_replies', None)
+    if not replies or comment.replies_count <= len(replies):
+        return None
+
+    pagination = ReplyPagination()
+    url = reverse('social_interactions:comment-replies', kwargs={'comment_id': comment.id})
+    pagination.base_url = request.build_absolute_uri(url) if request is not None else url
+    return pagination.encode_cursor(replies[-1])
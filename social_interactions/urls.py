@@ -1,9 +1,9 @@
 from django.urls import path
 
 from .views import (
-    CommentCreateView, CommentListView, CommentDetailView, ReplyCreateView,
+    CommentCreateView, CommentListView, CommentDetailView, CommentRepliesView, ReplyCreateView,
     LikeCreateView, LikeDeleteView, FollowCreateView, FollowDeleteView,
-    FollowersListView, FollowingListView
+    BulkFollowView, BulkUnfollowView, RelationshipsView, FollowersListView, FollowingListView, SuggestedUsersView
 )
 
 app_name = 'social_interactions'
@@ -13,6 +13,7 @@ urlpatterns = [
     path('comments/', CommentCreateView.as_view(), name='comment-create'),
     path('posts/<int:post_id>/comments/', CommentListView.as_view(), name='comment-list'),
     path('comments/<int:pk>/', CommentDetailView.as_view(), name='comment-detail'),
+    path('comments/<int:comment_id>/replies/', CommentRepliesView.as_view(), name='comment-replies'),
     path('comments/<int:comment_id>/reply/', ReplyCreateView.as_view(), name='reply-create'),
     
     # Likes
@@ -22,6 +23,10 @@ urlpatterns = [
     # Follows
     path('follows/', FollowCreateView.as_view(), name='follow-create'),
     path('follows/<int:user_id>/', FollowDeleteView.as_view(), name='follow-delete'),
+    path('follows/bulk/', BulkFollowView.as_view(), name='follow-bulk'),
+    path('follows/bulk/unfollow/', BulkUnfollowView.as_view(), name='unfollow-bulk'),
+    path('relationships/', RelationshipsView.as_view(), name='relationships'),
     path('users/<int:user_id>/followers/', FollowersListView.as_view(), name='followers-list'),
     path('users/<int:user_id>/following/', FollowingListView.as_view(), name='following-list'),
+    path('users/suggested/', SuggestedUsersView.as_view(), name='suggested-users'),
 ] 
\ No newline at end of file
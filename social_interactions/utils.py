@@ -0,0 +1,33 @@
+from .like_buffer import like_buffer
+from .models import BaseLike, get_like_model
+
+
+def get_liked_object_ids(user, model, object_ids, like_type=BaseLike.LIKE):
+    """
+    Get the IDs of the objects of a model that the user has liked.
+
+    ``object_ids`` can be a list or a values queryset; either way the lookup
+    is a single query.
+    """
+    if user is None or not user.is_authenticated:
+        return set()
+
+    like_model = get_like_model(model)
+    target_id_field = f'{like_model.target_field}_id'
+    liked_ids = set(
+        like_model.objects.filter(
+            user=user,
+            like_type=like_type,
+            **{f'{target_id_field}__in': object_ids}
+        ).values_list(target_id_field, flat=True)
+    )
+
+    if like_buffer.is_enabled():
+        # Show the user's own toggles that are not flushed yet
+        for object_id, pending_type in like_buffer.get_pending_states(user.id, like_model).items():
+            if pending_type == like_type:
+                liked_ids.add(object_id)
+            else:
+                liked_ids.discard(object_id)
+    return liked_ids
+
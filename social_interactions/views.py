@@ -4,8 +4,16 @@ from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
 
-from .models import Comment, Like, Follow
-from .serializers import CommentSerializer, LikeSerializer, FollowSerializer
+from core.pagination import KeysetPagination
+
+from .follows import follow_users, get_bulk_max, get_relationships, unfollow_users
+from .mixins import CommentThreadsMixin
+from .models import LIKE_MODELS, Comment, Follow
+from .serializers import (
+    CommentSerializer, LikeSerializer, FollowSerializer, BulkFollowSerializer, SuggestedUserSerializer
+)
+from .suggestions import get_suggested_users
+from .threads import ReplyPagination
 
 
 class CommentCreateView(generics.CreateAPIView):
@@ -22,11 +30,12 @@ class CommentCreateView(generics.CreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class CommentListView(generics.ListAPIView):
+class CommentListView(CommentThreadsMixin, generics.ListAPIView):
     """
     API view for listing comments for a post.
     """
     serializer_class = CommentSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
@@ -35,7 +44,23 @@ class CommentListView(generics.ListAPIView):
         """
         post_id = self.kwargs.get('post_id')
         # Only get top-level comments (not replies)
-        return Comment.objects.filter(post_id=post_id, parent_comment=None)
+        return Comment.objects.filter(post_id=post_id, parent_comment=None).select_related('user')
+
+
+class CommentRepliesView(CommentThreadsMixin, generics.ListAPIView):
+    """
+    API view for paging through the replies to a comment, oldest first.
+    """
+    serializer_class = CommentSerializer
+    pagination_class = ReplyPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """
+        Get the queryset of replies to a specific comment.
+        """
+        comment_id = self.kwargs.get('comment_id')
+        return Comment.objects.filter(parent_comment_id=comment_id).select_related('user')
 
 
 class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -100,29 +125,18 @@ class LikeDeleteView(APIView):
         """
         Delete a like.
         """
-        # Map content type string to model
-        from django.contrib.contenttypes.models import ContentType
-        from posts.models import Post
-        
-        content_type_map = {
-            'post': Post,
-            'comment': Comment
-        }
-        
-        if content_type_str not in content_type_map:
+        if content_type_str not in LIKE_MODELS:
             return Response(
                 {'error': _('Invalid content type.')},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        model = content_type_map[content_type_str]
-        content_type = ContentType.objects.get_for_model(model)
+        like_model = LIKE_MODELS[content_type_str]
         
         # Delete the like
-        like = Like.objects.filter(
+        like = like_model.objects.filter(
             user=request.user,
-            content_type=content_type,
-            object_id=object_id
+            **like_model.target_lookup(object_id)
         ).first()
         
         if like:
@@ -175,11 +189,74 @@ class FollowDeleteView(APIView):
         )
 
 
+class BulkFollowView(APIView):
+    """
+    API view for following many users at once.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        """
+        Follow the given users in one transaction.
+        """
+        serializer = BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        followed_ids = follow_users(request.user, serializer.validated_data['user_ids'])
+        return Response({'followed': followed_ids}, status=status.HTTP_200_OK)
+
+
+class BulkUnfollowView(APIView):
+    """
+    API view for unfollowing many users at once.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        """
+        Unfollow the given users in one transaction.
+        """
+        serializer = BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        unfollowed_ids = unfollow_users(request.user, serializer.validated_data['user_ids'])
+        return Response({'unfollowed': unfollowed_ids}, status=status.HTTP_200_OK)
+
+
+class RelationshipsView(APIView):
+    """
+    API view for the follow status between the current user and a list of users.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """
+        Get the relationships with the users given as ``?ids=1,2,3``.
+        """
+        try:
+            user_ids = {int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()}
+        except ValueError:
+            return Response(
+                {'error': _('ids must be a comma-separated list of user IDs.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(user_ids) > get_bulk_max():
+            return Response(
+                {'error': _('At most %(max)d users can be given at once.') % {'max': get_bulk_max()}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        relationships = get_relationships(request.user, user_ids)
+        return Response([
+            {'user_id': user_id, **relationship}
+            for user_id, relationship in sorted(relationships.items())
+        ])
+
+
 class FollowersListView(generics.ListAPIView):
     """
     API view for listing a user's followers.
     """
     serializer_class = FollowSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
@@ -195,6 +272,7 @@ class FollowingListView(generics.ListAPIView):
     API view for listing users a user is following.
     """
     serializer_class = FollowSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
@@ -202,4 +280,23 @@ class FollowingListView(generics.ListAPIView):
         Get the queryset of users a specific user is following.
         """
         user_id = self.kwargs.get('user_id')
-        return Follow.objects.filter(follower_id=user_id) 
\ No newline at end of file
+        return Follow.objects.filter(follower_id=user_id)
+
+
+class SuggestedUsersView(generics.ListAPIView):
+    """
+    API view for listing the follow suggestions of the current user.
+    """
+    serializer_class = SuggestedUserSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        """
+        Get the precomputed suggestions of the current user, best first.
+        """
+        try:
+            limit = max(1, min(int(self.request.query_params.get('limit', 10)), 50))
+        except ValueError:
+            limit = 10
+        return get_suggested_users(self.request.user, limit)
@@ -2,6 +2,8 @@
 ASGI config for src project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Served this way, async views such as ``accounts.views.AsyncLoginView`` run
+on the event loop and await password hashes instead of holding a worker.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
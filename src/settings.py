@@ -54,6 +54,7 @@ INSTALLED_APPS = [
     'posts',
     'social_interactions',
     'core',
+    'search',
 ]
 
 MIDDLEWARE = [
@@ -141,7 +142,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -155,6 +156,89 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache: set CACHE_URL to a shared backend (e.g. redis:// or pymemcache://) in
+# production so invalidations reach every worker process
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Home timeline settings
+# Number of post IDs kept in each user's materialized timeline
+TIMELINE_MAX_LENGTH = env.int('TIMELINE_MAX_LENGTH', default=800)
+# Posts by users with more followers than this are merged into feeds at read time
+TIMELINE_FANOUT_FOLLOWER_LIMIT = env.int('TIMELINE_FANOUT_FOLLOWER_LIMIT', default=10000)
+
+# Follow graph cache settings
+# Users whose follow data each worker keeps in memory
+FOLLOW_GRAPH_CACHE_SIZE = env.int('FOLLOW_GRAPH_CACHE_SIZE', default=10000)
+# Seconds after which a worker reloads an entry even without an invalidation
+# (only matters when CACHES is not shared between workers)
+FOLLOW_GRAPH_LOCAL_TTL = 60
+# Largest number of users in a bulk follow, unfollow or relationship lookup
+FOLLOW_BULK_MAX = env.int('FOLLOW_BULK_MAX', default=100)
+
+# Follow suggestions settings
+# Number of suggestions stored per user by compute_suggestions
+SUGGESTIONS_PER_USER = 20
+# Score added to accounts that already follow the user
+SUGGESTIONS_FOLLOWS_YOU_WEIGHT = 2.0
+
+# Like settings
+# Buffer like toggles in each process and write them in bulk in the background
+LIKE_WRITE_BEHIND = env.bool('LIKE_WRITE_BEHIND', default=False)
+# Seconds between two writes of the like buffer
+LIKE_FLUSH_INTERVAL = 0.3
+# Likes written per transaction by a flush
+LIKE_FLUSH_BATCH_SIZE = 500
+
+# Trending settings
+# Hours after which the weight of a like or comment is halved
+TRENDING_HALF_LIFE_HOURS = env.float('TRENDING_HALF_LIFE_HOURS', default=24)
+TRENDING_LIKE_WEIGHT = 1.0
+TRENDING_COMMENT_WEIGHT = 2.0
+# Posts whose decayed score drops below this are removed from the trending table
+TRENDING_MIN_SCORE = 0.05
+
+# Search settings
+# 'auto' uses PostgreSQL full-text search or SQLite FTS5 when available and
+# the portable inverted index (search.backends.InvertedIndexBackend) otherwise
+SEARCH_BACKEND = env('SEARCH_BACKEND', default='auto')
+# Seconds after which each process rebuilds its autocomplete prefix index
+AUTOCOMPLETE_REBUILD_SECONDS = 300
+
+# Comment settings
+# Number of replies embedded with each top-level comment (the rest are paged)
+COMMENT_REPLIES_PREVIEW = 3
+# Number of top-level comments embedded in the post detail response
+POST_DETAIL_COMMENTS = 20
+
+# Media settings
+# Worker threads per process that generate media renditions in the background
+MEDIA_PIPELINE_WORKERS = env.int('MEDIA_PIPELINE_WORKERS', default=2)
+# Storage of post media; files are stored once under the SHA-256 of their content
+MEDIA_FILE_STORAGE = 'core.storage.ContentAddressedFileSystemStorage'
+# Target widths in pixels of the generated image renditions
+MEDIA_THUMBNAIL_WIDTH = 320
+MEDIA_FEED_WIDTH = 1080
+# Resumable uploads: part files are kept here until finalized (must be shared
+# between web workers when they run on several hosts)
+MEDIA_UPLOAD_TEMP_DIR = env('MEDIA_UPLOAD_TEMP_DIR', default=str(BASE_DIR / 'upload_sessions'))
+# Largest chunk accepted by a single PUT request
+MEDIA_UPLOAD_CHUNK_SIZE = env.int('MEDIA_UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024)
+# Largest file accepted through a resumable upload
+MEDIA_UPLOAD_MAX_SIZE = env.int('MEDIA_UPLOAD_MAX_SIZE', default=1024 * 1024 * 1024)
+# Number of unfinished uploads a user may have open at the same time
+MEDIA_UPLOAD_MAX_ACTIVE_SESSIONS = env.int('MEDIA_UPLOAD_MAX_ACTIVE_SESSIONS', default=3)
+# Hours of inactivity after which an unfinished upload expires
+MEDIA_UPLOAD_SESSION_TTL_HOURS = 24
+# Hand media responses to the proxy: None, 'x-sendfile' (Apache, lighttpd) or
+# 'x-accel-redirect' (nginx, with an internal location at MEDIA_ACCEL_REDIRECT_PREFIX
+# aliased to MEDIA_ROOT)
+MEDIA_SERVE_ACCEL = env('MEDIA_SERVE_ACCEL', default=None)
+MEDIA_ACCEL_REDIRECT_PREFIX = env('MEDIA_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+# Browser cache lifetime in seconds of media that are not content-addressed
+MEDIA_CACHE_MAX_AGE = 3600
+
 # Additional logging for debugging
 logging.basicConfig(
     level=logging.DEBUG,
@@ -173,6 +257,23 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# Path prefixes authenticated from the bearer token only, without sessions;
+# other paths keep the cookie and session login used by the template views
+JWT_STATELESS_PATHS = ['/api/']
+# Users whose token lookups each worker keeps in memory
+AUTH_USER_CACHE_SIZE = env.int('AUTH_USER_CACHE_SIZE', default=10000)
+# Seconds after which a worker reloads a cached user even without an invalidation
+# (only matters when CACHES is not shared between workers)
+AUTH_USER_CACHE_TTL = 60
+
+# Password hashing settings
+# Threads per process that verify and compute password hashes (None: one per CPU)
+PASSWORD_HASHING_WORKERS = env.int('PASSWORD_HASHING_WORKERS', default=None)
+# Hashes that may wait for a thread; further logins get a 503 right away
+PASSWORD_HASHING_QUEUE_SIZE = env.int('PASSWORD_HASHING_QUEUE_SIZE', default=64)
+# Seconds a request waits for its hash before giving up with a 503
+PASSWORD_HASHING_TIMEOUT = 10
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # For development only, set to False in production
 CORS_ALLOWED_ORIGINS = [
@@ -202,6 +303,7 @@ if USE_CLOUD_STORAGE:
     
     # Use S3 for media storage
     DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+    MEDIA_FILE_STORAGE = 'core.storage.ContentAddressedS3Storage'
     MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/{AWS_LOCATION}/'
 
 # Static files
@@ -218,16 +320,37 @@ INTERNAL_IPS = [
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
-# Authentication backends
+# Authentication backends (the custom backend also covers ModelBackend's
+# lookups, so a failed login costs one query instead of two)
 AUTHENTICATION_BACKENDS = [
     'accounts.backends.EmailOrUsernameModelBackend',
-    'django.contrib.auth.backends.ModelBackend',
 ]
 
+# OTP settings
+# 'accounts.otp.CacheOTPBackend' keeps codes in the cache (CACHE_URL must be
+# shared between workers); 'accounts.otp.DatabaseOTPBackend' stores OTP rows.
+# Unset, the cache backend is used unless CACHE_URL is a local memory cache
+OTP_BACKEND = env('OTP_BACKEND', default=None)
+# Verification attempts allowed per code by the cache backend
+OTP_MAX_ATTEMPTS = 5
+
 # Email settings (for OTP)
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # For development
+# Console by default for development; 'django.core.mail.backends.filebased.EmailBackend'
+# writes to EMAIL_FILE_PATH and 'django.core.mail.backends.smtp.EmailBackend' sends
+EMAIL_BACKEND = env('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = env('EMAIL_FILE_PATH', default=str(BASE_DIR / 'sent_emails'))
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = env('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', default='')
+
+# Email queue settings (see core.mail and the send_queued_mail command)
+# Emails sent per batch over one connection
+EMAIL_QUEUE_BATCH_SIZE = 100
+# Attempts after which a failing email is marked failed
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+# Seconds before the first retry of a failed email, doubled on each further attempt
+EMAIL_QUEUE_RETRY_DELAY = 60
+# Seconds a worker owns the batch it claimed; a crashed worker's emails are retried after this
+EMAIL_QUEUE_LEASE = 300
@@ -15,10 +15,12 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.media import serve_media
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
@@ -32,12 +34,18 @@ urlpatterns = [
     path('api/accounts/', include('accounts.urls')),
     path('api/posts/', include('posts.api_urls')),
     path('api/social/', include('social_interactions.urls')),
+    path('api/search/', include('search.urls')),
     
     # Debug toolbar
     path('__debug__/', include('debug_toolbar.urls')),
 ]
 
-# Serve media files in development
+# Serve local media files (with byte ranges, conditional GET and proxy hand-off)
+if settings.MEDIA_URL.startswith('/'):
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
+    ]
+
+# Serve static files in development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)